@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""SQLite-backed application tracker replacing the flat ``Applications.csv``.
+
+The CSV answers "have I applied here?" and "what is due for follow-up?" with
+a full scan and rewrites the whole file on every edit.  This store keeps the
+same columns in an indexed table: lookups by link, company, status or
+follow-up date are B-tree searches, and edits are transactional upserts.
+
+Rows are keyed by the normalised link (scheme/host case, trailing slash and
+fragment ignored), or by company + role title when there is no link, so
+re-importing a CSV updates rows in place instead of duplicating them.
+
+Usage
+-----
+    python3 application_store.py import Applications.csv
+    python3 application_store.py export Applications.csv
+    python3 application_store.py applied --link https://jobs.example.com/123
+    python3 application_store.py applied --company ExampleCorp
+    python3 application_store.py due                     # follow-ups due today
+    python3 application_store.py due --date 2026-03-01
+    python3 application_store.py status Interview
+
+The database defaults to ~/.cache/autoresume/applications.sqlite
+(override with --db or AUTORESUME_APPLICATIONS_DB).
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+import sqlite3
+import sys
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+from urllib.parse import urlsplit, urlunsplit
+
+# CSV header -> SQL column, in the order Applications.csv uses.
+CSV_COLUMNS: Dict[str, str] = {
+    "Company": "company",
+    "Role title": "role_title",
+    "Link": "link",
+    "Date found": "date_found",
+    "Date applied": "date_applied",
+    "Status": "status",
+    "Resume variant": "resume_variant",
+    "Profile used": "profile_used",
+    "Notes": "notes",
+    "Follow-up date": "follow_up_date",
+    "Role Category": "role_category",
+}
+SQL_COLUMNS = list(CSV_COLUMNS.values())
+
+# Statuses that need no further follow-up.
+CLOSED_STATUSES = ("Offer", "Rejected", "Withdrawn", "Closed")
+
+DEFAULT_DB = os.environ.get("AUTORESUME_APPLICATIONS_DB") or os.path.join(
+    os.path.expanduser("~"), ".cache", "autoresume", "applications.sqlite"
+)
+
+# 1: applications table and indexes; 2: adds the pipeline's processed table.
+SCHEMA_VERSION = 2
+
+
+def normalize_link(link: str) -> str:
+    """Canonical form of a posting URL for dedup lookups."""
+    link = link.strip()
+    if not link:
+        return ""
+    parts = urlsplit(link)
+    if not parts.scheme:
+        return link.rstrip("/")
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        parts.path.rstrip("/"),
+        parts.query,
+        "",                      # fragments never identify a different posting
+    ))
+
+
+def row_key(row: Dict[str, str]) -> str:
+    """The row's identity: its normalised link, else company + role title.
+
+    A row with neither link nor company may carry ``source_id`` (not a
+    column, e.g. pipeline.py's feed path and record id) to key it instead.
+    """
+    link = normalize_link(row.get("link") or "")
+    if link:
+        return link
+    company = (row.get("company") or "").strip().lower()
+    if not company and row.get("source_id"):
+        return row["source_id"]
+    return "{}|{}".format(company, (row.get("role_title") or "").strip().lower())
+
+
+class ApplicationStore:
+    """Indexed SQLite table with the Applications.csv columns."""
+
+    def __init__(self, path: str = DEFAULT_DB):
+        self.path = path if path == ":memory:" else os.path.expanduser(path)
+        if self.path != ":memory:":
+            parent = os.path.dirname(self.path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+        self.db = sqlite3.connect(self.path)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        try:
+            self._create_schema()
+        except ValueError:
+            self.db.close()
+            raise
+
+    def _create_schema(self) -> None:
+        """Create the tables, or check and migrate an existing store to ``SCHEMA_VERSION``."""
+        version = self.db.execute("PRAGMA user_version").fetchone()[0]
+        if version > SCHEMA_VERSION:
+            raise ValueError(
+                f"{self.path} has schema version {version}; this application_store.py "
+                f"supports up to {SCHEMA_VERSION}"
+            )
+        existing = {row[1] for row in self.db.execute("PRAGMA table_info(applications)")}
+        if existing and not {"key", "link_norm"} <= existing:
+            raise ValueError(f"{self.path} has an 'applications' table that is not an application store")
+        columns = ",\n".join(
+            f"    {col} TEXT NOT NULL DEFAULT ''" + (" COLLATE NOCASE" if col == "company" else "")
+            for col in SQL_COLUMNS
+        )
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS applications (\n"
+                "    id INTEGER PRIMARY KEY,\n"
+                "    key TEXT NOT NULL UNIQUE,\n"
+                "    link_norm TEXT NOT NULL DEFAULT '',\n"
+                f"{columns}\n)"
+            )
+            for col in SQL_COLUMNS:
+                if existing and col not in existing:
+                    self.db.execute(f"ALTER TABLE applications ADD COLUMN {col} TEXT NOT NULL DEFAULT ''")
+            for name, column in (
+                ("link", "link_norm"),
+                ("company", "company"),
+                ("status", "status"),
+                ("follow_up", "follow_up_date"),
+            ):
+                self.db.execute(
+                    f"CREATE INDEX IF NOT EXISTS idx_applications_{name} ON applications({column})"
+                )
+            # Feed records already handled by pipeline.py, per input source (new in version 2).
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS processed (\n"
+                "    source TEXT NOT NULL,\n"
+                "    record_id TEXT NOT NULL,\n"
+                "    PRIMARY KEY (source, record_id)\n)"
+            )
+            self.db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # -- writes -------------------------------------------------------------
+
+    def upsert_many(self, rows: Iterable[Dict[str, str]], batch_size: int = 1000) -> int:
+        """Insert or update rows (SQL column names) in batches of one transaction each."""
+        cols = ", ".join(SQL_COLUMNS)
+        marks = ", ".join("?" * (len(SQL_COLUMNS) + 2))
+        updates = ", ".join(f"{col} = excluded.{col}" for col in SQL_COLUMNS)
+        sql = (
+            f"INSERT INTO applications (key, link_norm, {cols}) VALUES ({marks}) "
+            f"ON CONFLICT(key) DO UPDATE SET link_norm = excluded.link_norm, {updates}"
+        )
+        count = 0
+        batch: List[tuple] = []
+        for row in rows:
+            values = tuple((row.get(col) or "").strip() for col in SQL_COLUMNS)
+            batch.append((row_key(row), normalize_link(row.get("link") or ""), *values))
+            if len(batch) >= batch_size:
+                with self.db:
+                    self.db.executemany(sql, batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            with self.db:
+                self.db.executemany(sql, batch)
+            count += len(batch)
+        return count
+
+    def upsert(self, row: Dict[str, str]) -> None:
+        self.upsert_many([row])
+
+    def log_new(self, rows: Sequence[Dict[str, str]], source: str, record_ids: Sequence[str]) -> int:
+        """Insert rows that are not tracked yet and checkpoint *record_ids*, atomically.
+
+        Rows already in the store are left alone, so a posting that is
+        re-seen keeps its status.  Returns the number of rows inserted.
+        """
+        cols = ", ".join(SQL_COLUMNS)
+        marks = ", ".join("?" * (len(SQL_COLUMNS) + 2))
+        before = self.db.total_changes
+        with self.db:
+            self.db.executemany(
+                f"INSERT INTO applications (key, link_norm, {cols}) VALUES ({marks}) "
+                "ON CONFLICT(key) DO NOTHING",
+                [
+                    (row_key(row), normalize_link(row.get("link") or ""),
+                     *((row.get(col) or "").strip() for col in SQL_COLUMNS))
+                    for row in rows
+                ],
+            )
+            inserted = self.db.total_changes - before
+            self.db.executemany(
+                "INSERT OR IGNORE INTO processed (source, record_id) VALUES (?, ?)",
+                [(source, record_id) for record_id in record_ids],
+            )
+        return inserted
+
+    def processed_ids(self, source: str) -> Set[str]:
+        """Record ids from *source* that ``log_new`` has already checkpointed."""
+        return {row[0] for row in self.db.execute("SELECT record_id FROM processed WHERE source = ?", (source,))}
+
+    def import_csv(self, path: str, batch_size: int = 1000) -> int:
+        """Load an Applications.csv file; returns the number of rows upserted."""
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            rows = (
+                {sql: record.get(header, "") for header, sql in CSV_COLUMNS.items()}
+                for record in reader
+            )
+            return self.upsert_many(rows, batch_size)
+
+    def export_csv(self, path: str) -> int:
+        """Write every row back out in the Applications.csv schema."""
+        tmp = path + ".tmp"
+        count = 0
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(CSV_COLUMNS))
+            for row in self.db.execute(f"SELECT {', '.join(SQL_COLUMNS)} FROM applications ORDER BY id"):
+                writer.writerow(list(row))
+                count += 1
+        os.replace(tmp, path)
+        return count
+
+    # -- queries ------------------------------------------------------------
+
+    def _select(self, where: str, params: Sequence, order: str = "id") -> List[Dict[str, str]]:
+        rows = self.db.execute(
+            f"SELECT {', '.join(SQL_COLUMNS)} FROM applications WHERE {where} ORDER BY {order}",
+            params,
+        )
+        return [dict(row) for row in rows]
+
+    def by_link(self, link: str) -> List[Dict[str, str]]:
+        return self._select("link_norm = ?", (normalize_link(link),))
+
+    def by_keys(self, keys: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """Rows by their ``row_key``, for rows that exist (history_index.py joins on it)."""
+        found: Dict[str, Dict[str, str]] = {}
+        keys = list(dict.fromkeys(keys))
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT key, {', '.join(SQL_COLUMNS)} FROM applications "
+                f"WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk,
+            )
+            for row in rows:
+                row = dict(row)
+                found[row.pop("key")] = row
+        return found
+
+    def by_company(self, company: str) -> List[Dict[str, str]]:
+        return self._select("company = ?", (company.strip(),))
+
+    def by_status(self, status: str) -> List[Dict[str, str]]:
+        return self._select("status = ?", (status,))
+
+    def due_for_follow_up(self, on: Optional[str] = None) -> List[Dict[str, str]]:
+        """Open applications whose follow-up date is on or before *on* (ISO date, default today)."""
+        on = on or dt.date.today().isoformat()
+        closed = ", ".join("?" * len(CLOSED_STATUSES))
+        return self._select(
+            f"follow_up_date != '' AND follow_up_date <= ? AND status NOT IN ({closed})",
+            (on, *CLOSED_STATUSES),
+            order="follow_up_date, id",
+        )
+
+    def has_applied(self, link: Optional[str] = None, company: Optional[str] = None) -> bool:
+        if link:
+            return bool(self.by_link(link))
+        if company:
+            return bool(self.by_company(company))
+        raise ValueError("need a link or a company")
+
+    def explain(self, sql: str, params: Sequence = ()) -> List[str]:
+        """SQLite's query plan for *sql* (used to check index use)."""
+        return [row[-1] for row in self.db.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+    def __len__(self) -> int:
+        return self.db.execute("SELECT COUNT(*) FROM applications").fetchone()[0]
+
+    def close(self) -> None:
+        self.db.close()
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _print_rows(rows: List[Dict[str, str]], as_json: bool) -> None:
+    if as_json:
+        print(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        print("No matching applications.")
+        return
+    for row in rows:
+        follow_up = f"  follow-up {row['follow_up_date']}" if row["follow_up_date"] else ""
+        print(f"{row['company']:<24} {row['role_title']:<28} {row['status']:<10}{follow_up}  {row['link']}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Indexed application tracker (SQLite)")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"SQLite file (default: {DEFAULT_DB})")
+    parser.add_argument("--json", action="store_true", help="Print query results as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import", help="Upsert rows from an Applications.csv file")
+    p.add_argument("csv")
+    p = sub.add_parser("export", help="Write all rows in the Applications.csv schema")
+    p.add_argument("csv")
+    p = sub.add_parser("applied", help="Have I applied here? (exit 1 if not)")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--link")
+    group.add_argument("--company")
+    p = sub.add_parser("due", help="Open applications due for follow-up")
+    p.add_argument("--date", help="ISO date (default: today)")
+    p = sub.add_parser("status", help="Applications with this status")
+    p.add_argument("status")
+    args = parser.parse_args(argv)
+
+    try:
+        store = ApplicationStore(args.db)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    try:
+        if args.command == "import":
+            print(f"Imported {store.import_csv(args.csv)} rows into {store.path}")
+        elif args.command == "export":
+            print(f"Exported {store.export_csv(args.csv)} rows to {args.csv}")
+        elif args.command == "applied":
+            rows = store.by_link(args.link) if args.link else store.by_company(args.company)
+            _print_rows(rows, args.json)
+            if not rows:
+                sys.exit(1)
+        elif args.command == "due":
+            _print_rows(store.due_for_follow_up(args.date), args.json)
+        elif args.command == "status":
+            _print_rows(store.by_status(args.status), args.json)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""Benchmark harness for the JD classifier.
+
+For each backend this measures
+
+* cold start   — model load + anchor embed + first query, in a fresh process
+* latency      — p50/p95/p99 of single-JD ``classify_text`` calls
+* length       — p50 latency for JDs of increasing word count
+* throughput   — JDs/sec through ``classify_many`` per batch size
+* memory       — peak RSS of the benchmark process
+* accuracy     — top-1 against the labelled sample + synthetic corpus
+
+``--scaling`` measures ``--workers`` throughput instead, and ``--codecs``
+what each vector codec and dimensionality reduction (vector_codec.py)
+changes in the top-1 role.
+
+The JD embedding cache is disabled and anchors go to a scratch directory, so
+every number reflects real backend work.  ``--backends stub`` swaps the model
+for a deterministic hashed bag-of-words embedder, so the harness runs offline
+and in CI.
+
+Usage
+-----
+    python3 bench_classify.py --backends stub
+    python3 bench_classify.py --backends sbert,onnx --output bench.json
+    python3 bench_classify.py --backends stub --save-baseline bench_baseline.json
+    python3 bench_classify.py --backends stub --baseline bench_baseline.json  # exit 1 on regression
+    python3 bench_classify.py --backends sbert --scaling 1,2,4,8             # --workers scaling
+    python3 bench_classify.py --backends sbert --codecs --pca 128,64         # --vector-codec cost
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from multiprocessing import get_context
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import classify_jd
+
+SAMPLE_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_data", "JDs_sample.jsonl")
+BATCH_SIZES = (1, 8, 32, 128)
+JD_LENGTHS = (50, 200, 800)       # words
+
+# Headroom before a change counts as a regression: timings are noisy,
+# accuracy on a fixed corpus is not.
+DEFAULT_TOLERANCE = 0.20
+ACCURACY_TOLERANCE = 0.02
+
+
+# ---------------------------------------------------------------------------
+# Deterministic stub backend
+# ---------------------------------------------------------------------------
+
+class StubBackend(classify_jd.EmbeddingBackend):
+    """Hashed bag-of-words vectors: no model, no network, same output every run."""
+
+    name = "stub"
+    max_batch = 1024
+
+    def __init__(self, dim: int = 256):
+        self._dim = dim
+
+    @property
+    def model(self) -> str:
+        return f"hashed-bow-{self._dim}"
+
+    @property
+    def dim(self) -> int:
+        return self._dim
+
+    def embed(self, batch: List[str]) -> List[List[float]]:
+        out = []
+        for text in batch:
+            vec = [0.0] * self._dim
+            for word in text.lower().split():
+                digest = hashlib.md5(word.strip(".,;:()").encode("utf-8")).digest()
+                vec[int.from_bytes(digest[:4], "little") % self._dim] += 1.0
+            out.append(vec)
+        return out
+
+
+def ensure_stub_backend() -> None:
+    if "stub" not in classify_jd.available_backends():
+        classify_jd.register_backend(StubBackend())
+
+
+# ---------------------------------------------------------------------------
+# Corpora
+# ---------------------------------------------------------------------------
+
+def load_sample_corpus(path: str = SAMPLE_CORPUS) -> List[Tuple[str, str]]:
+    """``(text, label)`` pairs from a JSONL file with ``text`` and ``label`` fields."""
+    corpus = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                corpus.append((record["text"], record["label"]))
+    return corpus
+
+
+def synthetic_corpus(per_role: int = 20, seed: int = 0) -> List[Tuple[str, str]]:
+    """JDs stitched from shuffled fragments of each role's anchors, plus filler."""
+    rng = random.Random(seed)
+    filler = (
+        "We offer competitive compensation, hybrid work and a collaborative team. "
+        "Candidates should be curious, detail oriented and comfortable with ambiguity."
+    ).split()
+    corpus = []
+    for role in classify_jd.ROLES:
+        words = " ".join([role.anchor] + role.secondary_anchors).split()
+        for _ in range(per_role):
+            n = rng.randint(20, 60)
+            start = rng.randrange(max(1, len(words) - n))
+            body = words[start:start + n] + rng.sample(filler, k=8)
+            rng.shuffle(body)
+            corpus.append((" ".join(body), role.name))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def jd_of_length(words: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    vocab = " ".join(role.anchor for role in classify_jd.ROLES).split()
+    return " ".join(rng.choice(vocab) for _ in range(words))
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(q / 100.0 * len(ordered)) - 1)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:          # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+@dataclass
+class BackendResult:
+    backend: str
+    model: str
+    cold_start_ms: float
+    latency_ms: Dict[str, float]
+    length_p50_ms: Dict[str, float]
+    throughput_jds_per_s: Dict[str, float]
+    peak_rss_mb: Optional[float]
+    accuracy: float
+    corpus_size: int
+
+
+def bench_backend(
+    backend: str,
+    corpus: List[Tuple[str, str]],
+    batch_sizes: Sequence[int] = BATCH_SIZES,
+    lengths: Sequence[int] = JD_LENGTHS,
+    repeats: int = 3,
+    min_seconds: float = 0.5,
+) -> BackendResult:
+    """Run every measurement for one backend in the current process."""
+    ensure_stub_backend()
+    # Scratch anchor store and no JD memoisation: measure the backend, not the caches.
+    classify_jd.CACHE_DIR = tempfile.mkdtemp(prefix="autoresume-bench-")
+    classify_jd.configure_jd_cache(max_entries=0)
+
+    texts = [text for text, _ in corpus]
+    cold = classify_jd.warmup(backend)
+    cold_ms = (cold.model_load_seconds + cold.anchor_seconds + cold.query_seconds) * 1000
+
+    samples = []
+    correct = 0
+    for text, label in corpus:
+        t0 = time.perf_counter()
+        result = classify_jd.classify_text(text, backend=backend)
+        samples.append((time.perf_counter() - t0) * 1000)
+        correct += result.role_category == label
+
+    length_p50 = {}
+    for n in lengths:
+        times = []
+        for seed in range(repeats):
+            text = jd_of_length(n, seed)
+            t0 = time.perf_counter()
+            classify_jd.classify_text(text, backend=backend)
+            times.append((time.perf_counter() - t0) * 1000)
+        length_p50[str(n)] = round(percentile(times, 50), 3)
+
+    throughput = {}
+    for size in batch_sizes:
+        # At least a few full batches so small corpora still exercise batching,
+        # repeated until the timing is long enough to be stable.
+        stream = texts * max(1, math.ceil(3 * size / len(texts)))
+        count, elapsed = 0, 0.0
+        while count == 0 or elapsed < min_seconds:
+            t0 = time.perf_counter()
+            count += sum(1 for _ in classify_jd.classify_many(stream, backend=backend, batch_size=size))
+            elapsed += time.perf_counter() - t0
+        throughput[str(size)] = round(count / elapsed, 1)
+
+    return BackendResult(
+        backend=backend,
+        model=classify_jd.model_name(backend),
+        cold_start_ms=round(cold_ms, 3),
+        latency_ms={f"p{q}": round(percentile(samples, q), 3) for q in (50, 95, 99)},
+        length_p50_ms=length_p50,
+        throughput_jds_per_s=throughput,
+        peak_rss_mb=peak_rss_mb(),
+        accuracy=round(correct / len(corpus), 4) if corpus else 0.0,
+        corpus_size=len(corpus),
+    )
+
+
+def run_benchmark(
+    backends: Sequence[str],
+    corpus: List[Tuple[str, str]],
+    isolate: bool = True,
+    **kwargs,
+) -> dict:
+    """Benchmark each backend, each in its own process when *isolate* is set.
+
+    A fresh process per backend makes cold start and peak RSS comparable.
+    """
+    results = {}
+    for backend in backends:
+        if isolate:
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                result = pool.submit(bench_backend, backend, corpus, **kwargs).result()
+        else:
+            result = bench_backend(backend, corpus, **kwargs)
+        results[backend] = asdict(result)
+    return {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus_size": len(corpus),
+            "isolated": isolate,
+        },
+        "backends": results,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Multiprocess scaling
+# ---------------------------------------------------------------------------
+
+def bench_scaling(
+    backend: str,
+    worker_counts: Sequence[int],
+    jds: int = 2000,
+    words: int = 200,
+    batch_size: int = 32,
+    threads: Optional[int] = 1,
+) -> dict:
+    """Steady-state JDs/sec through ``classify_parallel`` for each worker count.
+
+    Every JD is distinct, so the per-worker JD caches never hit.  The clock
+    starts at the first result, so pool start-up and model loads are not
+    counted.
+    """
+    from parallel_classify import classify_parallel
+
+    ensure_stub_backend()
+    texts = [jd_of_length(words, seed) for seed in range(jds)]
+    previous = os.environ.get("AUTORESUME_CACHE_DIR")
+    os.environ["AUTORESUME_CACHE_DIR"] = tempfile.mkdtemp(prefix="autoresume-bench-")
+    rates = {}
+    try:
+        for n in worker_counts:
+            stream = classify_parallel(
+                texts, backend, workers=n, threads=threads, batch_size=batch_size,
+            )
+            next(stream)
+            t0 = time.perf_counter()
+            count = sum(1 for _ in stream)
+            rates[str(n)] = round(count / (time.perf_counter() - t0), 1)
+    finally:
+        if previous is None:
+            del os.environ["AUTORESUME_CACHE_DIR"]
+        else:
+            os.environ["AUTORESUME_CACHE_DIR"] = previous
+
+    first = str(worker_counts[0])
+    per_worker = rates[first] / worker_counts[0]
+    return {
+        "backend": backend,
+        "jds": jds,
+        "words": words,
+        "batch_size": batch_size,
+        "threads_per_worker": threads,
+        "cpu_count": os.cpu_count(),
+        "jds_per_s": rates,
+        "efficiency": {n: round(rate / (per_worker * int(n)), 3) for n, rate in rates.items()},
+    }
+
+
+def format_scaling(result: dict) -> str:
+    lines = [
+        f"{result['backend']}: {result['jds']} JDs x {result['words']} words, batch {result['batch_size']}, "
+        f"{result['threads_per_worker']} thread(s)/worker, {result['cpu_count']} CPUs"
+    ]
+    for n, rate in result["jds_per_s"].items():
+        lines.append(f"  workers={n:<3} {rate:9.1f} JDs/s   efficiency {result['efficiency'][n]:.0%}")
+    return "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Vector codecs
+# ---------------------------------------------------------------------------
+
+def codec_corpus(per_role: int = 100, random_jds: int = 500) -> List[str]:
+    texts = [text for text, _ in load_sample_corpus()]
+    texts += [text for text, _ in synthetic_corpus(per_role)]
+    # Random draws from the pooled vocabulary sit between roles: the hard case.
+    texts += [jd_of_length(80, seed) for seed in range(random_jds)]
+    return texts
+
+
+def bench_codecs(
+    backend: str,
+    dims: Sequence[int] = (),
+    pca_dims: Sequence[int] = (),
+    per_role: int = 100,
+    random_jds: int = 500,
+) -> List[dict]:
+    """``vector_codec.top1_changes`` for every codec × reduction on ``codec_corpus``."""
+    from vector_codec import CODECS, PCA, top1_changes, truncate
+
+    np = classify_jd.np
+    ensure_stub_backend()
+    texts = codec_corpus(per_role, random_jds)
+    jd_vecs = np.asarray(classify_jd.get_query_embeddings(texts, backend), dtype=np.float32)
+    anchors = np.asarray(classify_jd.get_anchor_embeddings(backend), dtype=np.float32)
+
+    reductions = [("full", None)]
+    reductions += [(f"truncate {d}", lambda m, d=d: truncate(m, d)) for d in dims]
+    for d in pca_dims:
+        pca = PCA.fit(jd_vecs, d)
+        reductions.append((f"pca {d}", pca.transform))
+    rows = []
+    for label, reduce in reductions:
+        for codec in CODECS:
+            row = top1_changes(jd_vecs, anchors, codec, reduce)
+            row.update(reduction=label, jds=len(texts))
+            rows.append(row)
+    return rows
+
+
+def format_codecs(rows: Sequence[dict], backend: str) -> str:
+    lines = [
+        f"{backend}: {rows[0]['jds']} JDs; top-1 role vs full-dimension float32, "
+        f"|Δcos| vs float32 at the same dimension"
+    ]
+    for row in rows:
+        lines.append(
+            f"  {row['reduction']:<13} {row['codec']:<8} dim={row['dim']:<5} "
+            f"{row['bytes_per_vector']:>5} B/vec  top-1 changed {row['top1_changed']:>4} "
+            f"({row['top1_change_rate']:.2%})  max |Δcos| {row['max_cosine_error']:.4f}"
+        )
+    return "\n".join(lines)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+# ---------------------------------------------------------------------------
+# Regression check
+# ---------------------------------------------------------------------------
+
+def compare_to_baseline(report: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Human-readable regressions of *report* against *baseline*; empty if none."""
+    problems = []
+    for backend, base in baseline.get("backends", {}).items():
+        current = report["backends"].get(backend)
+        if current is None:
+            continue
+        if current["accuracy"] < base["accuracy"] - ACCURACY_TOLERANCE:
+            problems.append(
+                f"{backend}: accuracy {current['accuracy']:.3f} < baseline {base['accuracy']:.3f}"
+            )
+        for q, base_ms in base["latency_ms"].items():
+            now_ms = current["latency_ms"].get(q)
+            if now_ms is not None and now_ms > base_ms * (1 + tolerance):
+                problems.append(f"{backend}: latency {q} {now_ms:.2f} ms > baseline {base_ms:.2f} ms")
+        for size, base_rate in base["throughput_jds_per_s"].items():
+            rate = current["throughput_jds_per_s"].get(size)
+            if rate is not None and rate < base_rate * (1 - tolerance):
+                problems.append(
+                    f"{backend}: batch {size} throughput {rate:.1f}/s < baseline {base_rate:.1f}/s"
+                )
+    return problems
+
+
+def format_report(report: dict) -> str:
+    lines = []
+    for backend, r in report["backends"].items():
+        lat = r["latency_ms"]
+        lines.append(
+            f"{backend} ({r['model']}): cold start {r['cold_start_ms']:.0f} ms, "
+            f"p50 {lat['p50']:.2f} / p95 {lat['p95']:.2f} / p99 {lat['p99']:.2f} ms, "
+            f"top-1 {r['accuracy']:.1%} on {r['corpus_size']} JDs, "
+            f"peak RSS {r['peak_rss_mb']} MB"
+        )
+        lines.append("  throughput  " + "  ".join(
+            f"b={size}: {rate:.0f}/s" for size, rate in r["throughput_jds_per_s"].items()
+        ))
+        lines.append("  length p50  " + "  ".join(
+            f"{words}w: {ms:.2f} ms" for words, ms in r["length_p50_ms"].items()
+        ))
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the JD classifier")
+    parser.add_argument(
+        "--backends",
+        default="stub",
+        help="Comma-separated backends to benchmark; 'stub' needs no model (default: stub)",
+    )
+    parser.add_argument("--corpus", default=SAMPLE_CORPUS, help="Labelled JSONL corpus")
+    parser.add_argument(
+        "--synthetic",
+        type=int,
+        help="Synthetic JDs per role added to the corpus (default: 20, or 100 with --codecs)",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--batch-sizes",
+        default=",".join(map(str, BATCH_SIZES)),
+        help="Comma-separated classify_many batch sizes",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Run all backends in this process (cold start and RSS are then not comparable)",
+    )
+    parser.add_argument(
+        "--scaling",
+        metavar="N,N,...",
+        help="Instead of the full benchmark, measure --workers throughput for these worker counts",
+    )
+    parser.add_argument("--scaling-jds", type=int, default=2000, help="JDs per --scaling run (default: 2000)")
+    parser.add_argument(
+        "--worker-threads",
+        type=int,
+        default=1,
+        help="torch/BLAS threads per worker for --scaling (default: 1)",
+    )
+    parser.add_argument(
+        "--codecs",
+        action="store_true",
+        help="Instead of the full benchmark, measure top-1 role changes per vector codec and reduction",
+    )
+    parser.add_argument("--truncate", type=_int_list, default=[], metavar="D1,D2",
+                        help="Matryoshka truncation sizes for --codecs (text-embedding-3-* only)")
+    parser.add_argument("--pca", type=_int_list, default=[], metavar="D1,D2",
+                        help="PCA sizes for --codecs (fitted on the evaluation JDs)")
+    parser.add_argument("--random-jds", type=int, default=500,
+                        help="JDs drawn from the pooled anchor vocabulary for --codecs (default: 500)")
+    parser.add_argument("--output", help="Write the JSON report here")
+    parser.add_argument("--baseline", help="Compare against this JSON report; exit 1 on regression")
+    parser.add_argument("--save-baseline", help="Also write the report as a new baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed latency/throughput slowdown vs the baseline (default: {DEFAULT_TOLERANCE})",
+    )
+    args = parser.parse_args()
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+
+    if args.scaling:
+        counts = [int(n) for n in args.scaling.split(",")]
+        results = [
+            bench_scaling(backend, counts, jds=args.scaling_jds, threads=args.worker_threads)
+            for backend in backends
+        ]
+        for result in results:
+            print(format_scaling(result), file=sys.stderr)
+        report = {"scaling": results}
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        return
+
+    if args.codecs:
+        if classify_jd.np is None:
+            print("--codecs needs numpy: pip install numpy", file=sys.stderr)
+            sys.exit(1)
+        per_role = 100 if args.synthetic is None else args.synthetic
+        report = {"codecs": {}}
+        for backend in backends:
+            rows = bench_codecs(backend, args.truncate, args.pca, per_role, args.random_jds)
+            print(format_codecs(rows, backend), file=sys.stderr)
+            report["codecs"][backend] = rows
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+        return
+
+    synthetic = 20 if args.synthetic is None else args.synthetic
+    corpus = load_sample_corpus(args.corpus) + synthetic_corpus(synthetic, args.seed)
+    report = run_benchmark(
+        backends,
+        corpus,
+        isolate=not args.in_process,
+        batch_sizes=[int(s) for s in args.batch_sizes.split(",")],
+    )
+    print(format_report(report), file=sys.stderr)
+
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if not args.output:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            problems = compare_to_baseline(report, json.load(f), args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
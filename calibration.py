@@ -0,0 +1,260 @@
+"""Fit the classifier's softmax temperature and "none of the above" thresholds.
+
+``classify_jd`` always picks a role, even for a posting that matches none of
+them, and its confidence comes from a fixed ``temperature=0.1``.  Given
+labelled history — a JSONL file of ``{"text": ..., "label": ...}`` where the
+label is a role name, or ``none`` for a posting that fits no role — this
+module fits:
+
+* the temperature that minimises the negative log-likelihood of the true
+  role on the in-scope postings, so ``confidence`` is a calibrated
+  probability;
+* one threshold per role on the best raw cosine: a JD whose winning role
+  scores below that role's threshold is out of scope.  Each threshold
+  minimises ``error_cost × wrongly accepted + wrongly rejected`` over the
+  postings that role wins.  A role that never wins a wrong posting gives no
+  evidence for a threshold, so it gets the one fitted on all roles pooled,
+  lowered if needed to keep the role's correct postings.
+
+The result is a ``classify_jd.Calibration``.  ``role_catalogue.py calibrate``
+fits one and stores it in the compiled artifact, and ``--roles`` applies it.
+The report gives the accuracy / coverage tradeoff as all thresholds shift
+together.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import zlib
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import classify_jd
+from classify_jd import Calibration, RoleSpec
+
+OUT_OF_SCOPE_LABELS = frozenset({"", "none", "other", "out_of_scope", "out-of-scope"})
+
+# Threshold shifts reported in the accuracy / coverage table.
+TRADEOFF_OFFSETS = (-0.10, -0.05, -0.02, 0.0, 0.02, 0.05, 0.10)
+
+
+@dataclass
+class OperatingPoint:
+    offset: float            # added to every threshold
+    coverage: float          # in-scope postings accepted
+    accuracy: float          # accepted postings routed to their true role
+    rejected_out: float      # out-of-scope postings rejected
+
+    def to_dict(self) -> dict:
+        return {k: round(v, 4) for k, v in self.__dict__.items()}
+
+
+@dataclass
+class CalibrationReport:
+    samples: int
+    in_scope: int
+    out_of_scope: int
+    evaluated_on: str                    # "training set" or "held-out N"
+    uncalibrated_accuracy: float         # top-1 over all postings, no rejection
+    calibrated: OperatingPoint
+    tradeoff: List[OperatingPoint] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "samples": self.samples,
+            "in_scope": self.in_scope,
+            "out_of_scope": self.out_of_scope,
+            "evaluated_on": self.evaluated_on,
+            "uncalibrated_accuracy": round(self.uncalibrated_accuracy, 4),
+            "calibrated": self.calibrated.to_dict(),
+            "tradeoff": [point.to_dict() for point in self.tradeoff],
+        }
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.samples} labelled postings ({self.in_scope} in scope, {self.out_of_scope} out of scope), "
+            f"evaluated on {self.evaluated_on}",
+            f"  without rejection: accuracy {self.uncalibrated_accuracy:.1%} (out-of-scope postings count as errors)",
+            "  threshold shift   coverage   accuracy   out-of-scope rejected",
+        ]
+        for point in self.tradeoff:
+            mark = "  <- fitted" if point.offset == 0 else ""
+            lines.append(
+                f"  {point.offset:+15.2f}   {point.coverage:8.1%}   {point.accuracy:8.1%}   "
+                f"{point.rejected_out:8.1%}{mark}"
+            )
+        return "\n".join(lines)
+
+
+def load_history(path: str) -> List[Tuple[str, Optional[str]]]:
+    """``(text, label)`` pairs; the label is ``None`` for out-of-scope postings."""
+    history = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            label = str(record.get("label") or "").strip()
+            history.append((record["text"], None if label.lower() in OUT_OF_SCOPE_LABELS else label))
+    return history
+
+
+# ---------------------------------------------------------------------------
+# Fitting (pure Python: a few thousand rows x a handful of roles)
+# ---------------------------------------------------------------------------
+
+def _nll(rows: Sequence[Sequence[float]], labels: Sequence[int], temperature: float) -> float:
+    total = 0.0
+    for sims, label in zip(rows, labels):
+        top = max(sims)
+        log_z = math.log(sum(math.exp((s - top) / temperature) for s in sims))
+        total -= (sims[label] - top) / temperature - log_z
+    return total / len(rows)
+
+
+def fit_temperature(rows: Sequence[Sequence[float]], labels: Sequence[int]) -> float:
+    """Temperature minimising the NLL of the true role (log grid, then golden section).
+
+    Kept within [0.01, 3]: on separable history the NLL keeps falling as the
+    temperature goes to zero.
+    """
+    if not rows:
+        return classify_jd.DEFAULT_TEMPERATURE
+    grid = [10 ** (-2 + 0.05 * i) for i in range(51)]            # 0.01 .. 3.2
+    losses = [_nll(rows, labels, t) for t in grid]
+    i = min(range(len(grid)), key=losses.__getitem__)
+    lo, hi = math.log(grid[max(i - 1, 0)]), math.log(grid[min(i + 1, len(grid) - 1)])
+    ratio = (math.sqrt(5) - 1) / 2
+    for _ in range(40):
+        a, b = hi - ratio * (hi - lo), lo + ratio * (hi - lo)
+        if _nll(rows, labels, math.exp(a)) <= _nll(rows, labels, math.exp(b)):
+            hi = b
+        else:
+            lo = a
+    return round(math.exp((lo + hi) / 2), 6)
+
+
+def _best_threshold(scored: Sequence[Tuple[float, bool]], error_cost: float) -> float:
+    """Threshold on *scored* ``(cosine, correct)`` minimising the weighted error."""
+    ordered = sorted(scored)
+    # Accepting everything: every wrong winner is an error.
+    cost = error_cost * sum(1 for _, good in ordered if not good)
+    best_cost, best = cost, -math.inf
+    for i, (sim, good) in enumerate(ordered):
+        # Raise the threshold past ordered[i]: it is rejected from now on.
+        cost += 1 if good else -error_cost
+        if i + 1 < len(ordered) and ordered[i + 1][0] == sim:
+            continue
+        if cost < best_cost:
+            nxt = ordered[i + 1][0] if i + 1 < len(ordered) else sim + 1e-4
+            best_cost, best = cost, (sim + nxt) / 2
+    return best
+
+
+def fit_thresholds(
+    rows: Sequence[Sequence[float]],
+    labels: Sequence[Optional[int]],
+    roles: Sequence[RoleSpec],
+    error_cost: float = 1.0,
+) -> Dict[str, float]:
+    """Per-role thresholds on the winning cosine; *labels* are role indices or ``None``."""
+    by_role: Dict[int, List[Tuple[float, bool]]] = {}
+    for sims, label in zip(rows, labels):
+        best = max(range(len(sims)), key=sims.__getitem__)
+        by_role.setdefault(best, []).append((sims[best], best == label))
+    pooled = _best_threshold([item for items in by_role.values() for item in items], error_cost)
+    thresholds = {}
+    for j, role in enumerate(roles):
+        scored = by_role.get(j, [])
+        if any(not good for _, good in scored):
+            t = _best_threshold(scored, error_cost)
+        else:
+            t = min([pooled] + [sim for sim, _ in scored])
+        if t != -math.inf:
+            thresholds[role.name] = math.floor(t * 1e6) / 1e6     # never above the fitted value
+    return thresholds
+
+
+def operating_point(
+    rows: Sequence[Sequence[float]],
+    labels: Sequence[Optional[int]],
+    roles: Sequence[RoleSpec],
+    thresholds: Dict[str, float],
+    offset: float = 0.0,
+) -> OperatingPoint:
+    accepted_in = accepted_correct = accepted = rejected_out = n_in = n_out = 0
+    for sims, label in zip(rows, labels):
+        best = max(range(len(sims)), key=sims.__getitem__)
+        ok = sims[best] >= thresholds.get(roles[best].name, -math.inf) + offset
+        if label is None:
+            n_out += 1
+            rejected_out += not ok
+        else:
+            n_in += 1
+            accepted_in += ok
+        if ok:
+            accepted += 1
+            accepted_correct += best == label
+    return OperatingPoint(
+        offset=offset,
+        coverage=accepted_in / n_in if n_in else 0.0,
+        accuracy=accepted_correct / accepted if accepted else 0.0,
+        rejected_out=rejected_out / n_out if n_out else 0.0,
+    )
+
+
+def _held_out(text: str, fraction: float) -> bool:
+    # Stable across runs and Python versions, unlike hash().
+    return zlib.crc32(text.encode("utf-8")) % 1000 < fraction * 1000
+
+
+def fit(
+    history: Sequence[Tuple[str, Optional[str]]],
+    backend: str,
+    roles: Optional[List[RoleSpec]] = None,
+    scoring: str = "joined",
+    error_cost: float = 1.0,
+    holdout: float = 0.0,
+) -> Tuple[Calibration, CalibrationReport]:
+    """Fit a calibration for *roles* (default ``ROLES``) on labelled *history*.
+
+    With *holdout* > 0 that fraction of the postings (chosen by a hash of the
+    text) is kept out of the fit and the report is computed on it alone.
+    """
+    roles = classify_jd.ROLES if roles is None else roles
+    index = {role.name: j for j, role in enumerate(roles)}
+    unknown = sorted({label for _, label in history if label is not None and label not in index})
+    if unknown:
+        raise ValueError(f"labels are not roles (use 'none' for out of scope): {', '.join(unknown)}")
+    if not history:
+        raise ValueError("no labelled postings")
+
+    classify_jd._prepare_anchors(backend, roles, scoring)
+    texts = [text for text, _ in history]
+    vecs = classify_jd.get_query_embeddings(texts, backend)
+    sims = [[float(x) for x in row] for row in classify_jd._similarity_rows(vecs, backend, roles, scoring)]
+    labels = [None if label is None else index[label] for _, label in history]
+
+    test = [_held_out(text, holdout) for text in texts] if holdout > 0 else [False] * len(texts)
+    train = [i for i, held in enumerate(test) if not held] or list(range(len(texts)))
+    evaluate = [i for i, held in enumerate(test) if held] or train
+
+    in_scope = [i for i in train if labels[i] is not None]
+    temperature = fit_temperature([sims[i] for i in in_scope], [labels[i] for i in in_scope])
+    thresholds = fit_thresholds([sims[i] for i in train], [labels[i] for i in train], roles, error_cost)
+    calibration = Calibration(temperature=temperature, thresholds=thresholds, scoring=scoring)
+
+    eval_rows = [sims[i] for i in evaluate]
+    eval_labels = [labels[i] for i in evaluate]
+    uncalibrated = operating_point(eval_rows, eval_labels, roles, {})
+    report = CalibrationReport(
+        samples=len(evaluate),
+        in_scope=sum(label is not None for label in eval_labels),
+        out_of_scope=sum(label is None for label in eval_labels),
+        evaluated_on=f"{len(evaluate)} held-out postings" if evaluate is not train else "the training set",
+        uncalibrated_accuracy=uncalibrated.accuracy,
+        calibrated=operating_point(eval_rows, eval_labels, roles, thresholds),
+        tradeoff=[operating_point(eval_rows, eval_labels, roles, thresholds, off) for off in TRADEOFF_OFFSETS],
+    )
+    return calibration, report
@@ -0,0 +1,373 @@
+"""Resident classification daemon and its thin client.
+
+A one-shot ``classify_jd.py`` run pays interpreter start, the backend import,
+model load and anchor embedding before it scores a single JD.  ``--serve``
+keeps all of that resident and answers requests over a Unix socket (default)
+or localhost HTTP.  Requests that arrive within ``max_wait`` of each other are
+grouped into one embedding batch, so a burst from a browser extension costs
+one backend call rather than one per page.
+
+Protocol (HTTP/1.1, JSON, on either transport)
+----------------------------------------------
+    POST /classify  {"text": "...", "backend": "sbert", "pooling": "none", "settings": {...}}
+                    -> classify_jd --json payload; 409 when the backend or
+                       settings (roles, scoring, chunking, calibration)
+                       differ from the daemon's, so the client runs locally
+    GET  /stats     -> request/batch counters and latency percentiles (ms)
+    GET  /metrics   -> classifier spans and counters, Prometheus text format
+    GET  /health    -> {"ok": true, "backend": "sbert"}
+
+The server side is transport and model agnostic: ``ClassifierDaemon`` takes a
+``classify_batch(texts, pooling) -> [payload, ...]`` callable.  The client
+side imports nothing heavy, so ``--text`` stays fast when the daemon is up.
+"""
+
+from __future__ import annotations
+
+import http.client
+import json
+import math
+import os
+import socket
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+import metrics
+
+ClassifyBatch = Callable[[List[str], str], List[dict]]
+
+
+def default_socket_path(cache_dir: str) -> str:
+    return os.environ.get("AUTORESUME_DAEMON_SOCKET") or os.path.join(cache_dir, "classifier.sock")
+
+
+# ---------------------------------------------------------------------------
+# Latency tracking
+# ---------------------------------------------------------------------------
+
+class LatencyStats:
+    """Request latencies over the last ``window`` requests, plus batch counters."""
+
+    def __init__(self, window: int = 10_000):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.batches = 0
+        self.batched_items = 0
+
+    def record_request(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds * 1000.0)
+            self.requests += 1
+
+    def record_batch(self, size: int) -> None:
+        with self._lock:
+            self.batches += 1
+            self.batched_items += size
+
+    @staticmethod
+    def percentile(ordered: List[float], q: float) -> float:
+        """Nearest-rank percentile of an already sorted list."""
+        if not ordered:
+            return 0.0
+        return ordered[max(0, math.ceil(q / 100.0 * len(ordered)) - 1)]
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._samples)
+            requests, batches, items = self.requests, self.batches, self.batched_items
+        latency = {f"p{q}": round(self.percentile(ordered, q), 3) for q in (50, 90, 95, 99)}
+        latency["max"] = round(ordered[-1], 3) if ordered else 0.0
+        return {
+            "requests": requests,
+            "batches": batches,
+            "mean_batch_size": round(items / batches, 2) if batches else 0.0,
+            "latency_ms": latency,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Micro-batching
+# ---------------------------------------------------------------------------
+
+class MicroBatcher:
+    """Collect concurrent requests into batches for one ``classify_batch`` call.
+
+    The worker blocks for the first request, then keeps collecting until
+    ``max_wait`` seconds have passed or ``max_batch`` requests are queued.
+    """
+
+    def __init__(
+        self,
+        classify_batch: ClassifyBatch,
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        stats: Optional[LatencyStats] = None,
+    ):
+        self.classify_batch = classify_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = stats or LatencyStats()
+        self._queue: "Queue[Optional[Tuple[str, str, Future]]]" = Queue()
+        self._worker = threading.Thread(target=self._run, name="classify-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str, pooling: str = "none") -> Future:
+        future: Future = Future()
+        self._queue.put((text, pooling, future))
+        return future
+
+    def classify(self, text: str, pooling: str = "none", timeout: Optional[float] = None) -> dict:
+        return self.submit(text, pooling).result(timeout)
+
+    def close(self) -> None:
+        self._queue.put(None)
+        self._worker.join()
+
+    def _collect(self, first: Tuple[str, str, Future]) -> Tuple[List[Tuple[str, str, Future]], bool]:
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except Empty:
+                break
+            if item is None:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch, stop = self._collect(first)
+            self.stats.record_batch(len(batch))
+
+            # One call per pooling mode present in the batch.
+            groups: Dict[str, List[Tuple[str, Future]]] = {}
+            for text, pooling, future in batch:
+                groups.setdefault(pooling, []).append((text, future))
+            for pooling, items in groups.items():
+                try:
+                    payloads = self.classify_batch([text for text, _ in items], pooling)
+                except Exception as e:          # hand the failure to every waiter
+                    for _, future in items:
+                        future.set_exception(e)
+                    continue
+                for (_, future), payload in zip(items, payloads):
+                    future.set_result(payload)
+            if stop:
+                return
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "autoresume-classifier"
+
+    def log_message(self, *args):
+        pass
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) pair.
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send(self, status: int, payload: dict) -> None:
+        self._send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _send_body(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        daemon = self.server.daemon_state
+        if self.path == "/health":
+            self._send(200, {"ok": True, "backend": daemon.backend})
+        elif self.path == "/stats":
+            self._send(200, daemon.batcher.stats.snapshot())
+        elif self.path == "/metrics":
+            self._send_body(200, metrics.prometheus_text().encode("utf-8"), "text/plain; version=0.0.4")
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        daemon = self.server.daemon_state
+        if self.path != "/classify":
+            self._send(404, {"error": "not found"})
+            return
+        t0 = time.perf_counter()
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            text = request["text"]
+        except (ValueError, KeyError, TypeError):
+            self._send(400, {"error": "expected a JSON object with a 'text' field"})
+            return
+        backend = request.get("backend", daemon.backend)
+        if backend != daemon.backend:
+            self._send(409, {"error": f"daemon serves backend {daemon.backend!r}"})
+            return
+        if request.get("settings", {}) != daemon.settings:
+            # Other roles, scoring, chunking or calibration: the answer would differ.
+            self._send(409, {"error": "daemon classifies with other settings", "settings": daemon.settings})
+            return
+        try:
+            payload = daemon.batcher.classify(text, request.get("pooling", "none"))
+        except ValueError as e:
+            self._send(400, {"error": str(e)})
+            return
+        daemon.batcher.stats.record_request(time.perf_counter() - t0)
+        self._send(200, payload)
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+class _TCPHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class ClassifierDaemon:
+    """A micro-batching classifier bound to a Unix socket or a localhost port."""
+
+    def __init__(
+        self,
+        classify_batch: ClassifyBatch,
+        backend: str,
+        socket_path: Optional[str] = None,
+        port: Optional[int] = None,
+        max_batch: int = 64,
+        max_wait: float = 0.005,
+        settings: Optional[dict] = None,
+    ):
+        self.backend = backend
+        # Everything besides backend and pooling that changes a result; requests must match it.
+        self.settings = settings or {}
+        self.socket_path = socket_path
+        if port is not None:
+            self.server = _TCPHTTPServer(("127.0.0.1", port), _Handler)
+            self.address = f"http://127.0.0.1:{self.server.server_address[1]}"
+        else:
+            if not socket_path:
+                raise ValueError("need a socket path or a port")
+            _remove_stale_socket(socket_path)
+            os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+            # bind() creates the socket file; the umask keeps it private from the start.
+            umask = os.umask(0o077)
+            try:
+                self.server = _UnixHTTPServer(socket_path, _Handler)
+            finally:
+                os.umask(umask)
+            os.chmod(socket_path, 0o600)
+            self.address = f"unix:{socket_path}"
+        self.server.daemon_state = self
+        self.batcher = MicroBatcher(classify_batch, max_batch=max_batch, max_wait=max_wait)
+
+    def serve_forever(self) -> None:
+        try:
+            self.server.serve_forever()
+        finally:
+            self.close()
+
+    def start(self) -> threading.Thread:
+        """Serve from a background thread (tests, embedding in other tools)."""
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.batcher.close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _remove_stale_socket(path: str) -> None:
+    """Unlink *path* if nothing is listening on it; refuse if a daemon is."""
+    if not os.path.exists(path):
+        return
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        probe.connect(path)
+    except OSError:
+        os.unlink(path)
+    else:
+        raise OSError(f"a classifier daemon is already listening on {path}")
+    finally:
+        probe.close()
+
+
+# ---------------------------------------------------------------------------
+# Client
+# ---------------------------------------------------------------------------
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.unix_path)
+        self.sock = sock
+
+
+def _connect(address: str, timeout: float) -> http.client.HTTPConnection:
+    if address.startswith("unix:"):
+        return _UnixHTTPConnection(address[len("unix:"):], timeout)
+    host_port = address.split("://", 1)[-1].rstrip("/")
+    return http.client.HTTPConnection(host_port, timeout=timeout)
+
+
+def request(address: str, method: str, path: str, payload: Optional[dict] = None,
+            timeout: float = 30.0) -> Optional[dict]:
+    """Send one request; ``None`` when no daemon is reachable or it declines."""
+    if address.startswith("unix:") and not os.path.exists(address[len("unix:"):]):
+        return None
+    conn = _connect(address, timeout)
+    try:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        resp = conn.getresponse()
+        data = resp.read()
+    except OSError:
+        return None
+    finally:
+        conn.close()
+    if resp.status != 200:
+        return None
+    return json.loads(data)
+
+
+def classify_remote(address: str, text: str, backend: str, pooling: str = "none",
+                    timeout: float = 30.0, settings: Optional[dict] = None) -> Optional[dict]:
+    """Classify via a running daemon, or return ``None`` so the caller runs locally.
+
+    The daemon declines (and this returns ``None``) unless *settings* equal
+    the ones it was started with.
+    """
+    return request(
+        address, "POST", "/classify",
+        {"text": text, "backend": backend, "pooling": pooling, "settings": settings or {}},
+        timeout=timeout,
+    )
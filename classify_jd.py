@@ -11,10 +11,18 @@ sentence-transformers (default, local, free):
     pip install sentence-transformers
     Model: all-MiniLM-L6-v2  (~80 MB, ~50 ms/query on CPU)
 
+onnx (local, no torch, fastest cold start on CPU):
+    pip install onnxruntime tokenizers numpy
+    python3 onnx_backend.py export ~/.cache/autoresume/onnx/all-MiniLM-L6-v2
+    Same MiniLM model, int8-quantized when model_quantized.onnx is present
+    (AUTORESUME_ONNX_QUANTIZED=0 forces float32; AUTORESUME_ONNX_DIR moves it).
+
 openai (higher accuracy, requires API key):
-    pip install openai
     export OPENAI_API_KEY=sk-...
     python3 classify_jd.py --text "..." --backend openai
+    Requests are chunked and rate-limited (--openai-rpm / --openai-tpm);
+    OPENAI_BASE_URL points the client at a proxy or stub server.
+    --openai-dims N asks for N-dimensional (Matryoshka-truncated) vectors.
 
 Usage
 -----
@@ -23,17 +31,64 @@ Usage
     python3 classify_jd.py --text "..." --json
     python3 classify_jd.py --text "..." --backend openai
     python3 classify_jd.py --text "..." --explain      # show top-3 with scores
+    python3 classify_jd.py --batch postings.jsonl --output results.jsonl
+    python3 classify_jd.py --batch "scraped/**/*.txt" --batch-size 64
+    python3 classify_jd.py --batch archive.jsonl --workers 8 --worker-threads 2
+    python3 classify_jd.py --batch new.jsonl --dedup-db ~/.cache/autoresume/dedup.sqlite
+    python3 classify_jd.py --batch new.jsonl --history-db ~/.cache/autoresume/history.sqlite
+    python3 classify_jd.py --file long_jd.txt --pooling mean   # chunk long JDs
+    python3 classify_jd.py --text "..." --anchor-scoring max --explain   # per-anchor scores
+    python3 classify_jd.py --serve &                  # resident daemon; --text uses it
+    python3 classify_jd.py --daemon-stats             # daemon latency percentiles
+    python3 classify_jd.py --roles roles.sbert.anchors --text "..."  # role catalogue
+
+Caching
+-------
+Anchor embeddings are stored under ~/.cache/autoresume (override with
+AUTORESUME_CACHE_DIR) and only re-computed for roles whose text changed, so a
+warm classification embeds the JD alone.  JD embeddings themselves are cached
+by normalised-text hash in memory, and in SQLite with --cache-db (or
+AUTORESUME_EMBED_DB), so re-classifying a posting never calls the backend.
 """
 
 from __future__ import annotations
 
+import time
+
+_T_MODULE_START = time.perf_counter()
+
 import argparse
+import atexit
+import contextlib
+import glob
+import hashlib
+import itertools
 import json
 import math
+import mmap
 import os
+import re
 import sys
+import threading
+from array import array
+from collections import deque
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import metrics
+from embedding_cache import EmbeddingCache
+from onnx_backend import OnnxEncoder, model_path
+from startup import lazy_import, process_age, timed_import
+from vector_codec import CODECS
+
+# Heavy dependencies load on first use, so --help and argument errors stay fast.
+# np is None when NumPy is not installed; the pure-Python scoring path still works.
+np = lazy_import("numpy")
+
+_INTERPRETER_SECONDS = process_age()     # process start -> this module (Linux only)
+
+# A batch of embeddings: a NumPy (n, d) array when available, else lists.
+Vectors = Sequence[Sequence[float]]
 
 # ---------------------------------------------------------------------------
 # Role definitions — each anchor is a paragraph-level description of what
@@ -156,8 +211,22 @@ ROLES: List[RoleSpec] = [
 # Embedding backends
 # ---------------------------------------------------------------------------
 
-def _embed_sbert(texts: List[str]) -> List[List[float]]:
-    """Local embeddings via sentence-transformers (no API key needed)."""
+SBERT_MODEL = "all-MiniLM-L6-v2"
+OPENAI_MODEL = "text-embedding-3-small"
+OPENAI_DIM = 1536
+
+# Storage codec of cached and indexed JD vectors; see vector_codec.py.
+VECTOR_CODEC = os.environ.get("AUTORESUME_VECTOR_CODEC", "float32")
+
+
+# One loaded model per (backend, model name) per process.  Loading torch and
+# the weights costs seconds; inference is tens of milliseconds.
+_MODELS: Dict[str, object] = {}
+_MODEL_LOCK = threading.Lock()
+_MODEL_LOAD_SECONDS: Dict[str, float] = {}
+
+
+def _load_sbert_model(name: str):
     try:
         from sentence_transformers import SentenceTransformer  # type: ignore
     except ImportError:
@@ -169,47 +238,627 @@ def _embed_sbert(texts: List[str]) -> List[List[float]]:
         )
         sys.exit(1)
 
-    # Model is cached after first download (~80 MB).
-    model = SentenceTransformer("all-MiniLM-L6-v2")
-    vecs = model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
-    return [v.tolist() for v in vecs]
+    # Model is cached on disk after first download (~80 MB).
+    return SentenceTransformer(name)
+
+
+def get_sbert_model(name: str = SBERT_MODEL):
+    """Return the process-wide SentenceTransformer, loading it on first use."""
+    key = f"sbert:{name}"
+    model = _MODELS.get(key)
+    if model is not None:
+        return model
+    with _MODEL_LOCK:
+        model = _MODELS.get(key)
+        if model is None:
+            t0 = time.perf_counter()
+            with metrics.span("model_load"):
+                model = _load_sbert_model(name)
+            _MODEL_LOAD_SECONDS[key] = time.perf_counter() - t0
+            _MODELS[key] = model
+    return model
+
+
+def _embed_sbert(texts: List[str]) -> Vectors:
+    """Local embeddings via sentence-transformers (no API key needed)."""
+    model = get_sbert_model()
+    # Stay in NumPy: the scoring kernel consumes the (n, d) array directly.
+    return model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+
+# Request budget for the OpenAI backend; see configure_openai().
+OPENAI_LIMITS: Dict[str, float] = {
+    "requests_per_minute": float(os.environ.get("AUTORESUME_OPENAI_RPM", 3000)),
+    "tokens_per_minute": float(os.environ.get("AUTORESUME_OPENAI_TPM", 1_000_000)),
+    "max_concurrency": int(os.environ.get("AUTORESUME_OPENAI_CONCURRENCY", 8)),
+}
+
+# text-embedding-3-* are Matryoshka-trained: the API can return the first N
+# dimensions (renormalised) with little loss.  None keeps all 1536.
+OPENAI_DIMENSIONS: Optional[int] = int(os.environ.get("AUTORESUME_OPENAI_DIMS", 0)) or None
+
+
+def get_openai_embedder(name: str = OPENAI_MODEL):
+    """Return the process-wide OpenAI client, so connections are pooled across calls."""
+    key = f"openai:{name}"
+    embedder = _MODELS.get(key)
+    if embedder is not None:
+        return embedder
+    with _MODEL_LOCK:
+        embedder = _MODELS.get(key)
+        if embedder is None:
+            api_key = os.environ.get("OPENAI_API_KEY", "")
+            if not api_key:
+                print(
+                    "OPENAI_API_KEY environment variable is not set.\n"
+                    "Export it or switch to the local backend (default).",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            from openai_embeddings import DEFAULT_BASE_URL, AsyncOpenAIEmbedder
+
+            embedder = AsyncOpenAIEmbedder(
+                api_key,
+                model=name,
+                base_url=os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL,
+                requests_per_minute=OPENAI_LIMITS["requests_per_minute"],
+                tokens_per_minute=OPENAI_LIMITS["tokens_per_minute"],
+                max_concurrency=int(OPENAI_LIMITS["max_concurrency"]),
+                dimensions=OPENAI_DIMENSIONS,
+            )
+            _MODELS[key] = embedder
+    return embedder
+
+
+def configure_openai(
+    requests_per_minute: Optional[float] = None,
+    tokens_per_minute: Optional[float] = None,
+    max_concurrency: Optional[int] = None,
+    dimensions: Optional[int] = None,
+) -> None:
+    """Set the OpenAI request budget (and vector size); the next embedding call picks it up."""
+    global OPENAI_DIMENSIONS
+    if dimensions is not None:
+        if not 1 <= dimensions <= OPENAI_DIM:
+            raise ValueError(f"dimensions must be between 1 and {OPENAI_DIM}")
+        OPENAI_DIMENSIONS = None if dimensions == OPENAI_DIM else dimensions
+    for name, value in (
+        ("requests_per_minute", requests_per_minute),
+        ("tokens_per_minute", tokens_per_minute),
+        ("max_concurrency", max_concurrency),
+    ):
+        if value is not None:
+            OPENAI_LIMITS[name] = value
+    with _MODEL_LOCK:
+        embedder = _MODELS.pop(f"openai:{OPENAI_MODEL}", None)
+    if embedder is not None:
+        embedder.close()
 
 
 def _embed_openai(texts: List[str]) -> List[List[float]]:
-    """Remote embeddings via OpenAI text-embedding-3-small."""
+    """Remote embeddings via OpenAI text-embedding-3-small.
+
+    Large inputs are split into token-bounded chunks and sent concurrently
+    under the configured rate limits, with retries on 429 / 5xx.
+    """
+    return get_openai_embedder().embed_sync(texts)
+
+
+def _onnx_model_dir() -> str:
+    return os.environ.get("AUTORESUME_ONNX_DIR") or os.path.join(CACHE_DIR, "onnx", SBERT_MODEL)
+
+
+def _onnx_quantized() -> bool:
+    return os.environ.get("AUTORESUME_ONNX_QUANTIZED", "1") != "0"
+
+
+def get_onnx_encoder() -> OnnxEncoder:
+    """Return the process-wide ONNX Runtime session for MiniLM, loading it on first use."""
+    model_dir = _onnx_model_dir()
+    key = f"onnx:{model_path(model_dir, _onnx_quantized())}"
+    encoder = _MODELS.get(key)
+    if encoder is not None:
+        return encoder
+    with _MODEL_LOCK:
+        encoder = _MODELS.get(key)
+        if encoder is None:
+            t0 = time.perf_counter()
+            try:
+                with metrics.span("model_load"):
+                    encoder = OnnxEncoder(model_dir, quantized=_onnx_quantized())
+            except (ImportError, FileNotFoundError) as e:
+                print(
+                    f"{e}\n"
+                    "Run:  pip install onnxruntime tokenizers numpy\n"
+                    f"      python3 onnx_backend.py export {model_dir}\n"
+                    "Or set AUTORESUME_ONNX_DIR to an exported model directory.",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            _MODEL_LOAD_SECONDS[key] = time.perf_counter() - t0
+            _MODELS[key] = encoder
+    return encoder
+
+
+# ---------------------------------------------------------------------------
+# Backend registry — --backend dispatches through these objects.  A backend
+# names its model (part of every cache key), reports its vector size, and
+# embeds at most max_batch texts per embed() call.
+# ---------------------------------------------------------------------------
+
+class EmbeddingBackend:
+    """Interface for an embedding backend; see ``register_backend``."""
+
+    name: str = ""
+    max_batch: int = 256
+    imports: Tuple[str, ...] = ()          # heavy modules load() pulls in
+
+    @property
+    def model(self) -> str:
+        raise NotImplementedError
+
+    @property
+    def dim(self) -> int:
+        raise NotImplementedError
+
+    def load(self) -> None:
+        """Load weights / open clients now rather than on the first query."""
+
+    def embed(self, batch: List[str]) -> Vectors:
+        raise NotImplementedError
+
+
+class SbertBackend(EmbeddingBackend):
+    """all-MiniLM-L6-v2 through sentence-transformers (torch)."""
+
+    name = "sbert"
+    imports = ("sentence_transformers",)
+
+    @property
+    def model(self) -> str:
+        return SBERT_MODEL
+
+    @property
+    def dim(self) -> int:
+        return get_sbert_model().get_sentence_embedding_dimension()
+
+    def load(self) -> None:
+        get_sbert_model()
+
+    def embed(self, batch: List[str]) -> Vectors:
+        return _embed_sbert(batch)
+
+
+class OpenAIBackend(EmbeddingBackend):
+    """text-embedding-3-small over HTTP; the client chunks large batches itself."""
+
+    name = "openai"
+    max_batch = 16_384
+    imports = ("openai_embeddings",)
+
+    @property
+    def model(self) -> str:
+        # Truncated vectors are a different embedding space for every cache.
+        return f"{OPENAI_MODEL}@{OPENAI_DIMENSIONS}" if OPENAI_DIMENSIONS else OPENAI_MODEL
+
+    @property
+    def dim(self) -> int:
+        return OPENAI_DIMENSIONS or OPENAI_DIM
+
+    def embed(self, batch: List[str]) -> Vectors:
+        return _embed_openai(batch)
+
+
+class OnnxBackend(EmbeddingBackend):
+    """all-MiniLM-L6-v2 exported to ONNX, int8-quantized when available; no torch."""
+
+    name = "onnx"
+    imports = ("onnxruntime", "tokenizers")
+
+    @property
+    def model(self) -> str:
+        # The graph file distinguishes float32 from int8 vectors in cache keys.
+        return f"{SBERT_MODEL}/{os.path.basename(model_path(_onnx_model_dir(), _onnx_quantized()))}"
+
+    @property
+    def dim(self) -> int:
+        return get_onnx_encoder().dim
+
+    def load(self) -> None:
+        get_onnx_encoder()
+
+    def embed(self, batch: List[str]) -> Vectors:
+        return get_onnx_encoder().encode(batch)
+
+
+_BACKENDS: Dict[str, EmbeddingBackend] = {}
+
+
+def register_backend(backend: EmbeddingBackend) -> EmbeddingBackend:
+    """Make *backend* available as ``--backend <backend.name>``."""
+    _BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name: str) -> EmbeddingBackend:
     try:
-        from openai import OpenAI  # type: ignore
-    except ImportError:
-        print(
-            "openai package is not installed.\n"
-            "Run:  pip install openai",
-            file=sys.stderr,
-        )
-        sys.exit(1)
+        return _BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown backend {name!r}; available: {', '.join(sorted(_BACKENDS))}"
+        ) from None
 
-    api_key = os.environ.get("OPENAI_API_KEY", "")
-    if not api_key:
-        print(
-            "OPENAI_API_KEY environment variable is not set.\n"
-            "Export it or switch to the local backend (default).",
-            file=sys.stderr,
-        )
-        sys.exit(1)
 
-    client = OpenAI(api_key=api_key)
-    response = client.embeddings.create(
-        model="text-embedding-3-small",
-        input=texts,
+def available_backends() -> List[str]:
+    return sorted(_BACKENDS)
+
+
+for _backend in (SbertBackend(), OpenAIBackend(), OnnxBackend()):
+    register_backend(_backend)
+
+
+def get_embeddings(texts: List[str], backend: str) -> Vectors:
+    """Embed *texts* with the named backend, at most ``max_batch`` per call."""
+    impl = get_backend(backend)
+    metrics.count_texts(texts)
+    with metrics.span("embed"):
+        if len(texts) <= impl.max_batch:
+            return _embed_call(impl, texts)
+        parts = [
+            _embed_call(impl, texts[start:start + impl.max_batch])
+            for start in range(0, len(texts), impl.max_batch)
+        ]
+        if np is not None:
+            return np.concatenate([np.asarray(part, dtype=np.float32) for part in parts])
+        return [list(vec) for part in parts for vec in part]
+
+
+def _embed_call(impl: EmbeddingBackend, texts: List[str]) -> Vectors:
+    metrics.count(f"backend_calls.{impl.name}")
+    with metrics.span(f"backend.{impl.name}"):
+        return impl.embed(texts)
+
+
+def model_name(backend: str) -> str:
+    """Name of the embedding model behind *backend* (part of every cache key)."""
+    return get_backend(backend).model
+
+
+# ---------------------------------------------------------------------------
+# Anchor embedding store
+#
+# Anchors only change when ROLES is edited, so their vectors are kept on disk
+# and only the JD has to be embedded per classification.  Each role is keyed
+# by a fingerprint of its anchor text, the backend and the model, so editing
+# one role re-embeds that role alone.
+#
+# Layout (one pair of files per backend/model):
+#   anchors-<backend>-<model>.json   {"version", "dim", "fingerprints": [...]}
+#   anchors-<backend>-<model>.f32    row-major float32 matrix, one row per entry
+#
+# Always float32 (see docs/COMPACT_VECTORS.md, "Anchors"): the matrix is small
+# and is mapped straight into the scoring matmul.
+# ---------------------------------------------------------------------------
+
+ANCHOR_STORE_VERSION = 1
+
+CACHE_DIR = os.environ.get(
+    "AUTORESUME_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "autoresume"),
+)
+
+
+def role_fingerprint(role: RoleSpec, backend: str, model: Optional[str] = None) -> str:
+    """Stable hash of everything that determines a role's anchor embedding."""
+    h = hashlib.sha256()
+    for part in (
+        f"v{ANCHOR_STORE_VERSION}",
+        backend,
+        model or model_name(backend),
+        role.anchor,
+        *role.secondary_anchors,
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class AnchorStore:
+    """Versioned on-disk store of anchor vectors for one backend/model pair.
+
+    Vectors are read through a read-only memory map, so loading the store is a
+    page-in rather than a parse.  *kind* names the file pair, so other
+    fingerprint-keyed vector sets (e.g. the question bank) share the format.
+    """
+
+    def __init__(
+        self,
+        backend: str,
+        model: Optional[str] = None,
+        cache_dir: Optional[str] = None,
+        kind: str = "anchors",
+    ):
+        self.backend = backend
+        self.model = model or model_name(backend)
+        self.cache_dir = cache_dir or CACHE_DIR
+        slug = f"{backend}-{self.model}".replace("/", "_")
+        self.index_path = os.path.join(self.cache_dir, f"{kind}-{slug}.json")
+        self.data_path = os.path.join(self.cache_dir, f"{kind}-{slug}.f32")
+
+    def load(self) -> Dict[str, Sequence[float]]:
+        """Return ``{fingerprint: vector}``; empty if the store is missing or stale."""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        if index.get("version") != ANCHOR_STORE_VERSION:
+            return {}
+
+        fingerprints = index.get("fingerprints", [])
+        dim = index.get("dim", 0)
+        if not fingerprints or not dim:
+            return {}
+
+        if np is not None:
+            try:
+                matrix = np.memmap(self.data_path, dtype=np.float32, mode="r")
+            except (FileNotFoundError, ValueError):
+                return {}
+            if matrix.size != len(fingerprints) * dim:
+                return {}
+            matrix = matrix.reshape(len(fingerprints), dim)
+            return {fp: matrix[i] for i, fp in enumerate(fingerprints)}
+
+        try:
+            with open(self.data_path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return {}
+        if len(mm) != len(fingerprints) * dim * 4:
+            mm.close()
+            return {}
+
+        view = memoryview(mm).cast("f")
+        try:
+            return {
+                fp: view[i * dim:(i + 1) * dim].tolist()
+                for i, fp in enumerate(fingerprints)
+            }
+        finally:
+            view.release()
+            mm.close()
+
+    def save(self, vectors: Dict[str, Sequence[float]]) -> None:
+        """Atomically replace the store with *vectors*."""
+        if not vectors:
+            return
+        fingerprints = list(vectors)
+        dim = len(vectors[fingerprints[0]])
+        data = array("f")
+        for fp in fingerprints:
+            data.extend(float(x) for x in vectors[fp])
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_data = self.data_path + ".tmp"
+        tmp_index = self.index_path + ".tmp"
+        with open(tmp_data, "wb") as f:
+            data.tofile(f)
+        with open(tmp_index, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "version": ANCHOR_STORE_VERSION,
+                    "backend": self.backend,
+                    "model": self.model,
+                    "dim": dim,
+                    "fingerprints": fingerprints,
+                },
+                f,
+            )
+        # Data first: a reader that sees the new index must also see new data.
+        os.replace(tmp_data, self.data_path)
+        os.replace(tmp_index, self.index_path)
+
+
+# In-process copy so repeated classifications skip the disk entirely.
+_ANCHOR_MEMO: Dict[str, Sequence[float]] = {}
+
+
+def get_anchor_embeddings(backend: str, roles: Optional[List[RoleSpec]] = None) -> List[Sequence[float]]:
+    """Anchor vectors for *roles* (default ``ROLES``), embedding only what changed."""
+    roles = ROLES if roles is None else roles
+    fingerprints = [role_fingerprint(role, backend) for role in roles]
+
+    missing = [fp for fp in fingerprints if fp not in _ANCHOR_MEMO]
+    if missing:
+        store = AnchorStore(backend)
+        stored = store.load()
+        for fp in missing:
+            if fp in stored:
+                _ANCHOR_MEMO[fp] = stored[fp]
+
+        todo = [
+            (fp, text)
+            for fp, text in zip(fingerprints, _build_anchor_texts(roles))
+            if fp not in _ANCHOR_MEMO
+        ]
+        if todo:
+            metrics.count("anchors_embedded", len(todo))
+            vecs = get_embeddings([text for _, text in todo], backend)
+            for (fp, _), vec in zip(todo, vecs):
+                _ANCHOR_MEMO[fp] = vec
+            # Keep only the current roles so the file does not grow unbounded.
+            try:
+                store.save({fp: _ANCHOR_MEMO[fp] for fp in fingerprints})
+            except OSError as e:
+                print(f"Warning: could not write anchor cache: {e}", file=sys.stderr)
+
+    return [_ANCHOR_MEMO[fp] for fp in fingerprints]
+
+
+# ---------------------------------------------------------------------------
+# JD embedding cache — repeats of the same posting skip the backend entirely.
+# ---------------------------------------------------------------------------
+
+_JD_CACHE = EmbeddingCache(
+    max_entries=4096,
+    db_path=os.environ.get("AUTORESUME_EMBED_DB") or None,
+    codec=VECTOR_CODEC,
+)
+
+
+def configure_jd_cache(
+    max_entries: int = 4096,
+    db_path: Optional[str] = None,
+    max_db_entries: int = 200_000,
+    codec: Optional[str] = None,
+) -> EmbeddingCache:
+    """Replace the process-wide JD cache (``max_entries=0`` disables memoisation).
+
+    *codec* (default ``VECTOR_CODEC``) is how vectors are stored in *db_path*.
+    """
+    global _JD_CACHE
+    _JD_CACHE.close()
+    _JD_CACHE = EmbeddingCache(
+        max_entries=max_entries,
+        db_path=db_path,
+        max_db_entries=max_db_entries,
+        codec=codec or VECTOR_CODEC,
     )
-    # Preserve input order.
-    ordered = sorted(response.data, key=lambda d: d.index)
-    return [d.embedding for d in ordered]
+    return _JD_CACHE
+
+
+def jd_cache_stats():
+    return _JD_CACHE.stats
+
+
+def get_query_embeddings(texts: List[str], backend: str) -> Vectors:
+    """Embeddings for JD texts, served from the cache where possible."""
+    cache = _JD_CACHE
+    model = model_name(backend)
+    keys = [cache.key(text, backend, model) for text in texts]
+    found = cache.get_many(keys)
+
+    # Embed each distinct miss once, even if it repeats within the batch.
+    todo = {key: text for key, text in zip(keys, texts) if key not in found}
+    metrics.count("jd_cache.hits", len(keys) - len(todo))
+    metrics.count("jd_cache.misses", len(todo))
+    if todo:
+        vecs = get_embeddings(list(todo.values()), backend)
+        fresh = dict(zip(todo, vecs))
+        cache.put_many(fresh)
+        found.update(fresh)
+
+    ordered = [found[key] for key in keys]
+    if np is not None:
+        return np.asarray(ordered, dtype=np.float32)
+    return ordered
+
+
+# Pre-normalised (n_roles, d) matrices, keyed by the roles' fingerprints: float64,
+# or the float32 memmap of a compiled role catalogue.
+_ANCHOR_MATRICES: Dict[Tuple[str, ...], "np.ndarray"] = {}
+
+
+def anchor_matrix(backend: str, roles: Optional[List[RoleSpec]] = None) -> "np.ndarray":
+    """Row-normalised anchor matrix for the NumPy scoring kernel."""
+    roles = ROLES if roles is None else roles
+    key = tuple(role_fingerprint(role, backend) for role in roles)
+    matrix = _ANCHOR_MATRICES.get(key)
+    if matrix is None:
+        matrix = _normalize_rows(np.asarray(get_anchor_embeddings(backend, roles), dtype=np.float64))
+        _ANCHOR_MATRICES[key] = matrix
+    return matrix
+
+
+def set_roles(
+    roles: List[RoleSpec],
+    backend: Optional[str] = None,
+    vectors: Optional[Vectors] = None,
+    facet_vectors: Optional["np.ndarray"] = None,
+) -> None:
+    """Replace ``ROLES`` (see role_catalogue.py).
+
+    *vectors* — one row-normalised anchor vector per role, embedded with
+    *backend* — seed the anchor caches, so those roles are never re-derived.
+    *facet_vectors* does the same for the per-anchor matrix (NumPy only).
+    """
+    global ROLES
+    ROLES = list(roles)
+    fingerprints = tuple(role_fingerprint(role, backend) for role in ROLES) if backend else ()
+    if vectors is not None:
+        for fp, vec in zip(fingerprints, vectors):
+            _ANCHOR_MEMO[fp] = vec
+        if np is not None:
+            _ANCHOR_MATRICES[fingerprints] = vectors
+    if facet_vectors is not None:
+        _FACET_MATRICES[fingerprints] = (facet_vectors, facet_offsets(ROLES))
+
+
+# Per-anchor ("facet") vectors for the multi-anchor scoring modes.  Every
+# anchor and secondary anchor is embedded on its own and stored in a separate
+# facets-<backend>-<model> store; _ANCHOR_MEMO holds them in-process.
+
+def role_anchor_texts(role: RoleSpec) -> List[str]:
+    return [role.anchor, *role.secondary_anchors]
+
 
+def facet_fingerprint(text: str, backend: str, model: Optional[str] = None) -> str:
+    h = hashlib.sha256()
+    for part in (f"facet-v{ANCHOR_STORE_VERSION}", backend, model or model_name(backend), text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
 
-def get_embeddings(texts: List[str], backend: str) -> List[List[float]]:
-    if backend == "openai":
-        return _embed_openai(texts)
-    return _embed_sbert(texts)
+
+def get_facet_embeddings(backend: str, roles: Optional[List[RoleSpec]] = None) -> List[Sequence[float]]:
+    """One vector per anchor of every role, in role order, embedding only what changed."""
+    roles = ROLES if roles is None else roles
+    model = model_name(backend)
+    texts = [text for role in roles for text in role_anchor_texts(role)]
+    fingerprints = [facet_fingerprint(text, backend, model) for text in texts]
+
+    if any(fp not in _ANCHOR_MEMO for fp in fingerprints):
+        store = AnchorStore(backend, model, kind="facets")
+        stored = store.load()
+        for fp in fingerprints:
+            if fp not in _ANCHOR_MEMO and fp in stored:
+                _ANCHOR_MEMO[fp] = stored[fp]
+        todo = {fp: text for fp, text in zip(fingerprints, texts) if fp not in _ANCHOR_MEMO}
+        if todo:
+            metrics.count("anchors_embedded", len(todo))
+            vecs = get_embeddings(list(todo.values()), backend)
+            for fp, vec in zip(todo, vecs):
+                _ANCHOR_MEMO[fp] = vec
+            try:
+                store.save({fp: _ANCHOR_MEMO[fp] for fp in fingerprints})
+            except OSError as e:
+                print(f"Warning: could not write anchor cache: {e}", file=sys.stderr)
+
+    return [_ANCHOR_MEMO[fp] for fp in fingerprints]
+
+
+# (total_anchors, d) normalised float64 matrix and each role's first row, with a
+# final entry of total_anchors — keyed like _ANCHOR_MATRICES.
+_FACET_MATRICES: Dict[Tuple[str, ...], Tuple["np.ndarray", List[int]]] = {}
+
+
+def facet_offsets(roles: List[RoleSpec]) -> List[int]:
+    offsets = [0]
+    for role in roles:
+        offsets.append(offsets[-1] + len(role_anchor_texts(role)))
+    return offsets
+
+
+def facet_matrix(backend: str, roles: Optional[List[RoleSpec]] = None) -> Tuple["np.ndarray", List[int]]:
+    roles = ROLES if roles is None else roles
+    key = tuple(role_fingerprint(role, backend) for role in roles)
+    entry = _FACET_MATRICES.get(key)
+    if entry is None:
+        matrix = _normalize_rows(np.asarray(get_facet_embeddings(backend, roles), dtype=np.float64))
+        entry = (matrix, facet_offsets(roles))
+        _FACET_MATRICES[key] = entry
+    return entry
 
 
 # ---------------------------------------------------------------------------
@@ -231,7 +880,11 @@ def cosine_similarity(a: List[float], b: List[float]) -> float:
     return _dot(a, b) / denom
 
 
-def _softmax(values: List[float], temperature: float = 0.1) -> List[float]:
+# Softmax temperature unless a calibration (see calibration.py) sets one.
+DEFAULT_TEMPERATURE = 0.1
+
+
+def _softmax(values: List[float], temperature: float = DEFAULT_TEMPERATURE) -> List[float]:
     """Sharpen the distribution so small similarity differences become clear gaps."""
     scaled = [v / temperature for v in values]
     max_v = max(scaled)
@@ -240,6 +893,28 @@ def _softmax(values: List[float], temperature: float = 0.1) -> List[float]:
     return [e / total for e in exps]
 
 
+# NumPy kernel — same maths as above, one matrix multiply per batch.  Scores
+# are computed in float64 so they agree with the list path to ~1e-12.
+
+def _normalize_rows(m: "np.ndarray") -> "np.ndarray":
+    """L2-normalise each row; all-zero rows stay zero (cosine 0, as above)."""
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+
+def cosine_matrix(jd_vecs: Vectors, anchors: "np.ndarray") -> "np.ndarray":
+    """Cosine similarity of every JD against every pre-normalised anchor: (b, n)."""
+    q = _normalize_rows(np.asarray(jd_vecs, dtype=np.float64))
+    return q @ anchors.T
+
+
+def _softmax_matrix(sims: "np.ndarray", temperature: float = DEFAULT_TEMPERATURE) -> "np.ndarray":
+    """Row-wise vectorised ``_softmax``."""
+    scaled = sims / temperature
+    exps = np.exp(scaled - scaled.max(axis=1, keepdims=True))
+    return exps / exps.sum(axis=1, keepdims=True)
+
+
 # ---------------------------------------------------------------------------
 # Core classifier
 # ---------------------------------------------------------------------------
@@ -252,46 +927,515 @@ class ClassificationResult:
     confidence: float          # softmax-normalised probability [0, 1]
     scores: dict               # {role_name: raw cosine sim}
     confidence_scores: dict    # {role_name: softmax probability}
+    matched_anchor: Optional[str] = None   # winning anchor of the best role (multi-anchor scoring)
+    out_of_scope: bool = False             # best cosine below the role's calibrated threshold
 
 
-def _build_anchor_texts() -> List[str]:
+@dataclass
+class Calibration:
+    """Softmax temperature and per-role rejection thresholds fitted by calibration.py.
+
+    A JD whose best raw cosine is below its role's threshold is "none of the
+    above": ``out_of_scope`` is set and no resume is chosen.  Roles without a
+    threshold never reject.  Only applies to the *scoring* mode it was fitted on.
+    """
+
+    temperature: float = DEFAULT_TEMPERATURE
+    thresholds: Dict[str, float] = field(default_factory=dict)
+    scoring: str = "joined"
+
+    def to_dict(self) -> dict:
+        return {"temperature": self.temperature, "thresholds": dict(self.thresholds), "scoring": self.scoring}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Calibration":
+        return cls(
+            temperature=float(data["temperature"]),
+            thresholds={name: float(t) for name, t in data.get("thresholds", {}).items()},
+            scoring=data.get("scoring", "joined"),
+        )
+
+
+_CALIBRATION: Optional[Calibration] = None
+
+
+def set_calibration(calibration: Optional[Calibration]) -> None:
+    """Apply *calibration* to every later classification (``None`` restores the defaults)."""
+    global _CALIBRATION
+    _CALIBRATION = calibration
+
+
+def _active_calibration(scoring: str) -> Optional[Calibration]:
+    cal = _CALIBRATION
+    return cal if cal is not None and cal.scoring == scoring else None
+
+
+def _build_anchor_texts(roles: Optional[List[RoleSpec]] = None) -> List[str]:
     """Concatenate primary + secondary anchors into one rich text per role."""
     texts = []
-    for role in ROLES:
+    for role in ROLES if roles is None else roles:
         parts = [role.anchor] + role.secondary_anchors
         texts.append(" ".join(parts))
     return texts
 
 
-def classify_text(text: str, backend: str = "sbert") -> ClassificationResult:
-    """Embed the JD and find the most similar role category by cosine similarity."""
+def _build_result(
+    raw_sims: Sequence[float],
+    probs: Sequence[float],
+    best_idx: int,
+    roles: List[RoleSpec],
+    out_of_scope: bool = False,
+) -> ClassificationResult:
+    scores = {role.name: round(float(sim), 4) for role, sim in zip(roles, raw_sims)}
+    confidence_scores = {role.name: round(float(p), 4) for role, p in zip(roles, probs)}
+    best_role = roles[best_idx]
 
-    anchor_texts = _build_anchor_texts()
+    return ClassificationResult(
+        role_category=best_role.name,
+        resume="" if out_of_scope else best_role.resume,
+        similarity=round(float(raw_sims[best_idx]), 4),
+        confidence=round(float(probs[best_idx]), 4),
+        scores=scores,
+        confidence_scores=confidence_scores,
+        out_of_scope=out_of_scope,
+    )
 
-    # Embed everything in one batch for efficiency.
-    all_texts = anchor_texts + [text]
-    all_vecs = get_embeddings(all_texts, backend)
 
-    anchor_vecs = all_vecs[: len(ROLES)]
-    jd_vec = all_vecs[-1]
+# ---------------------------------------------------------------------------
+# Anchor scoring modes — how a role's score is formed from its anchors:
+#
+#   joined — the anchors are concatenated and embedded as one text (default)
+#   max    — best cosine over the role's anchors, each embedded on its own
+#   mean   — average cosine over the role's anchors
+#   topN   — average of the role's N best anchors (e.g. top2)
+#
+# The per-anchor modes score a batch with one (b, d) x (d, total_anchors)
+# multiply and then reduce each role's contiguous block of columns.
+# ---------------------------------------------------------------------------
 
-    raw_sims = [cosine_similarity(jd_vec, av) for av in anchor_vecs]
-    probs = _softmax(raw_sims)
+SCORING_MODES = ("joined", "max", "mean", "topN")
 
-    scores = {role.name: round(sim, 4) for role, sim in zip(ROLES, raw_sims)}
-    confidence_scores = {role.name: round(p, 4) for role, p in zip(ROLES, probs)}
 
-    best_idx = max(range(len(raw_sims)), key=lambda i: raw_sims[i])
-    best_role = ROLES[best_idx]
+def _parse_scoring(scoring: str) -> Tuple[str, int]:
+    if scoring in ("joined", "max", "mean"):
+        return scoring, 0
+    match = re.fullmatch(r"top(\d+)", scoring)
+    if match and int(match.group(1)) >= 1:
+        return "top", int(match.group(1))
+    raise ValueError("scoring must be joined, max, mean or topN (e.g. top2)")
 
-    return ClassificationResult(
-        role_category=best_role.name,
-        resume=best_role.resume,
-        similarity=round(raw_sims[best_idx], 4),
-        confidence=round(probs[best_idx], 4),
-        scores=scores,
-        confidence_scores=confidence_scores,
+
+def _facet_similarities(jd_vecs: Vectors, backend: str, roles: List[RoleSpec], scoring: str):
+    """Per-role scores (b, n) and each role's best anchor (global anchor index, (b, n))."""
+    mode, k = _parse_scoring(scoring)
+    if np is not None:
+        matrix, offsets = facet_matrix(backend, roles)
+        sims = cosine_matrix(jd_vecs, matrix)              # (b, total_anchors)
+        starts = offsets[:-1]
+        if mode == "max":
+            role_sims = np.maximum.reduceat(sims, starts, axis=1)
+        elif mode == "mean":
+            role_sims = np.add.reduceat(sims, starts, axis=1) / np.diff(offsets)
+        else:
+            role_sims = np.empty((sims.shape[0], len(roles)))
+        winners = np.empty((sims.shape[0], len(roles)), dtype=np.intp)
+        for j, (lo, hi) in enumerate(zip(starts, offsets[1:])):
+            block = sims[:, lo:hi]
+            winners[:, j] = block.argmax(axis=1) + lo
+            if mode == "top":
+                role_sims[:, j] = np.sort(block, axis=1)[:, -k:].mean(axis=1)
+        return role_sims, winners
+
+    # Pure-Python fallback.
+    facets = get_facet_embeddings(backend, roles)
+    offsets = facet_offsets(roles)
+    all_sims, all_winners = [], []
+    for jd_vec in jd_vecs:
+        row = [cosine_similarity(jd_vec, fv) for fv in facets]
+        role_sims, winners = [], []
+        for lo, hi in zip(offsets, offsets[1:]):
+            block = row[lo:hi]
+            winners.append(lo + max(range(len(block)), key=block.__getitem__))
+            if mode == "max":
+                role_sims.append(max(block))
+            elif mode == "mean":
+                role_sims.append(sum(block) / len(block))
+            else:
+                best = sorted(block)[-k:]
+                role_sims.append(sum(best) / len(best))
+        all_sims.append(role_sims)
+        all_winners.append(winners)
+    return all_sims, all_winners
+
+
+def _similarity_rows(jd_vecs: Vectors, backend: str, roles: List[RoleSpec], scoring: str = "joined"):
+    """Raw cosine of every JD against every role: (b, n) array, or lists without NumPy."""
+    with metrics.span("score"):
+        if scoring != "joined":
+            return _facet_similarities(jd_vecs, backend, roles, scoring)[0]
+        if np is not None:
+            return cosine_matrix(jd_vecs, anchor_matrix(backend, roles))
+        anchor_vecs = get_anchor_embeddings(backend, roles)
+        return [[cosine_similarity(jd_vec, av) for av in anchor_vecs] for jd_vec in jd_vecs]
+
+
+def _results_from_similarities(
+    sims,
+    roles: List[RoleSpec],
+    scoring: str = "joined",
+) -> List[ClassificationResult]:
+    cal = _active_calibration(scoring)
+    temperature = cal.temperature if cal is not None else DEFAULT_TEMPERATURE
+    # Per-role rejection thresholds; roles the calibration does not know never reject.
+    floors = [cal.thresholds.get(role.name, -math.inf) for role in roles] if cal is not None else None
+    if np is not None:
+        sims = np.asarray(sims, dtype=np.float64)
+        with metrics.span("softmax"):
+            probs = _softmax_matrix(sims, temperature)
+        best = sims.argmax(axis=1)
+        rejected = np.zeros(len(best), dtype=bool)
+        if floors is not None:
+            rejected = sims[np.arange(len(best)), best] < np.asarray(floors)[best]
+            metrics.count("out_of_scope", int(rejected.sum()))
+        return [
+            _build_result(sims[i], probs[i], int(best[i]), roles, bool(rejected[i]))
+            for i in range(sims.shape[0])
+        ]
+
+    # Pure-Python fallback.
+    results = []
+    for raw_sims in sims:
+        best_idx = max(range(len(raw_sims)), key=lambda i: raw_sims[i])
+        with metrics.span("softmax"):
+            probs = _softmax(raw_sims, temperature)
+        rejected = floors is not None and raw_sims[best_idx] < floors[best_idx]
+        if rejected:
+            metrics.count("out_of_scope")
+        results.append(_build_result(raw_sims, probs, best_idx, roles, rejected))
+    return results
+
+
+def _score_batch(
+    jd_vecs: Vectors,
+    backend: str,
+    roles: List[RoleSpec],
+    scoring: str = "joined",
+) -> List[ClassificationResult]:
+    """Score a batch of JD vectors against the role anchors."""
+    if scoring == "joined":
+        return _results_from_similarities(_similarity_rows(jd_vecs, backend, roles), roles, scoring)
+    with metrics.span("score"):
+        sims, winners = _facet_similarities(jd_vecs, backend, roles, scoring)
+    results = _results_from_similarities(sims, roles, scoring)
+    texts = [text for role in roles for text in role_anchor_texts(role)]
+    column = {role.name: j for j, role in enumerate(roles)}
+    for i, result in enumerate(results):
+        result.matched_anchor = texts[int(winners[i][column[result.role_category]])]
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Long-JD chunking
+#
+# all-MiniLM-L6-v2 truncates at 256 word-pieces (~180 words), so a long
+# posting would be classified on its opening paragraph alone.  With pooling
+# enabled, JDs longer than one window are split into overlapping word windows
+# that are embedded CHUNK_BATCH at a time and folded into running aggregates,
+# so memory stays bounded however large the input is:
+#
+#   mean — average of the chunk vectors
+#   max  — element-wise max of the chunk vectors
+#   best — each role keeps its best cosine against any chunk
+# ---------------------------------------------------------------------------
+
+POOLING_MODES = ("none", "mean", "max", "best")
+CHUNK_WORDS = 160
+CHUNK_OVERLAP = 32
+CHUNK_BATCH = 32
+
+_WORD = re.compile(r"\S+")
+
+
+def chunk_text(text: str, window: int = CHUNK_WORDS, overlap: int = CHUNK_OVERLAP) -> Iterator[str]:
+    """Yield overlapping windows of *window* words, advancing ``window - overlap``.
+
+    Words are scanned lazily, so only one window is held at a time.
+    """
+    if window < 1 or not 0 <= overlap < window:
+        raise ValueError("need window >= 1 and 0 <= overlap < window")
+    step = window - overlap
+    words: Deque[str] = deque(maxlen=window)
+    fresh = 0                              # words added since the last window
+    for match in _WORD.finditer(text):
+        words.append(match.group())
+        fresh += 1
+        if len(words) == window and fresh >= step:
+            yield " ".join(words)
+            fresh = 0
+    if fresh:
+        # Tail: the last full window (or the whole text if it is shorter).
+        yield " ".join(words)
+
+
+def _needs_chunking(text: str, window: int) -> bool:
+    return sum(1 for _ in itertools.islice(_WORD.finditer(text), window + 1)) > window
+
+
+def _classify_chunked(
+    text: str,
+    backend: str,
+    roles: List[RoleSpec],
+    pooling: str,
+    window: int,
+    overlap: int,
+    scoring: str = "joined",
+) -> ClassificationResult:
+    pooled = None        # running sum (mean), max (max) or per-role best cosine (best)
+    count = 0
+    chunks = chunk_text(text, window, overlap)
+    while True:
+        batch = list(itertools.islice(chunks, CHUNK_BATCH))
+        if not batch:
+            break
+        vecs = get_query_embeddings(batch, backend)
+        rows = _similarity_rows(vecs, backend, roles, scoring) if pooling == "best" else vecs
+        count += len(batch)
+        if np is not None:
+            rows = np.asarray(rows, dtype=np.float64)
+            part = rows.sum(axis=0) if pooling == "mean" else rows.max(axis=0)
+            if pooled is None:
+                pooled = part
+            elif pooling == "mean":
+                pooled += part
+            else:
+                np.maximum(pooled, part, out=pooled)
+            continue
+        for row in rows:
+            row = [float(x) for x in row]
+            if pooled is None:
+                pooled = row
+            elif pooling == "mean":
+                pooled = [a + b for a, b in zip(pooled, row)]
+            else:
+                pooled = [max(a, b) for a, b in zip(pooled, row)]
+
+    if pooling == "best":
+        return _results_from_similarities([pooled], roles, scoring)[0]
+    if pooling == "mean":
+        pooled = pooled / count if np is not None else [x / count for x in pooled]
+    return _score_batch([pooled], backend, roles, scoring)[0]
+
+
+def _classify_batch(
+    batch: List[str],
+    backend: str,
+    roles: List[RoleSpec],
+    pooling: str,
+    window: int,
+    overlap: int,
+    scoring: str = "joined",
+) -> List[ClassificationResult]:
+    metrics.count("jds_classified", len(batch))
+    with metrics.span("classify"):
+        if pooling == "none":
+            return _score_batch(get_query_embeddings(batch, backend), backend, roles, scoring)
+
+        # JDs that fit in one window are embedded together as usual.
+        results: List[Optional[ClassificationResult]] = [None] * len(batch)
+        short = [i for i, text in enumerate(batch) if not _needs_chunking(text, window)]
+        if short:
+            scored = _score_batch(
+                get_query_embeddings([batch[i] for i in short], backend), backend, roles, scoring
+            )
+            for i, result in zip(short, scored):
+                results[i] = result
+        for i, text in enumerate(batch):
+            if results[i] is None:
+                results[i] = _classify_chunked(text, backend, roles, pooling, window, overlap, scoring)
+        return results  # type: ignore[return-value]
+
+
+def jd_vectors(
+    texts: List[str],
+    backend: str,
+    pooling: str = "none",
+    chunk_words: int = CHUNK_WORDS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+) -> List[List[float]]:
+    """One vector per JD, from the embeddings classification used (cache hits after it).
+
+    A JD classified whole gets its own embedding; a chunked one gets the
+    mean of its chunk embeddings (their max with ``pooling="max"``), so long
+    JDs are not embedded a second time as a whole.
+    """
+    vectors: List[Optional[List[float]]] = [None] * len(texts)
+    whole = [i for i, text in enumerate(texts) if pooling == "none" or not _needs_chunking(text, chunk_words)]
+    if whole:
+        for i, vec in zip(whole, get_query_embeddings([texts[i] for i in whole], backend)):
+            vectors[i] = [float(x) for x in vec]
+    for i, text in enumerate(texts):
+        if vectors[i] is not None:
+            continue
+        chunks = list(chunk_text(text, chunk_words, chunk_overlap))
+        rows = [[float(x) for x in vec] for vec in get_query_embeddings(chunks, backend)]
+        if pooling == "max":
+            vectors[i] = [max(column) for column in zip(*rows)]
+        else:
+            vectors[i] = [sum(column) / len(rows) for column in zip(*rows)]
+    return vectors  # type: ignore[return-value]
+
+
+def _check_pooling(pooling: str) -> None:
+    if pooling not in POOLING_MODES:
+        raise ValueError(f"pooling must be one of {', '.join(POOLING_MODES)}")
+
+
+def _prepare_anchors(backend: str, roles: List[RoleSpec], scoring: str) -> None:
+    """Load (or embed) the anchors *scoring* needs before the first JD."""
+    if _parse_scoring(scoring)[0] == "joined":
+        get_anchor_embeddings(backend, roles)
+    else:
+        get_facet_embeddings(backend, roles)
+
+
+def classify_text(
+    text: str,
+    backend: str = "sbert",
+    pooling: str = "none",
+    chunk_words: int = CHUNK_WORDS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    scoring: str = "joined",
+) -> ClassificationResult:
+    """Embed the JD and find the most similar role category by cosine similarity.
+
+    With ``pooling`` other than ``"none"``, JDs longer than *chunk_words* are
+    embedded as overlapping windows and pooled (see ``chunk_text``).
+    *scoring* selects how each role's anchors are combined (see SCORING_MODES).
+    """
+    _check_pooling(pooling)
+    # Anchors come from the on-disk store; only the JD is embedded per call.
+    _prepare_anchors(backend, ROLES, scoring)
+    return _classify_batch([text], backend, ROLES, pooling, chunk_words, chunk_overlap, scoring)[0]
+
+
+def classify_many(
+    texts: Iterable[str],
+    backend: str = "sbert",
+    batch_size: int = 32,
+    pooling: str = "none",
+    chunk_words: int = CHUNK_WORDS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    scoring: str = "joined",
+) -> Iterator[ClassificationResult]:
+    """Classify a stream of JDs, embedding *batch_size* of them per backend call.
+
+    Results are yielded in input order.  *texts* is consumed lazily, so memory
+    stays proportional to one batch however long the input is.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    _check_pooling(pooling)
+
+    roles = ROLES
+    _prepare_anchors(backend, roles, scoring)  # embed anchors before the first batch
+    it = iter(texts)
+    while True:
+        batch = list(itertools.islice(it, batch_size))
+        if not batch:
+            return
+        yield from _classify_batch(batch, backend, roles, pooling, chunk_words, chunk_overlap, scoring)
+
+
+@dataclass
+class WarmupReport:
+    backend: str
+    model_load_seconds: float      # 0.0 when the model was already resident
+    anchor_seconds: float          # anchor store load / embed
+    query_seconds: float           # one representative JD classification
+
+    def summary(self) -> str:
+        return (
+            f"{self.backend}: model load {self.model_load_seconds * 1000:.0f} ms, "
+            f"anchors {self.anchor_seconds * 1000:.0f} ms, "
+            f"per query {self.query_seconds * 1000:.1f} ms"
+        )
+
+
+def warmup(backend: str = "sbert") -> WarmupReport:
+    """Load the model and anchors now so the first real query is not penalised.
+
+    Safe to call repeatedly and from several threads; only the first call pays
+    the load cost.
+    """
+    t0 = time.perf_counter()
+    get_backend(backend).load()
+    t1 = time.perf_counter()
+    get_anchor_embeddings(backend)
+    t2 = time.perf_counter()
+    classify_text("Warm-up query for the role classifier.", backend=backend)
+    t3 = time.perf_counter()
+    return WarmupReport(
+        backend=backend,
+        model_load_seconds=t1 - t0,
+        anchor_seconds=t2 - t1,
+        query_seconds=t3 - t2,
+    )
+
+
+@dataclass
+class StartupProfile:
+    backend: str
+    interpreter_seconds: Optional[float]   # process start -> module import (None if unknown)
+    module_seconds: float                  # classify_jd's own imports and definitions
+    backend_import_seconds: float          # numpy + the backend's heavy packages
+    model_load_seconds: float
+    anchor_seconds: float
+    query_seconds: float                   # embed + score the JD
+
+    def summary(self) -> str:
+        phases = [
+            ("interpreter", self.interpreter_seconds),
+            ("module import", self.module_seconds),
+            ("backend import", self.backend_import_seconds),
+            ("model load", self.model_load_seconds),
+            ("anchor embed", self.anchor_seconds),
+            ("query embed", self.query_seconds),
+        ]
+        known = sum(seconds for _, seconds in phases if seconds is not None)
+        lines = [f"Startup profile ({self.backend}):"]
+        for name, seconds in phases:
+            value = "n/a" if seconds is None else f"{seconds * 1000:9.1f} ms"
+            lines.append(f"  {name:<15} {value:>12}")
+        lines.append(f"  {'total':<15} {known * 1000:9.1f} ms")
+        return "\n".join(lines)
+
+
+def profile_startup(text: str, backend: str = "sbert", **classify_kwargs) -> Tuple[StartupProfile, ClassificationResult]:
+    """Classify *text* from a cold process, timing each initialisation phase."""
+    impl = get_backend(backend)
+    t0 = time.perf_counter()
+    for module in (("numpy",) if np is not None else ()) + impl.imports:
+        try:
+            timed_import(module)
+        except ImportError:
+            pass                 # load() below reports the missing package
+    t1 = time.perf_counter()
+    impl.load()
+    t2 = time.perf_counter()
+    get_anchor_embeddings(backend)
+    t3 = time.perf_counter()
+    result = classify_text(text, backend=backend, **classify_kwargs)
+    t4 = time.perf_counter()
+    profile = StartupProfile(
+        backend=backend,
+        interpreter_seconds=_INTERPRETER_SECONDS,
+        module_seconds=_MODULE_SECONDS,
+        backend_import_seconds=t1 - t0,
+        model_load_seconds=t2 - t1,
+        anchor_seconds=t3 - t2,
+        query_seconds=t4 - t3,
     )
+    return profile, result
 
 
 # ---------------------------------------------------------------------------
@@ -308,6 +1452,275 @@ def _confidence_label(confidence: float) -> str:
     return "AMBIGUOUS"
 
 
+def _result_payload(result: ClassificationResult) -> dict:
+    return {
+        "role_category": result.role_category,
+        "resume": result.resume,
+        "similarity": result.similarity,
+        "confidence": result.confidence,
+        "confidence_label": "OUT OF SCOPE" if result.out_of_scope else _confidence_label(result.confidence),
+        "scores": result.scores,
+        "confidence_scores": result.confidence_scores,
+        **({"matched_anchor": result.matched_anchor} if result.matched_anchor is not None else {}),
+        **({"out_of_scope": True} if result.out_of_scope else {}),
+    }
+
+
+def _duplicate_payload(match) -> dict:
+    return {
+        "duplicate_of": match.posting_id,
+        "duplicate_kind": match.kind,
+        "duplicate_score": match.score,
+    }
+
+
+def _result_from_payload(payload: dict) -> ClassificationResult:
+    return ClassificationResult(
+        role_category=payload["role_category"],
+        resume=payload["resume"],
+        similarity=payload["similarity"],
+        confidence=payload["confidence"],
+        scores=payload["scores"],
+        confidence_scores=payload["confidence_scores"],
+        matched_anchor=payload.get("matched_anchor"),
+        out_of_scope=payload.get("out_of_scope", False),
+    )
+
+
+def iter_batch_inputs(spec: str) -> Iterator[Tuple[str, str]]:
+    """Yield ``(id, text)`` pairs from a directory, glob pattern or JSONL file.
+
+    * directory  — every ``*.txt`` file inside it, sorted by name
+    * ``*.jsonl`` — one object per line with a ``text`` field (``id`` optional);
+      ``-`` reads JSONL from stdin
+    * anything else is treated as a glob pattern
+    """
+    for record_id, text, _ in iter_batch_records(spec):
+        yield record_id, text
+
+
+def iter_batch_records(spec: str) -> Iterator[Tuple[str, str, dict]]:
+    """``iter_batch_inputs`` plus each JSONL object (``{}`` for .txt files)."""
+    if spec == "-" or spec.endswith(".jsonl"):
+        f = sys.stdin if spec == "-" else open(spec, "r", encoding="utf-8")
+        try:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield str(record.get("id", lineno)), record["text"], record
+        finally:
+            if f is not sys.stdin:
+                f.close()
+        return
+
+    if os.path.isdir(spec):
+        paths = sorted(glob.iglob(os.path.join(spec, "*.txt")))
+    else:
+        paths = sorted(glob.iglob(spec, recursive=True))
+    for path in paths:
+        with open(path, "r", encoding="utf-8") as f:
+            yield path, f.read(), {}
+
+
+def run_batch(
+    spec: str,
+    backend: str,
+    batch_size: int,
+    out,
+    pooling: str = "none",
+    chunk_words: int = CHUNK_WORDS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    dedup=None,
+    scoring: str = "joined",
+    workers: int = 1,
+    worker_threads: Optional[int] = None,
+    cache_db: Optional[str] = None,
+    stats: Optional[Dict[str, int]] = None,
+    history=None,
+) -> Tuple[int, float]:
+    """Classify every input in *spec*, writing one JSON line per JD to *out*.
+
+    With *workers* > 1 the JDs are classified by a pool of processes (see
+    parallel_classify.py); output order is unchanged.
+
+    With a ``dedup_index.DuplicateIndex``, MinHash copies of postings already
+    seen are reported (``duplicate_of``) without being embedded, and
+    classified JDs whose embedding is within the cosine threshold of an
+    earlier one are flagged the same way.  Both indexes key postings by
+    ``history_index.posting_id`` (the feed's absolute path and the record
+    id, or the .txt file's absolute path), so feeds that reuse line-number
+    ids do not collide and ``duplicate_of`` names the source.
+
+    JDs rejected by the active calibration are written with ``out_of_scope``
+    and are not added to the dedup index.  *stats*, if given, receives the
+    ``out_of_scope`` count.
+
+    With a ``history_index.HistoryIndex``, every classified JD's embedding is
+    added to it (MinHash copies are not classified, so not added), and its
+    IVF lists are retrained at the end if they are due.  JSONL ``company``,
+    ``title`` (or ``role_title``) and ``link`` (or ``url``) are stored with
+    it, and link the entry to the tracker row pipeline.py would log for the
+    posting (``application_store.row_key``).  Out-of-scope JDs
+    are added too, flagged ``out_of_scope``, so ``history_index.py similar``
+    can show that outcome; their vector is an embedding cache hit.
+
+    Returns ``(count, elapsed_seconds)``.
+    """
+    # (id, index key, text, JSONL record, MinHash match) for every input, in order.
+    pending: Deque[Tuple[str, str, str, dict, object]] = deque()
+    if history is not None:
+        from application_store import row_key
+    if dedup is not None or history is not None:
+        import history_index
+        source = spec if spec == "-" else os.path.abspath(spec)
+        # .txt inputs are keyed by absolute path, as pipeline.py keys them.
+        from_files = spec != "-" and not spec.endswith(".jsonl")
+    entries: List = []        # history_index.HistoryEntry, added every batch_size JDs
+
+    def texts() -> Iterator[str]:
+        for record_id, text, record in iter_batch_records(spec):
+            key = match = None
+            if dedup is not None or history is not None:
+                key = history_index.posting_id(source, os.path.abspath(record_id) if from_files else record_id)
+            if dedup is not None:
+                signature = dedup.signature(text)
+                # A re-run of the same feed must not match each posting to itself.
+                match = dedup.find_by_text(text, signature, exclude=key)
+                dedup.add_text(key, text, signature)
+            pending.append((record_id, key, text, record, match))
+            if match is None:
+                yield text
+
+    def write_duplicates() -> int:
+        written = 0
+        while pending and pending[0][4] is not None:
+            record_id, _, _, _, match = pending.popleft()
+            out.write(json.dumps({"id": record_id, **_duplicate_payload(match)}) + "\n")
+            written += 1
+        return written
+
+    t0 = time.perf_counter()
+    count = 0
+    classify_kwargs = dict(
+        backend=backend,
+        batch_size=batch_size,
+        pooling=pooling,
+        chunk_words=chunk_words,
+        chunk_overlap=chunk_overlap,
+        scoring=scoring,
+    )
+    if workers > 1:
+        from parallel_classify import classify_parallel
+        results = classify_parallel(
+            texts(),
+            workers=workers,
+            threads=worker_threads,
+            cache_db=cache_db,
+            with_vectors=dedup is not None or history is not None,
+            **classify_kwargs,
+        )
+    else:
+        results = ((result, None) for result in classify_many(texts(), **classify_kwargs))
+    # Dedup rows are committed every batch_size JDs rather than once per posting.
+    flushed_at = 0
+    with dedup.transaction() if dedup is not None else contextlib.nullcontext():
+        for result, vec in results:
+            # texts() runs a bounded number of batches ahead, so pending stays small.
+            count += write_duplicates()
+            record_id, key, text, record, _ = pending.popleft()
+            payload = {"id": record_id, **_result_payload(result)}
+            if result.out_of_scope:
+                if stats is not None:
+                    stats["out_of_scope"] = stats.get("out_of_scope", 0) + 1
+            elif dedup is not None and pooling == "none":
+                if vec is None:
+                    # A cache hit: classify_many just embedded this text.
+                    vec = jd_vectors([text], backend)[0]
+                match = dedup.find_by_vector(vec, exclude=key)
+                if match is not None:
+                    payload.update(_duplicate_payload(match))
+                dedup.add_vector(key, vec)
+            if history is not None:
+                if vec is None:
+                    # Cache hits: the text or chunks classify_many just embedded.
+                    vec = jd_vectors([text], backend, pooling, chunk_words, chunk_overlap)[0]
+                row = {
+                    "company": str(record.get("company") or ""),
+                    "role_title": str(record.get("title") or record.get("role_title") or ""),
+                    "link": str(record.get("link") or record.get("url") or ""),
+                    "source_id": key,
+                }
+                entries.append(history_index.HistoryEntry(
+                    posting_id=key,
+                    vector=vec,
+                    application_key="" if result.out_of_scope else row_key(row),
+                    role_category=result.role_category,
+                    company=row["company"],
+                    title=row["role_title"],
+                    link=row["link"],
+                    out_of_scope=result.out_of_scope,
+                ))
+                if len(entries) >= batch_size:
+                    history.add_many(entries)
+                    entries.clear()
+            with metrics.span("output"):
+                out.write(json.dumps(payload) + "\n")
+            count += 1
+            if dedup is not None and count - flushed_at >= batch_size:
+                dedup.flush()
+                flushed_at = count
+        count += write_duplicates()
+    if history is not None:
+        if entries:
+            history.add_many(entries)
+        # Everything is committed; a due IVF retraining now delays nothing but the exit.
+        history.retrain_if_due()
+    return count, time.perf_counter() - t0
+
+
+def _classifier_settings(args) -> dict:
+    """What besides backend and pooling decides a result; a daemon only serves clients that match.
+
+    The model name covers ``--openai-dims`` and the ONNX graph
+    (``AUTORESUME_ONNX_QUANTIZED``); the codec changes cached JD vectors.
+    """
+    roles = hashlib.sha256()
+    for role in ROLES:
+        for part in (role.name, role.resume, role.anchor, *role.secondary_anchors):
+            roles.update(part.encode("utf-8"))
+            roles.update(b"\0")
+    return {
+        "model": model_name(args.backend),
+        "vector_codec": args.vector_codec,
+        "roles": roles.hexdigest(),
+        "scoring": args.anchor_scoring,
+        "chunk_words": args.chunk_words,
+        "chunk_overlap": args.chunk_overlap,
+        "calibration": _CALIBRATION.to_dict() if _CALIBRATION is not None else None,
+    }
+
+
+def _start_metrics(args) -> None:
+    """Enable instrumentation and register the exports requested on the command line."""
+    metrics.enable(trace=bool(args.trace))
+    exporter = metrics.JsonLinesExporter(args.metrics_jsonl, args.metrics_interval) if args.metrics_jsonl else None
+
+    def export() -> None:
+        if exporter is not None:
+            exporter.close()
+        if args.trace:
+            events = metrics.write_trace(args.trace)
+            print(f"Wrote {events} trace events to {args.trace}", file=sys.stderr)
+        if args.metrics == "-":
+            sys.stderr.write(metrics.prometheus_text())
+        elif args.metrics:
+            metrics.write_prometheus(args.metrics)
+
+    atexit.register(export)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Semantic JD classifier — embedding cosine similarity",
@@ -315,11 +1728,137 @@ def main() -> None:
     )
     parser.add_argument("--text", help="Job description text (inline)")
     parser.add_argument("--file", help="Path to a .txt file containing the JD")
+    parser.add_argument(
+        "--batch",
+        metavar="PATH",
+        help="Classify many JDs: a directory of .txt files, a glob, or a .jsonl file "
+             "('-' for stdin); writes one JSON line per JD",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=32,
+        help="JDs embedded per backend call in --batch mode (default: 32)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes for --batch; each loads the model once and the anchor "
+             "matrix is shared between them (default: 1, in-process)",
+    )
+    parser.add_argument(
+        "--worker-threads",
+        type=int,
+        help="torch/BLAS threads per worker (default: library default; with --workers, "
+             "roughly cores / workers avoids oversubscription)",
+    )
+    parser.add_argument(
+        "--dedup-db",
+        help="SQLite index of seen postings; in --batch mode, near-duplicates of earlier "
+             "postings are reported with 'duplicate_of' (MinHash copies are not re-classified)",
+    )
+    parser.add_argument(
+        "--history-db",
+        default=os.environ.get("AUTORESUME_HISTORY_DB"),
+        help="In --batch mode, add every classified JD's embedding to this history index "
+             "for 'history_index.py similar' (default: $AUTORESUME_HISTORY_DB; off when unset)",
+    )
+    parser.add_argument(
+        "--output",
+        help="Write --batch results to this file instead of stdout",
+    )
     parser.add_argument(
         "--backend",
-        choices=["sbert", "openai"],
+        choices=available_backends(),
         default="sbert",
-        help="Embedding backend: 'sbert' (local, default) or 'openai' (requires OPENAI_API_KEY)",
+        help="Embedding backend: 'sbert' (local, default), 'onnx' (local, no torch; "
+             "needs an exported model) or 'openai' (requires OPENAI_API_KEY)",
+    )
+    parser.add_argument(
+        "--pooling",
+        choices=POOLING_MODES,
+        default="none",
+        help="How to handle JDs longer than one model window: 'none' embeds the whole text "
+             "(the model truncates it), 'mean'/'max' pool overlapping chunk embeddings, "
+             "'best' scores each role by its best-matching chunk (default: none)",
+    )
+    parser.add_argument(
+        "--chunk-words",
+        type=int,
+        default=CHUNK_WORDS,
+        help=f"Words per chunk when pooling (default: {CHUNK_WORDS})",
+    )
+    parser.add_argument(
+        "--chunk-overlap",
+        type=int,
+        default=CHUNK_OVERLAP,
+        help=f"Words shared by consecutive chunks (default: {CHUNK_OVERLAP})",
+    )
+    parser.add_argument(
+        "--anchor-scoring",
+        default="joined",
+        metavar="MODE",
+        help="How each role's anchors are scored: 'joined' embeds them as one text "
+             "(default); 'max', 'mean' or 'topN' (e.g. top2) embed every anchor separately "
+             "and aggregate per-anchor similarities (--explain shows the winning anchor)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a daemon that keeps the model and anchors resident and batches "
+             "concurrent requests (Unix socket by default, --port for localhost HTTP)",
+    )
+    parser.add_argument(
+        "--socket",
+        help="Daemon Unix socket (default: $AUTORESUME_DAEMON_SOCKET or "
+             "<cache dir>/classifier.sock)",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Serve / connect over http://127.0.0.1:PORT instead of the Unix socket",
+    )
+    parser.add_argument(
+        "--batch-wait-ms",
+        type=float,
+        default=5.0,
+        help="How long the daemon waits to group concurrent requests (default: 5)",
+    )
+    parser.add_argument(
+        "--no-daemon",
+        action="store_true",
+        help="Classify in-process even if a daemon is running",
+    )
+    parser.add_argument(
+        "--daemon-stats",
+        action="store_true",
+        help="Print the running daemon's request counts and latency percentiles",
+    )
+    parser.add_argument(
+        "--roles",
+        metavar="PATH",
+        help="Role catalogue to classify against instead of the built-in roles: a JSON/YAML "
+             "catalogue or an artifact from 'role_catalogue.py compile' "
+             "(default: $AUTORESUME_ROLES)",
+    )
+    parser.add_argument(
+        "--openai-rpm",
+        type=float,
+        help="Requests-per-minute budget for --backend openai "
+             "(default: $AUTORESUME_OPENAI_RPM or 3000)",
+    )
+    parser.add_argument(
+        "--openai-tpm",
+        type=float,
+        help="Tokens-per-minute budget for --backend openai "
+             "(default: $AUTORESUME_OPENAI_TPM or 1000000)",
+    )
+    parser.add_argument(
+        "--openai-dims",
+        type=int,
+        help=f"Ask --backend openai for N-dimensional vectors instead of {OPENAI_DIM} "
+             "(default: $AUTORESUME_OPENAI_DIMS)",
     )
     parser.add_argument(
         "--json",
@@ -331,7 +1870,196 @@ def main() -> None:
         action="store_true",
         help="Show all role scores and confidence values",
     )
+    parser.add_argument(
+        "--cache-db",
+        default=os.environ.get("AUTORESUME_EMBED_DB"),
+        help="SQLite file for the persistent JD embedding cache "
+             "(default: $AUTORESUME_EMBED_DB; in-memory only when unset)",
+    )
+    parser.add_argument(
+        "--vector-codec",
+        choices=CODECS,
+        default=VECTOR_CODEC,
+        help="Storage of vectors in --cache-db, --dedup-db and --history-db (default: "
+             "$AUTORESUME_VECTOR_CODEC or float32); see docs/COMPACT_VECTORS.md",
+    )
+    parser.add_argument(
+        "--cache-stats",
+        action="store_true",
+        help="Print JD embedding cache hit/miss statistics to stderr",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="FILE",
+        help="Record every instrumented span and write a Chrome trace (chrome://tracing, "
+             "Perfetto) to FILE at exit",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="Write span timings and counters in Prometheus text format to FILE at exit "
+             "('-' for stderr)",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        metavar="FILE",
+        help="Append a JSON snapshot of span timings and counters to FILE every "
+             "--metrics-interval seconds",
+    )
+    parser.add_argument(
+        "--metrics-interval",
+        type=float,
+        default=10.0,
+        help="Seconds between --metrics-jsonl snapshots (default: 10)",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Classify in-process and print a timing breakdown (interpreter, backend "
+             "import, model load, anchor embed, query embed) to stderr",
+    )
+    parser.add_argument(
+        "--warmup",
+        action="store_true",
+        help="Load the model and anchors, report load vs per-query time, and exit",
+    )
     args = parser.parse_args()
+    try:
+        _parse_scoring(args.anchor_scoring)
+    except ValueError as e:
+        parser.error(str(e))
+    if not args.metrics_interval > 0:
+        parser.error("--metrics-interval must be > 0 seconds")
+
+    if args.openai_rpm or args.openai_tpm:
+        configure_openai(requests_per_minute=args.openai_rpm, tokens_per_minute=args.openai_tpm)
+    if args.openai_dims:
+        try:
+            configure_openai(dimensions=args.openai_dims)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.cache_db:
+        configure_jd_cache(db_path=args.cache_db, codec=args.vector_codec)
+    elif args.vector_codec != VECTOR_CODEC:
+        configure_jd_cache(codec=args.vector_codec)
+    if args.cache_stats:
+        atexit.register(lambda: print(jd_cache_stats().summary(), file=sys.stderr))
+    if args.trace or args.metrics or args.metrics_jsonl or args.serve:
+        # The daemon always collects, for its /metrics endpoint.
+        _start_metrics(args)
+    roles_path = args.roles or os.environ.get("AUTORESUME_ROLES")
+    if roles_path:
+        import role_catalogue
+        try:
+            role_catalogue.activate(roles_path, args.backend)
+        except FileNotFoundError:
+            print(f"File not found: {roles_path}", file=sys.stderr)
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        if _CALIBRATION is not None and _CALIBRATION.scoring != args.anchor_scoring:
+            print(
+                f"Warning: {roles_path} is calibrated for --anchor-scoring {_CALIBRATION.scoring}; "
+                "using the default temperature and no out-of-scope thresholds",
+                file=sys.stderr,
+            )
+
+    if args.warmup:
+        print(warmup(args.backend).summary())
+        return
+
+    import classify_daemon
+
+    if args.port is not None:
+        daemon_address = f"http://127.0.0.1:{args.port}"
+    else:
+        daemon_address = "unix:" + (args.socket or classify_daemon.default_socket_path(CACHE_DIR))
+
+    if args.daemon_stats:
+        stats = classify_daemon.request(daemon_address, "GET", "/stats")
+        if stats is None:
+            print(f"No classifier daemon at {daemon_address}", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps(stats, indent=2))
+        return
+
+    if args.serve:
+        print(warmup(args.backend).summary(), file=sys.stderr)
+
+        def classify_batch(texts: List[str], pooling: str) -> List[dict]:
+            results = classify_many(
+                texts,
+                backend=args.backend,
+                batch_size=len(texts),
+                pooling=pooling,
+                chunk_words=args.chunk_words,
+                chunk_overlap=args.chunk_overlap,
+                scoring=args.anchor_scoring,
+            )
+            return [_result_payload(r) for r in results]
+
+        daemon = classify_daemon.ClassifierDaemon(
+            classify_batch,
+            backend=args.backend,
+            socket_path=None if args.port is not None else daemon_address[len("unix:"):],
+            port=args.port,
+            max_wait=args.batch_wait_ms / 1000.0,
+            settings=_classifier_settings(args),
+        )
+        print(f"Serving {args.backend} classifier on {daemon.address}", file=sys.stderr)
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return
+
+    if args.batch:
+        dedup = None
+        if args.dedup_db:
+            from dedup_index import DuplicateIndex
+            dedup = DuplicateIndex(db_path=args.dedup_db, codec=args.vector_codec)
+        history = None
+        if args.history_db:
+            import history_index
+            try:
+                history = history_index.HistoryIndex(
+                    args.history_db, codec=args.vector_codec, model=history_index.model_key(args.backend)
+                )
+            except ValueError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        out = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        batch_stats: Dict[str, int] = {}
+        try:
+            count, elapsed = run_batch(
+                args.batch,
+                args.backend,
+                args.batch_size,
+                out,
+                pooling=args.pooling,
+                chunk_words=args.chunk_words,
+                chunk_overlap=args.chunk_overlap,
+                dedup=dedup,
+                scoring=args.anchor_scoring,
+                workers=args.workers,
+                worker_threads=args.worker_threads,
+                cache_db=args.cache_db,
+                stats=batch_stats,
+                history=history,
+            )
+        finally:
+            if out is not sys.stdout:
+                out.close()
+            if dedup is not None:
+                dedup.close()
+            if history is not None:
+                history.close()
+        rate = count / elapsed if elapsed > 0 else 0.0
+        print(f"Classified {count} JDs in {elapsed:.2f}s ({rate:.1f} JDs/s)", file=sys.stderr)
+        if batch_stats.get("out_of_scope"):
+            print(f"{batch_stats['out_of_scope']} out of scope (below the calibrated thresholds)", file=sys.stderr)
+        return
 
     if not args.text and not args.file:
         parser.print_help()
@@ -347,24 +2075,39 @@ def main() -> None:
     else:
         text = args.text
 
-    result = classify_text(text, backend=args.backend)
+    classify_kwargs = dict(
+        backend=args.backend,
+        pooling=args.pooling,
+        chunk_words=args.chunk_words,
+        chunk_overlap=args.chunk_overlap,
+        scoring=args.anchor_scoring,
+    )
+    if args.profile_startup:
+        profile, result = profile_startup(text, **classify_kwargs)
+        print(profile.summary(), file=sys.stderr)
+    else:
+        payload = None
+        if not args.no_daemon and not metrics.ENABLED:
+            # The daemon declines unless its roles, scoring, chunking and calibration
+            # match ours; spans and counters are only collected in-process.
+            payload = classify_daemon.classify_remote(
+                daemon_address, text, args.backend, args.pooling, settings=_classifier_settings(args)
+            )
+        if payload is not None:
+            result = _result_from_payload(payload)
+        else:
+            result = classify_text(text, **classify_kwargs)
 
     if args.json:
-        payload = {
-            "role_category": result.role_category,
-            "resume": result.resume,
-            "similarity": result.similarity,
-            "confidence": result.confidence,
-            "confidence_label": _confidence_label(result.confidence),
-            "scores": result.scores,
-            "confidence_scores": result.confidence_scores,
-        }
-        print(json.dumps(payload, indent=2))
+        print(json.dumps(_result_payload(result), indent=2))
         return
 
     # Human-readable output
-    label = _confidence_label(result.confidence)
-    print(f"\nRole Category  : {result.role_category}")
+    label = "OUT OF SCOPE" if result.out_of_scope else _confidence_label(result.confidence)
+    if result.out_of_scope:
+        print(f"\nRole Category  : none of the above (closest: {result.role_category})")
+    else:
+        print(f"\nRole Category  : {result.role_category}")
     print(f"Resume         : {result.resume}")
     print(f"Similarity     : {result.similarity:.4f}  (raw cosine)")
     print(f"Confidence     : {result.confidence:.1%}  [{label}]")
@@ -376,8 +2119,13 @@ def main() -> None:
             prob = result.confidence_scores[role_name]
             bar = "#" * int(prob * 30)
             print(f"  {role_name:<25} sim={sim:.4f}  conf={prob:.1%}  {bar}")
+        if result.matched_anchor:
+            print(f"\nMatched anchor : {result.matched_anchor}")
     print()
 
 
+_MODULE_SECONDS = time.perf_counter() - _T_MODULE_START
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,380 @@
+"""Near-duplicate detection for job postings.
+
+The same posting shows up on several boards with small edits.  Two checks
+catch the copies:
+
+* MinHash over word shingles, bucketed with LSH banding — finds exact-ish
+  copies from the raw text alone, *before* anything is embedded.
+* Cosine similarity of the JD embeddings the classifier already produced —
+  finds reworded copies before they are logged as new applications.
+
+Both structures are incremental: ``add`` appends one posting, and the
+optional SQLite file makes the index survive across runs.  A posting id has
+one signature and one vector: re-adding it with the same text or vector is
+a no-op, and with other text (an edited posting) replaces its entry in
+place.  Lookups can exclude the posting's own id, so re-running a feed does
+not flag every posting as a copy of itself.  Ids must therefore be unique
+across feeds; ``classify_jd.py --batch`` uses ``history_index.posting_id``.  Bulk callers wrap their adds in ``transaction()`` to commit
+once per batch instead of once per posting.  MinHash lookups
+touch only the colliding buckets; the cosine check is one matrix-vector
+product over a contiguous matrix, a few milliseconds at hundreds of
+thousands of postings.  ``codec="float16"`` or ``"int8"`` stores that matrix
+(and the SQLite rows) at a half or a quarter of the float32 size; see
+vector_codec.py.
+
+Usage
+-----
+    index = DuplicateIndex(db_path="~/.cache/autoresume/dedup.sqlite")
+    match = index.find_by_text(text)                # before embedding
+    if match is None:
+        vec = embed(text)
+        match = index.find_by_vector(vec)           # before logging
+    index.add(posting_id, text, vec)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import DefaultDict, Dict, List, Optional, Sequence, Tuple
+
+from startup import lazy_import
+from vector_codec import CompactMatrix, decode, encode
+
+np = lazy_import("numpy")   # imported on first use; None when not installed
+
+_MERSENNE = (1 << 61) - 1
+_MASK64 = (1 << 64) - 1
+_MASK32 = (1 << 32) - 1
+_WORD = re.compile(r"\w+")
+
+
+@dataclass
+class DuplicateMatch:
+    posting_id: str
+    kind: str              # "minhash" (estimated Jaccard) or "cosine"
+    score: float
+
+
+def shingles(text: str, k: int = 5) -> List[str]:
+    """Lower-cased word k-grams; short texts become a single shingle."""
+    words = _WORD.findall(text.lower())
+    if len(words) <= k:
+        return [" ".join(words)] if words else []
+    return [" ".join(words[i:i + k]) for i in range(len(words) - k + 1)]
+
+
+def _hash32(shingle: str) -> int:
+    return int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+
+
+class MinHasher:
+    """``num_perm`` universal-hash permutations of 32-bit shingle hashes.
+
+    Arithmetic wraps at 64 bits on both paths, so NumPy and pure Python
+    produce identical signatures.
+    """
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        gen = hashlib.blake2b(f"minhash-{seed}".encode(), digest_size=64)
+        self.a: List[int] = []
+        self.b: List[int] = []
+        counter = 0
+        while len(self.a) < num_perm:
+            block = hashlib.blake2b(gen.digest() + counter.to_bytes(4, "little"), digest_size=16).digest()
+            counter += 1
+            self.a.append(int.from_bytes(block[:8], "little") % (_MERSENNE - 1) + 1)
+            self.b.append(int.from_bytes(block[8:], "little") % _MERSENNE)
+        self.num_perm = num_perm
+
+    def signature(self, text: str, k: int = 5) -> Tuple[int, ...]:
+        hashes = [_hash32(s) for s in shingles(text, k)]
+        if not hashes:
+            return (_MASK32,) * self.num_perm
+        if np is not None:
+            h = np.asarray(hashes, dtype=np.uint64)[:, None]
+            a = np.asarray(self.a, dtype=np.uint64)[None, :]
+            b = np.asarray(self.b, dtype=np.uint64)[None, :]
+            with np.errstate(over="ignore"):
+                perm = (a * h + b) % np.uint64(_MERSENNE) & np.uint64(_MASK32)
+            return tuple(int(x) for x in perm.min(axis=0))
+        return tuple(
+            min(((((a * h) & _MASK64) + b) & _MASK64) % _MERSENNE & _MASK32 for h in hashes)
+            for a, b in zip(self.a, self.b)
+        )
+
+
+def estimate_jaccard(sig_a: Sequence[int], sig_b: Sequence[int]) -> float:
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+class DuplicateIndex:
+    """Incremental MinHash-LSH + cosine index of seen postings.  Thread-safe."""
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle_size: int = 5,
+        jaccard_threshold: float = 0.8,
+        cosine_threshold: float = 0.95,
+        codec: str = "float32",
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.hasher = MinHasher(num_perm)
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.jaccard_threshold = jaccard_threshold
+        self.cosine_threshold = cosine_threshold
+
+        self._ids: List[str] = []
+        self._signatures: List[Tuple[int, ...]] = []
+        self._buckets: List[DefaultDict[Tuple[int, ...], List[int]]] = [
+            defaultdict(list) for _ in range(bands)
+        ]
+        # Unit-length vectors; row i of the matrix belongs to _vector_ids[i].
+        self._vector_ids: List[str] = []
+        self._matrix = CompactMatrix(codec)
+        self._signature_index: Dict[str, int] = {}      # posting_id -> index into _ids
+        self._vector_rows: Dict[str, int] = {}          # posting_id -> matrix row
+        self._deferred = 0                     # open transaction() blocks
+        self._lock = threading.RLock()
+
+        self.db_path = os.path.expanduser(db_path) if db_path else None
+        self._db: Optional[sqlite3.Connection] = None
+        if self.db_path:
+            self._db = self._open_db(self.db_path)
+            self._load()
+
+    # -- persistence --------------------------------------------------------
+
+    @staticmethod
+    def _open_db(path: str) -> sqlite3.Connection:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS signatures ("
+            " seq INTEGER PRIMARY KEY,"
+            " posting_id TEXT NOT NULL,"
+            " signature BLOB NOT NULL)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS vectors ("
+            " seq INTEGER PRIMARY KEY,"
+            " posting_id TEXT NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(vectors)")}
+        if "codec" not in columns:
+            # Indexes written before codecs existed hold float32 rows.
+            db.execute("ALTER TABLE vectors ADD COLUMN codec TEXT NOT NULL DEFAULT 'float32'")
+        db.commit()
+        return db
+
+    def _load(self) -> None:
+        for posting_id, blob in self._db.execute(
+            "SELECT posting_id, signature FROM signatures ORDER BY seq"
+        ):
+            self._insert_signature(posting_id, tuple(array("I", blob)))
+        for posting_id, blob, codec in self._db.execute(
+            "SELECT posting_id, vector, codec FROM vectors ORDER BY seq"
+        ):
+            self._append_vector(posting_id, decode(blob, codec))
+
+    # -- internals ----------------------------------------------------------
+
+    def _band_keys(self, signature: Tuple[int, ...]):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    @staticmethod
+    def _unit(vec: Sequence[float]) -> List[float]:
+        vec = [float(x) for x in vec]
+        norm = sum(x * x for x in vec) ** 0.5
+        return [x / norm for x in vec] if norm else vec
+
+    def _append_vector(self, posting_id: str, vec: Sequence[float]) -> None:
+        row = self._vector_rows.get(posting_id)
+        if row is not None:
+            self._matrix.replace(row, vec)
+            return
+        self._vector_rows[posting_id] = len(self._vector_ids)
+        self._vector_ids.append(posting_id)
+        self._matrix.append(vec)
+
+    def _insert_signature(self, posting_id: str, signature: Tuple[int, ...]) -> None:
+        idx = self._signature_index.get(posting_id)
+        if idx is not None:
+            # An edited posting keeps its place, so exclude= still sees the same predecessors.
+            for band, key in self._band_keys(self._signatures[idx]):
+                bucket = self._buckets[band][key]
+                bucket.remove(idx)
+                if not bucket:
+                    del self._buckets[band][key]
+            self._signatures[idx] = signature
+        else:
+            idx = len(self._ids)
+            self._signature_index[posting_id] = idx
+            self._ids.append(posting_id)
+            self._signatures.append(signature)
+        for band, key in self._band_keys(signature):
+            self._buckets[band][key].append(idx)
+
+    def _commit(self) -> None:
+        if self._db is not None and not self._deferred:
+            self._db.commit()
+
+    # -- public API ---------------------------------------------------------
+
+    @contextmanager
+    def transaction(self):
+        """Commit the adds made inside the block once, at its end (blocks may nest)."""
+        with self._lock:
+            self._deferred += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._deferred -= 1
+                self._commit()
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        return self.hasher.signature(text, self.shingle_size)
+
+    def find_by_text(
+        self,
+        text: str,
+        signature: Optional[Tuple[int, ...]] = None,
+        exclude: Optional[str] = None,
+    ) -> Optional[DuplicateMatch]:
+        """Best MinHash match at or above ``jaccard_threshold`` (no embedding needed).
+
+        *exclude* is the posting's own id: if it is already indexed (a re-run),
+        only postings indexed before it count, so the answer matches the first run.
+        An id that is not indexed excludes nothing.
+        """
+        signature = signature or self.signature(text)
+        with self._lock:
+            candidates = set()
+            for band, key in self._band_keys(signature):
+                candidates.update(self._buckets[band].get(key, ()))
+            limit = self._signature_index.get(exclude, len(self._ids)) if exclude is not None else len(self._ids)
+            best: Optional[DuplicateMatch] = None
+            for idx in candidates:
+                if idx >= limit:
+                    continue
+                score = estimate_jaccard(signature, self._signatures[idx])
+                if score >= self.jaccard_threshold and (best is None or score > best.score):
+                    best = DuplicateMatch(self._ids[idx], "minhash", round(score, 4))
+            return best
+
+    def find_by_vector(self, vec: Sequence[float], exclude: Optional[str] = None) -> Optional[DuplicateMatch]:
+        """Most similar stored posting at or above ``cosine_threshold``.
+
+        *exclude* works as in ``find_by_text``.
+        """
+        unit = self._unit(vec)
+        with self._lock:
+            own = self._vector_rows.get(exclude) if exclude is not None else None
+            n = own if own is not None else len(self._vector_ids)
+            if not n:
+                return None
+            sims = self._matrix.dot(unit)[:n]
+            if np is not None:
+                best = int(sims.argmax())
+            else:
+                best = max(range(n), key=sims.__getitem__)
+            score = float(sims[best])
+        if score < self.cosine_threshold:
+            return None
+        return DuplicateMatch(self._vector_ids[best], "cosine", round(score, 4))
+
+    def check(self, text: str, vec: Optional[Sequence[float]] = None) -> Optional[DuplicateMatch]:
+        return self.find_by_text(text) or (self.find_by_vector(vec) if vec is not None else None)
+
+    def add_text(
+        self,
+        posting_id: str,
+        text: str,
+        signature: Optional[Tuple[int, ...]] = None,
+    ) -> bool:
+        """Index a posting's MinHash signature (no embedding needed).
+
+        Returns False, adding nothing, if *posting_id* is already indexed with
+        this signature; another signature replaces the indexed one.
+        """
+        signature = signature or self.signature(text)
+        with self._lock:
+            idx = self._signature_index.get(posting_id)
+            if idx is not None and self._signatures[idx] == signature:
+                return False
+            self._insert_signature(posting_id, signature)
+            if self._db is not None:
+                blob = array("I", signature).tobytes()
+                if idx is None:
+                    self._db.execute(
+                        "INSERT INTO signatures (posting_id, signature) VALUES (?, ?)", (posting_id, blob)
+                    )
+                else:
+                    self._db.execute("UPDATE signatures SET signature = ? WHERE posting_id = ?", (blob, posting_id))
+                self._commit()
+            return True
+
+    def add_vector(self, posting_id: str, vec: Sequence[float]) -> bool:
+        """Index a posting's JD embedding for ``find_by_vector``.
+
+        Returns False, adding nothing, if *posting_id* already has (practically)
+        this vector; another vector replaces the indexed one.
+        """
+        with self._lock:
+            own = self._vector_rows.get(posting_id)
+            if own is not None and float(self._matrix.dot(self._unit(vec), [own])[0]) >= 0.999:
+                return False
+            self._append_vector(posting_id, vec)
+            if self._db is not None:
+                blob, codec = encode(vec, self._matrix.codec), self._matrix.codec
+                if own is None:
+                    self._db.execute(
+                        "INSERT INTO vectors (posting_id, vector, codec) VALUES (?, ?, ?)",
+                        (posting_id, blob, codec),
+                    )
+                else:
+                    self._db.execute(
+                        "UPDATE vectors SET vector = ?, codec = ? WHERE posting_id = ?", (blob, codec, posting_id)
+                    )
+                self._commit()
+            return True
+
+    def add(self, posting_id: str, text: str, vec: Optional[Sequence[float]] = None) -> None:
+        self.add_text(posting_id, text)
+        if vec is not None:
+            self.add_vector(posting_id, vec)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def flush(self) -> None:
+        """Commit what was added so far, even inside ``transaction()``."""
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.commit()
+                self._db.close()
+                self._db = None
@@ -0,0 +1,221 @@
+"""Content-addressed cache of JD embeddings.
+
+The same posting is classified many times (reposts, reruns after editing the
+roles, ``--json`` then ``--explain``), and on the OpenAI backend every one of
+those is a paid round trip.  Vectors are keyed by a hash of the normalised
+text plus the backend and model, so any repeat skips the backend entirely.
+
+Two tiers:
+
+* memory — an LRU of the most recent ``max_entries`` vectors
+* SQLite — optional, survives across processes, capped at ``max_db_entries``
+  rows with least-recently-used eviction; vectors are stored in ``codec``
+  (float32, float16 or int8, see vector_codec.py)
+
+Usage
+-----
+    cache = EmbeddingCache(max_entries=4096, db_path="~/.cache/autoresume/jd.sqlite")
+    key = cache.key(text, "sbert", "all-MiniLM-L6-v2")
+    vec = cache.get(key)
+    if vec is None:
+        vec = embed(text)
+        cache.put(key, vec)
+    print(cache.stats.summary())
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from vector_codec import check_codec, decode, encode
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so trivially re-wrapped postings share a key."""
+    return " ".join(text.split())
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hits(self) -> int:
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def summary(self) -> str:
+        return (
+            f"embedding cache: {self.hits} hits "
+            f"({self.memory_hits} memory, {self.disk_hits} disk), "
+            f"{self.misses} misses, hit rate {self.hit_rate:.1%}"
+        )
+
+
+class EmbeddingCache:
+    """Two-tier (LRU memory + optional SQLite) embedding cache. Thread-safe."""
+
+    def __init__(
+        self,
+        max_entries: int = 4096,
+        db_path: Optional[str] = None,
+        max_db_entries: int = 200_000,
+        codec: str = "float32",
+    ):
+        check_codec(codec)
+        self.max_entries = max_entries
+        self.max_db_entries = max_db_entries
+        self.codec = codec
+        self.db_path = os.path.expanduser(db_path) if db_path else None
+        self.stats = CacheStats()
+        self._memory: "OrderedDict[str, Sequence[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if self.db_path:
+            self._db = self._open_db(self.db_path)
+
+    @staticmethod
+    def key(text: str, backend: str, model: str) -> str:
+        h = hashlib.sha256()
+        for part in (backend, model, normalize_text(text)):
+            h.update(part.encode("utf-8"))
+            h.update(b"\0")
+        return h.hexdigest()
+
+    # -- SQLite tier --------------------------------------------------------
+
+    @staticmethod
+    def _open_db(path: str) -> sqlite3.Connection:
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        columns = {row[1] for row in db.execute("PRAGMA table_info(embeddings)")}
+        if "codec" not in columns:
+            # Caches written before codecs existed hold float32 rows.
+            db.execute("ALTER TABLE embeddings ADD COLUMN codec TEXT NOT NULL DEFAULT 'float32'")
+        db.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings(last_used)")
+        db.commit()
+        return db
+
+    def _db_get_many(self, keys: List[str]) -> Dict[str, Sequence[float]]:
+        found: Dict[str, Sequence[float]] = {}
+        if self._db is None or not keys:
+            return found
+        # SQLite caps bound parameters; 500 is well under every build's limit.
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            marks = ",".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, vector, codec FROM embeddings WHERE key IN ({marks})", chunk
+            ).fetchall()
+            for key, blob, codec in rows:
+                found[key] = decode(blob, codec)
+        if found:
+            now = time.time()
+            self._db.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in found],
+            )
+            self._db.commit()
+        return found
+
+    def _db_put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        if self._db is None or not items:
+            return
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, codec, last_used) VALUES (?, ?, ?, ?)",
+                [(key, encode(vec, self.codec), self.codec, now) for key, vec in items.items()],
+            )
+            (count,) = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+            excess = count - self.max_db_entries
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM embeddings WHERE key IN ("
+                    " SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+                self.stats.evictions += excess
+
+    # -- memory tier --------------------------------------------------------
+
+    def _remember(self, key: str, vec: Sequence[float]) -> None:
+        if getattr(vec, "base", None) is not None:
+            # A NumPy row view would keep the caller's whole batch matrix alive.
+            vec = vec.copy()
+        self._memory[key] = vec
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # -- public API ---------------------------------------------------------
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Sequence[float]]:
+        """Return the cached vectors among *keys*; absent keys count as misses."""
+        keys = list(keys)
+        with self._lock:
+            found: Dict[str, Sequence[float]] = {}
+            pending: List[str] = []
+            for key in keys:
+                vec = self._memory.get(key)
+                if vec is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vec
+                    self.stats.memory_hits += 1
+                else:
+                    pending.append(key)
+
+            from_disk = self._db_get_many(list(dict.fromkeys(pending)))
+            for key in pending:
+                vec = from_disk.get(key)
+                if vec is None:
+                    self.stats.misses += 1
+                    continue
+                found[key] = vec
+                self.stats.disk_hits += 1
+                self._remember(key, vec)
+            return found
+
+    def put_many(self, items: Dict[str, Sequence[float]]) -> None:
+        with self._lock:
+            for key, vec in items.items():
+                self._remember(key, vec)
+            self._db_put_many(items)
+
+    def get(self, key: str) -> Optional[Sequence[float]]:
+        return self.get_many([key]).get(key)
+
+    def put(self, key: str, vec: Sequence[float]) -> None:
+        self.put_many({key: vec})
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
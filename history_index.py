@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+"""Searchable history of every classified posting: "show me the past postings most like this one".
+
+``classify_jd`` throws each JD embedding away once the posting is classified.
+This module keeps them: ``pipeline.py`` (and ``classify_jd.py --batch
+--history-db``) add every classified posting's vector here, keyed by the
+application store row it was logged as, so a search can show what happened
+to the similar postings — applied, interviewed, rejected.
+
+Search is an IVF (inverted file) index over the compact vector matrix of
+vector_codec.py:
+
+* ``train`` clusters the stored vectors with spherical k-means into about
+  sqrt(n) lists and assigns every row to its nearest centroid;
+* a query scores the centroids, keeps the ``nprobe`` best lists and computes
+  exact cosines only for the rows in them — a few percent of the corpus;
+* ``add`` assigns a new posting to its nearest existing centroid, so inserts
+  never rebuild the index.  ``retrain_if_due`` retrains the centroids once
+  the corpus reaches ``min_train`` or has grown ``RETRAIN_GROWTH`` times
+  since the last training, which keeps the lists balanced at an amortised
+  O(1) cost per insert.  Inserts never retrain: writers call it once their
+  rows are committed (pipeline.py and ``classify_jd.py --batch`` at the end
+  of a run), or ``history_index.py train`` does.  Training holds the index
+  lock, so searches and inserts wait for it: a few seconds per 100k postings.
+
+Below ``min_train`` postings (and without NumPy, or with ``exact=True``)
+search is a brute-force scan, which is exact and already fast at that size.
+
+Usage
+-----
+    python3 history_index.py similar --file jd.txt --top 20
+    python3 history_index.py similar --text "..." --backend openai --json
+    python3 history_index.py similar --posting /data/feed.jsonl:123
+    python3 history_index.py stats
+    python3 history_index.py train                    # retrain the IVF lists now
+
+The index defaults to ~/.cache/autoresume/history.sqlite (override with --db
+or AUTORESUME_HISTORY_DB); outcomes come from the application store (--applications).
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import json
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from startup import lazy_import
+from vector_codec import CompactMatrix, check_codec, decode, encode
+
+np = lazy_import("numpy")   # imported on first use; None when not installed
+
+DEFAULT_DB = os.environ.get("AUTORESUME_HISTORY_DB") or os.path.join(
+    os.path.expanduser("~"), ".cache", "autoresume", "history.sqlite"
+)
+
+# Brute force is exact and takes a millisecond or two below this many postings.
+MIN_TRAIN = 4096
+# Retrain the centroids once the corpus is this many times the size they were trained on.
+RETRAIN_GROWTH = 4
+KMEANS_ITERATIONS = 12
+# Rows sampled per centroid when training; k-means on the whole corpus buys nothing.
+SAMPLE_PER_LIST = 64
+
+
+@dataclass
+class HistoryEntry:
+    posting_id: str
+    vector: Sequence[float]
+    application_key: str = ""          # application_store.row_key of the tracker row
+    role_category: str = ""
+    company: str = ""
+    title: str = ""
+    link: str = ""
+    out_of_scope: bool = False
+
+
+@dataclass
+class SimilarPosting:
+    posting_id: str
+    score: float                       # cosine similarity to the query
+    application_key: str
+    role_category: str
+    company: str
+    title: str
+    link: str
+    out_of_scope: bool
+    added_at: str
+    application: Optional[Dict[str, str]] = None   # tracker row (status, dates, notes) when linked
+
+
+def _normalize_rows(m):
+    norms = np.linalg.norm(m, axis=1, keepdims=True)
+    return m / np.where(norms == 0, 1.0, norms)
+
+
+def kmeans(data, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+    """Spherical k-means: *k* unit centroids of the unit rows of *data*."""
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), k, replace=False)].copy()
+    for _ in range(iterations):
+        assign = (data @ centroids.T).argmax(axis=1)
+        order = np.argsort(assign, kind="stable")
+        members, starts = np.unique(assign[order], return_index=True)
+        sums = np.add.reduceat(data[order], starts, axis=0)
+        updated = centroids.copy()
+        updated[members] = _normalize_rows(sums)
+        # A list that lost all its rows restarts from a random row.
+        empty = np.setdiff1d(np.arange(k), members)
+        if len(empty):
+            updated[empty] = data[rng.choice(len(data), len(empty), replace=False)]
+        centroids = updated
+    return centroids.astype(np.float32)
+
+
+class HistoryIndex:
+    """Persistent IVF index of posting embeddings.  Thread-safe.
+
+    *model* names the embedding model (``backend/model``); an index is bound
+    to the first model that writes to it, since vectors of different models
+    are not comparable.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DB,
+        codec: str = "float32",
+        model: Optional[str] = None,
+        nprobe: int = 8,
+        min_train: int = MIN_TRAIN,
+    ):
+        check_codec(codec)
+        self.codec = codec
+        self.nprobe = nprobe
+        self.min_train = min_train
+        self._matrix = CompactMatrix(codec)
+        self._seqs: List[int] = []             # row i of the matrix is postings.seq _seqs[i]
+        self._ids: Dict[str, int] = {}         # posting_id -> row
+        self._centroids = None
+        self._assign = None                    # NumPy int32 list id per row (capacity-sized)
+        self._trained_on = 0
+        self._lock = threading.Lock()
+
+        self.db_path = db_path if db_path == ":memory:" else os.path.expanduser(db_path)
+        self._db = self._open_db(self.db_path)
+        self.model = self._meta("model")
+        if model is not None:
+            if self.model is None:
+                self._set_meta("model", model)
+                self.model = model
+            elif self.model != model:
+                raise ValueError(f"{self.db_path} holds {self.model} vectors, not {model}")
+        self._load()
+
+    # -- persistence --------------------------------------------------------
+
+    @staticmethod
+    def _open_db(path: str) -> sqlite3.Connection:
+        if path != ":memory:":
+            parent = os.path.dirname(path)
+            if parent:
+                os.makedirs(parent, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS postings ("
+            " seq INTEGER PRIMARY KEY,"
+            " posting_id TEXT NOT NULL UNIQUE,"
+            " application_key TEXT NOT NULL DEFAULT '',"
+            " role_category TEXT NOT NULL DEFAULT '',"
+            " company TEXT NOT NULL DEFAULT '',"
+            " title TEXT NOT NULL DEFAULT '',"
+            " link TEXT NOT NULL DEFAULT '',"
+            " out_of_scope INTEGER NOT NULL DEFAULT 0,"
+            " added_at TEXT NOT NULL,"
+            " list_id INTEGER NOT NULL DEFAULT -1,"
+            " codec TEXT NOT NULL,"
+            " vector BLOB NOT NULL)"
+        )
+        db.execute("CREATE INDEX IF NOT EXISTS idx_postings_application ON postings(application_key)")
+        db.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value BLOB NOT NULL)")
+        db.commit()
+        return db
+
+    def _meta(self, name: str):
+        row = self._db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name: str, value) -> None:
+        with self._db:
+            self._db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    def _load(self) -> None:
+        lists: List[int] = []
+        vectors = []
+        for seq, posting_id, list_id, blob, codec in self._db.execute(
+            "SELECT seq, posting_id, list_id, vector, codec FROM postings ORDER BY seq"
+        ):
+            self._ids[posting_id] = len(self._seqs)
+            self._seqs.append(seq)
+            lists.append(list_id)
+            vectors.append(decode(blob, codec))
+            if len(vectors) >= 8192:
+                self._matrix.extend(vectors)
+                vectors = []
+        self._matrix.extend(vectors)
+        if np is None:
+            return
+        self._assign = np.full(max(len(lists), 1024), -1, dtype=np.int32)
+        self._assign[:len(lists)] = lists
+        blob = self._meta("centroids")
+        if blob is not None and self._seqs:
+            dim = self._matrix.take([0]).shape[1]
+            self._centroids = np.frombuffer(blob, dtype=np.float32).reshape(-1, dim).copy()
+            self._trained_on = int(self._meta("trained_on") or 0)
+            # Rows written before the lists existed (or by a run without NumPy).
+            stale = np.flatnonzero(self._assign[:len(lists)] < 0)
+            if len(stale):
+                self._assign[stale] = self._nearest_lists(self._matrix.take(stale))
+                self._save_lists(stale)
+
+    def _save_lists(self, rows) -> None:
+        with self._db:
+            self._db.executemany(
+                "UPDATE postings SET list_id = ? WHERE seq = ?",
+                [(int(self._assign[i]), self._seqs[i]) for i in rows],
+            )
+
+    # -- IVF ----------------------------------------------------------------
+
+    def _nearest_lists(self, unit_rows):
+        out = np.empty(len(unit_rows), dtype=np.int32)
+        for lo in range(0, len(unit_rows), 8192):
+            out[lo:lo + 8192] = (unit_rows[lo:lo + 8192] @ self._centroids.T).argmax(axis=1)
+        return out
+
+    def _train(self, nlist: Optional[int] = None) -> None:
+        n = len(self._seqs)
+        nlist = nlist or max(16, int(round(math.sqrt(n))))
+        nlist = min(nlist, n)
+        rng = np.random.default_rng(n)
+        sample_size = min(n, nlist * SAMPLE_PER_LIST)
+        sample = np.sort(rng.choice(n, sample_size, replace=False))
+        self._centroids = kmeans(self._matrix.take(sample), nlist, seed=n)
+        rows = np.arange(n)
+        for lo in range(0, n, 8192):
+            block = rows[lo:lo + 8192]
+            self._assign[block] = self._nearest_lists(self._matrix.take(block))
+        self._trained_on = n
+        self._save_lists(range(n))
+        self._set_meta("centroids", self._centroids.tobytes())
+        self._set_meta("trained_on", n)
+
+    def train(self, nlist: Optional[int] = None) -> None:
+        """(Re)cluster the stored vectors into *nlist* lists (default about sqrt(n))."""
+        if np is None:
+            raise RuntimeError("the IVF index needs NumPy; without it search is exact")
+        with self._lock:
+            if self._seqs:
+                self._train(nlist)
+
+    @property
+    def trained(self) -> bool:
+        return self._centroids is not None
+
+    @property
+    def needs_training(self) -> bool:
+        """Big enough for IVF and untrained, or grown ``RETRAIN_GROWTH`` times since training."""
+        n = len(self._seqs)
+        return np is not None and n >= self.min_train and (
+            not self.trained or n >= RETRAIN_GROWTH * self._trained_on
+        )
+
+    def retrain_if_due(self) -> bool:
+        """``train`` if ``needs_training``; True if it did.
+
+        Searches and inserts wait while it runs (see the module docstring).
+        """
+        with self._lock:
+            if not self.needs_training:
+                return False
+            self._train()
+            return True
+
+    # -- public API ---------------------------------------------------------
+
+    def add_many(self, entries: Iterable[HistoryEntry]) -> int:
+        """Index *entries* in one transaction; postings already indexed are skipped.
+
+        New rows join the nearest existing list; they never trigger a
+        retraining (see ``retrain_if_due``).  Returns the number added.
+        """
+        now = dt.datetime.now().isoformat(timespec="seconds")
+        with self._lock:
+            fresh: List[HistoryEntry] = []
+            for entry in entries:
+                if entry.posting_id not in self._ids:
+                    self._ids[entry.posting_id] = -1
+                    fresh.append(entry)
+            if not fresh:
+                return 0
+            lists = [-1] * len(fresh)
+            if self.trained:
+                unit = _normalize_rows(np.asarray([e.vector for e in fresh], dtype=np.float32))
+                lists = [int(x) for x in self._nearest_lists(unit)]
+            try:
+                with self._db:
+                    cursor = self._db.execute("SELECT COALESCE(MAX(seq), 0) FROM postings")
+                    first_seq = cursor.fetchone()[0] + 1
+                    self._db.executemany(
+                        "INSERT INTO postings (seq, posting_id, application_key, role_category, company, "
+                        "title, link, out_of_scope, added_at, list_id, codec, vector) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (first_seq + i, e.posting_id, e.application_key, e.role_category, e.company,
+                             e.title, e.link, int(e.out_of_scope), now, lists[i], self.codec,
+                             encode(e.vector, self.codec))
+                            for i, e in enumerate(fresh)
+                        ],
+                    )
+            except Exception:
+                for entry in fresh:
+                    self._ids.pop(entry.posting_id, None)
+                raise
+            start = len(self._seqs)
+            self._matrix.extend([entry.vector for entry in fresh])
+            for i, entry in enumerate(fresh):
+                self._ids[entry.posting_id] = start + i
+                self._seqs.append(first_seq + i)
+            if np is not None:
+                while len(self._assign) < len(self._seqs):
+                    self._assign = np.concatenate([self._assign, np.full(len(self._assign), -1, np.int32)])
+                self._assign[start:len(self._seqs)] = lists
+        return len(fresh)
+
+    def add(self, posting_id: str, vector: Sequence[float], **fields) -> bool:
+        """Index one posting (see ``HistoryEntry`` for *fields*); False if already indexed."""
+        return self.add_many([HistoryEntry(posting_id, vector, **fields)]) == 1
+
+    def vector(self, posting_id: str) -> Optional[List[float]]:
+        """The stored embedding of *posting_id*, or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT vector, codec FROM postings WHERE posting_id = ?", (posting_id,)
+            ).fetchone()
+        return list(decode(row[0], row[1])) if row else None
+
+    def search(
+        self,
+        vector: Sequence[float],
+        top: int = 20,
+        exact: bool = False,
+        exclude: Optional[str] = None,
+    ) -> List[SimilarPosting]:
+        """The *top* stored postings most similar to *vector*, best first.
+
+        Approximate (IVF, ``nprobe`` lists) once the index is trained, unless
+        *exact*.  *exclude* drops one posting id (the query's own posting).
+        """
+        want = top + (exclude is not None)
+        with self._lock:
+            n = len(self._seqs)
+            if not n:
+                return []
+            if np is None:
+                norm = math.sqrt(sum(float(x) * float(x) for x in vector)) or 1.0
+                sims = self._matrix.dot([float(x) / norm for x in vector])
+                best = sorted(range(n), key=lambda i: -sims[i])[:want]
+                hits = [(self._seqs[i], float(sims[i])) for i in best]
+            else:
+                query = np.asarray(vector, dtype=np.float32)
+                query = query / (np.linalg.norm(query) or 1.0)
+                if self.trained and not exact:
+                    probe = min(self.nprobe, len(self._centroids))
+                    lists = np.argpartition(-(self._centroids @ query), probe - 1)[:probe]
+                    rows = np.flatnonzero(np.isin(self._assign[:n], lists))
+                    sims = self._matrix.dot(query, rows)
+                else:
+                    rows = None
+                    sims = self._matrix.dot(query)
+                k = min(want, len(sims))
+                if not k:
+                    return []
+                best = np.argpartition(-sims, k - 1)[:k]
+                best = best[np.argsort(-sims[best], kind="stable")]
+                picked = best if rows is None else rows[best]
+                hits = [(self._seqs[int(i)], float(sims[j])) for i, j in zip(picked, best)]
+            marks = ", ".join("?" * len(hits))
+            found = {
+                row[0]: row[1:]
+                for row in self._db.execute(
+                    "SELECT seq, posting_id, application_key, role_category, company, title, link, "
+                    f"out_of_scope, added_at FROM postings WHERE seq IN ({marks})",
+                    [seq for seq, _ in hits],
+                )
+            }
+        results = []
+        for seq, score in hits:
+            posting_id, key, role, company, title, link, oos, added = found[seq]
+            if posting_id == exclude:
+                continue
+            results.append(SimilarPosting(posting_id, round(score, 4), key, role, company, title,
+                                          link, bool(oos), added))
+        return results[:top]
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            info: Dict[str, object] = {
+                "postings": len(self._seqs),
+                "model": self.model,
+                "codec": self.codec,
+                "vector_bytes": self._matrix.nbytes,
+                "search": "ivf" if self.trained else "exact",
+                "retrain_due": self.needs_training,
+            }
+            if self.trained:
+                sizes = np.bincount(self._assign[:len(self._seqs)], minlength=len(self._centroids))
+                info.update(
+                    lists=len(self._centroids),
+                    nprobe=self.nprobe,
+                    trained_on=self._trained_on,
+                    largest_list=int(sizes.max()),
+                    empty_lists=int((sizes == 0).sum()),
+                )
+            return info
+
+    def __len__(self) -> int:
+        return len(self._seqs)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+def posting_id(source: str, record_id: str) -> str:
+    """History id of feed record *record_id* read from *source* (an absolute path, or ``-``)."""
+    return record_id if os.path.isabs(record_id) else f"{source}:{record_id}"
+
+
+def model_key(backend: str) -> str:
+    """The ``model`` an index written by *backend* is bound to."""
+    import classify_jd
+    return f"{backend}/{classify_jd.model_name(backend)}"
+
+
+def attach_applications(results: Sequence[SimilarPosting], store) -> None:
+    """Fill ``application`` on *results* from an ``application_store.ApplicationStore``."""
+    rows = store.by_keys([r.application_key for r in results if r.application_key])
+    for r in results:
+        r.application = rows.get(r.application_key)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _print_results(results: Sequence[SimilarPosting], elapsed: float, as_json: bool) -> None:
+    if as_json:
+        print(json.dumps([asdict(r) for r in results], indent=2))
+        return
+    if not results:
+        print("No postings indexed yet.")
+        return
+    for rank, r in enumerate(results, 1):
+        app = r.application or {}
+        status = app.get("status") or ("out of scope" if r.out_of_scope else "-")
+        applied = f" applied {app['date_applied']}" if app.get("date_applied") else ""
+        label = " / ".join(x for x in (r.company, r.title) if x) or r.posting_id
+        print(f"{rank:>3}. {r.score:.3f}  {r.role_category:<28} {status:<10}{applied}  {label}")
+        if r.link:
+            print(f"     {r.link}")
+    print(f"({elapsed * 1000:.1f} ms)", file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import classify_jd
+
+    parser = argparse.ArgumentParser(description="Search the history of classified postings")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"History index (default: {DEFAULT_DB})")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("similar", help="Past postings most similar to a JD")
+    group = p.add_mutually_exclusive_group(required=True)
+    group.add_argument("--text", help="JD text")
+    group.add_argument("--file", help="File containing the JD")
+    group.add_argument("--posting", help="Id of an indexed posting: absolute feed path:record id, "
+                                         "or the .txt file's path")
+    p.add_argument("--top", type=int, default=20, help="Number of postings to show (default: 20)")
+    p.add_argument("--backend", choices=classify_jd.available_backends(), default="sbert",
+                   help="Embedding backend for --text/--file; must match the indexed vectors")
+    p.add_argument("--exact", action="store_true", help="Brute-force search instead of IVF")
+    p.add_argument("--nprobe", type=int, default=8, help="IVF lists scanned per query (default: 8)")
+    p.add_argument("--applications", help="Application store to show outcomes from "
+                                           "(default: the application_store.py default)")
+    sub.add_parser("stats", help="Index size and IVF layout")
+    p = sub.add_parser("train", help="Recluster the IVF lists now")
+    p.add_argument("--lists", type=int, help="Number of lists (default: about sqrt(postings))")
+    args = parser.parse_args(argv)
+
+    if args.db != ":memory:" and not os.path.exists(os.path.expanduser(args.db)):
+        print(f"File not found: {args.db} (pipeline.py creates it)", file=sys.stderr)
+        sys.exit(1)
+    index = HistoryIndex(args.db, nprobe=getattr(args, "nprobe", 8))
+    try:
+        if args.command == "stats":
+            print(json.dumps(index.stats(), indent=None if args.json else 2))
+        elif args.command == "train":
+            t0 = time.perf_counter()
+            index.train(args.lists)
+            print(f"Trained {index.stats().get('lists', 0)} lists over {len(index)} postings "
+                  f"in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+        elif args.command == "similar":
+            _similar(index, args)
+    finally:
+        index.close()
+
+
+def _similar(index: HistoryIndex, args) -> None:
+    if args.posting:
+        vec = index.vector(args.posting)
+        if vec is None:
+            print(f"Posting not in the index: {args.posting}", file=sys.stderr)
+            sys.exit(1)
+    else:
+        if args.file:
+            try:
+                with open(args.file, "r", encoding="utf-8") as f:
+                    text = f.read()
+            except FileNotFoundError:
+                print(f"File not found: {args.file}", file=sys.stderr)
+                sys.exit(1)
+        else:
+            text = args.text
+        import classify_jd
+        model = model_key(args.backend)
+        if index.model is not None and index.model != model:
+            print(f"Error: {args.db} holds {index.model} vectors; use the same --backend", file=sys.stderr)
+            sys.exit(1)
+        vec = classify_jd.get_query_embeddings([text], args.backend)[0]
+
+    t0 = time.perf_counter()
+    results = index.search(vec, top=args.top, exact=args.exact, exclude=args.posting)
+    elapsed = time.perf_counter() - t0
+
+    from application_store import DEFAULT_DB as APPLICATIONS_DB, ApplicationStore
+    path = args.applications or APPLICATIONS_DB
+    if os.path.exists(os.path.expanduser(path)):
+        store = ApplicationStore(path)
+        try:
+            attach_applications(results, store)
+        finally:
+            store.close()
+    _print_results(results, elapsed, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Timing spans and counters for the classifier hot path.
+
+``span(name)`` times a block and ``count(name, n)`` bumps a counter.  Both
+are no-ops until ``enable()`` is called: a disabled ``span`` returns a shared
+null context manager, so instrumented code pays one global check per block.
+
+Collected data can be exported as
+
+* Prometheus text (``prometheus_text``; the daemon serves it at /metrics),
+* JSON lines, one snapshot every few seconds (``JsonLinesExporter``),
+* a Chrome trace (``enable(trace=True)`` then ``write_trace``), viewable in
+  chrome://tracing or https://ui.perfetto.dev.
+
+Pool workers (parallel_classify.py) collect in their own process and hand
+their data back with ``drain``; the parent adds it with ``merge``.
+
+Span names used by classify_jd.py:
+
+    model_load         loading a local model
+    embed              get_embeddings, including slicing to max_batch
+    backend.<name>     one backend embed() call
+    onnx.tokenize      ONNX tokenizer (onnx backend only)
+    onnx.inference     ONNX Runtime session run (counter "tokens": real token count)
+    score              cosine similarity of a batch against the anchors
+    softmax            confidence normalisation
+    classify           one classified batch, end to end
+    output             JSON serialisation and writing of results
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List
+
+# Upper bounds (seconds) of the Prometheus histogram buckets.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Trace events kept in memory; later spans are still aggregated, just not traced.
+MAX_TRACE_EVENTS = 500_000
+
+ENABLED = False
+_TRACING = False
+_LOCK = threading.Lock()
+_T0 = time.perf_counter()
+
+
+class _SpanStats:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)     # last one is +Inf
+
+
+_SPANS: Dict[str, _SpanStats] = {}
+_COUNTERS: Dict[str, float] = {}
+_EVENTS: List[dict] = []
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        _record(self.name, self.start, time.perf_counter())
+        return False
+
+
+def _record(name: str, start: float, end: float) -> None:
+    elapsed = end - start
+    with _LOCK:
+        stats = _SPANS.get(name)
+        if stats is None:
+            stats = _SPANS[name] = _SpanStats()
+        stats.count += 1
+        stats.total += elapsed
+        stats.max = max(stats.max, elapsed)
+        stats.buckets[bisect_left(BUCKETS, elapsed)] += 1
+        if _TRACING and len(_EVENTS) < MAX_TRACE_EVENTS:
+            _EVENTS.append({
+                "name": name,
+                "ph": "X",
+                "ts": round((start - _T0) * 1e6, 3),
+                "dur": round(elapsed * 1e6, 3),
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+            })
+
+
+def span(name: str):
+    """Context manager timing the enclosed block under *name*."""
+    return _Span(name) if ENABLED else _NULL_SPAN
+
+
+def count(name: str, n: float = 1) -> None:
+    if ENABLED:
+        with _LOCK:
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + n
+
+
+def count_texts(texts: Iterable[str]) -> None:
+    """Count embedded texts and their estimated tokens (~4 characters each)."""
+    if ENABLED:
+        texts = list(texts)
+        count("texts_embedded", len(texts))
+        count("tokens_estimated", sum(max(1, len(text) // 4) for text in texts))
+
+
+def enable(trace: bool = False) -> None:
+    global ENABLED, _TRACING
+    ENABLED = True
+    _TRACING = _TRACING or trace
+
+
+def disable() -> None:
+    global ENABLED, _TRACING
+    ENABLED = _TRACING = False
+
+
+def reset() -> None:
+    with _LOCK:
+        _SPANS.clear()
+        _COUNTERS.clear()
+        _EVENTS.clear()
+
+
+def drain() -> dict:
+    """Take everything collected so far (and clear it), for ``merge`` in another process."""
+    with _LOCK:
+        state = {
+            "spans": {name: (s.count, s.total, s.max, list(s.buckets)) for name, s in _SPANS.items()},
+            "counters": dict(_COUNTERS),
+            "events": list(_EVENTS),
+        }
+        _SPANS.clear()
+        _COUNTERS.clear()
+        _EVENTS.clear()
+    return state
+
+
+def merge(state: dict) -> None:
+    """Add a ``drain()`` result from another process to this one's data."""
+    with _LOCK:
+        for name, (n, total, longest, buckets) in state["spans"].items():
+            stats = _SPANS.get(name)
+            if stats is None:
+                stats = _SPANS[name] = _SpanStats()
+            stats.count += n
+            stats.total += total
+            stats.max = max(stats.max, longest)
+            stats.buckets = [a + b for a, b in zip(stats.buckets, buckets)]
+        for name, value in state["counters"].items():
+            _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+        if _TRACING:
+            _EVENTS.extend(state["events"][:max(0, MAX_TRACE_EVENTS - len(_EVENTS))])
+
+
+def clock_origin() -> float:
+    """``perf_counter`` value trace timestamps count from."""
+    return _T0
+
+
+def set_clock_origin(t0: float) -> None:
+    """Count trace timestamps from *t0*, a parent's ``clock_origin()``.
+
+    perf_counter is system-wide on Linux and macOS, so workers given the
+    parent's origin write events on the parent's timeline.
+    """
+    global _T0
+    _T0 = t0
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def snapshot() -> dict:
+    with _LOCK:
+        return {
+            "time": round(time.time(), 3),
+            "spans": {
+                name: {
+                    "count": s.count,
+                    "total_ms": round(s.total * 1000, 3),
+                    "mean_ms": round(s.total / s.count * 1000, 3) if s.count else 0.0,
+                    "max_ms": round(s.max * 1000, 3),
+                }
+                for name, s in sorted(_SPANS.items())
+            },
+            "counters": dict(sorted(_COUNTERS.items())),
+        }
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def prometheus_text(prefix: str = "autoresume") -> str:
+    """Everything collected so far in the Prometheus text exposition format."""
+    lines = []
+    with _LOCK:
+        if _SPANS:
+            metric = f"{prefix}_span_seconds"
+            lines.append(f"# HELP {metric} Time spent in instrumented classifier spans.")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, s in sorted(_SPANS.items()):
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (float("inf"),), s.buckets):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {s.total!r}')
+                lines.append(f'{metric}_count{{span="{name}"}} {s.count}')
+        for name, value in sorted(_COUNTERS.items()):
+            metric = f"{prefix}_{_metric_name(name)}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value!r}" if isinstance(value, float) else f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+
+
+def write_trace(path: str) -> int:
+    """Write the Chrome trace collected since ``enable(trace=True)``; returns the event count."""
+    with _LOCK:
+        events = list(_EVENTS)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+    return len(events)
+
+
+class JsonLinesExporter:
+    """Append a ``snapshot()`` to *path* every *interval* seconds, and once more on ``close``."""
+
+    def __init__(self, path: str, interval: float = 10.0):
+        if not interval > 0:
+            # Event.wait(0) returns at once: the thread would rewrite the file in a busy loop.
+            raise ValueError("interval must be > 0 seconds")
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-jsonl", daemon=True)
+        self._thread.start()
+
+    def _write(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(snapshot()) + "\n")
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._write()
+
+    def close(self) -> None:
+        if not self._stop.is_set():
+            self._stop.set()
+            self._thread.join()
+            self._write()
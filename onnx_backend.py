@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""all-MiniLM-L6-v2 on ONNX Runtime — sentence embeddings without torch.
+
+Importing torch dominates the sbert backend's cold start, yet MiniLM is small
+enough that ONNX Runtime runs it faster on CPU, especially int8-quantized.
+This module holds the inference side (onnxruntime + tokenizers + numpy) and a
+one-off export step that does need the heavy stack.
+
+Model directory layout
+----------------------
+    model.onnx            float32 export
+    model_quantized.onnx  dynamic int8 quantization of the above (optional)
+    tokenizer.json        fast tokenizer
+
+Export (once, needs ``pip install optimum[onnxruntime]``):
+    python3 onnx_backend.py export ~/.cache/autoresume/onnx/all-MiniLM-L6-v2
+
+Inference needs only:
+    pip install onnxruntime tokenizers numpy
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import List, Optional, Sequence
+
+import metrics
+
+HF_MODEL_ID = "sentence-transformers/all-MiniLM-L6-v2"
+MAX_LENGTH = 256          # MiniLM's max_seq_length in sentence-transformers
+FLOAT_MODEL = "model.onnx"
+QUANTIZED_MODEL = "model_quantized.onnx"
+TOKENIZER = "tokenizer.json"
+
+
+def model_path(model_dir: str, quantized: bool = True) -> str:
+    """Path of the ONNX graph to load, preferring the int8 one when asked."""
+    if quantized:
+        path = os.path.join(model_dir, QUANTIZED_MODEL)
+        if os.path.exists(path):
+            return path
+    return os.path.join(model_dir, FLOAT_MODEL)
+
+
+class OnnxEncoder:
+    """Tokenize, run the transformer and mean-pool + L2-normalise, like sbert."""
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = True,
+        max_length: int = MAX_LENGTH,
+        threads: Optional[int] = None,
+    ):
+        try:
+            import numpy as np  # type: ignore
+            import onnxruntime as ort  # type: ignore
+            from tokenizers import Tokenizer  # type: ignore
+        except ImportError as e:
+            raise ImportError(
+                f"the onnx backend needs onnxruntime, tokenizers and numpy ({e.name} missing)"
+            ) from e
+
+        self._np = np
+        self.path = model_path(model_dir, quantized)
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"no ONNX model at {self.path}")
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            self.path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self._input_names = {i.name for i in self.session.get_inputs()}
+        hidden = self.session.get_outputs()[0].shape[-1]
+        self.dim = hidden if isinstance(hidden, int) else 384
+
+    def encode(self, texts: Sequence[str]):
+        """Return a float32 ``(len(texts), dim)`` array of unit-length embeddings."""
+        np = self._np
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        with metrics.span("onnx.tokenize"):
+            encodings = self.tokenizer.encode_batch(list(texts))
+            ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+            mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        if metrics.ENABLED:
+            metrics.count("tokens", int(mask.sum()))
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        with metrics.span("onnx.inference"):
+            hidden = self.session.run(None, feeds)[0]      # (b, seq, dim)
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def export(model_dir: str, model_id: str = HF_MODEL_ID, quantize: bool = True) -> List[str]:
+    """Export *model_id* to ONNX in *model_dir*, plus an int8 copy; return written paths."""
+    try:
+        from optimum.onnxruntime import ORTModelForFeatureExtraction  # type: ignore
+        from onnxruntime.quantization import QuantType, quantize_dynamic  # type: ignore
+        from transformers import AutoTokenizer  # type: ignore
+    except ImportError as e:
+        raise ImportError("export needs: pip install optimum[onnxruntime]") from e
+
+    os.makedirs(model_dir, exist_ok=True)
+    ORTModelForFeatureExtraction.from_pretrained(model_id, export=True).save_pretrained(model_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(model_dir)
+    written = [os.path.join(model_dir, FLOAT_MODEL), os.path.join(model_dir, TOKENIZER)]
+    if quantize:
+        target = os.path.join(model_dir, QUANTIZED_MODEL)
+        quantize_dynamic(written[0], target, weight_type=QuantType.QInt8)
+        written.append(target)
+    return written
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export MiniLM for the onnx backend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("export", help="Export the model (and an int8 copy) to a directory")
+    p.add_argument("model_dir")
+    p.add_argument("--model-id", default=HF_MODEL_ID)
+    p.add_argument("--no-quantize", action="store_true", help="Skip the int8 copy")
+    args = parser.parse_args()
+
+    for path in export(args.model_dir, args.model_id, quantize=not args.no_quantize):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
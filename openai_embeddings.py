@@ -0,0 +1,317 @@
+"""Async, rate-limited client for the OpenAI embeddings endpoint.
+
+Bulk classification sends thousands of JDs at once, which a single
+``embeddings.create`` call cannot carry: requests have an input-size cap and
+the account has per-minute request and token budgets.  This client
+
+* keeps one pool of keep-alive HTTP connections per process,
+* splits the input into chunks bounded by an estimated token count,
+* sends chunks concurrently while staying under a requests-per-minute and a
+  tokens-per-minute budget,
+* retries 429 / 5xx / connection failures with full-jitter exponential
+  backoff (honouring ``Retry-After``), and
+* returns vectors in input order.
+
+It speaks the REST API directly over ``http.client`` rather than through the
+``openai`` package, so ``base_url`` can point at a local stub server in tests.
+
+Usage
+-----
+    embedder = AsyncOpenAIEmbedder(api_key, requests_per_minute=500)
+    vectors = asyncio.run(embedder.embed(texts))
+    # or, from synchronous code:
+    vectors = embedder.embed_sync(texts)      # also safe inside a running loop
+"""
+
+from __future__ import annotations
+
+import asyncio
+import http.client
+import json
+import math
+import queue
+import random
+import threading
+import time
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# The API rejects requests over 2048 inputs or ~300k tokens; stay well below.
+MAX_INPUTS_PER_REQUEST = 2048
+MAX_TOKENS_PER_REQUEST = 100_000
+
+RETRY_STATUSES = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+class OpenAIEmbeddingError(RuntimeError):
+    """The embeddings endpoint returned an error that retrying will not fix."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class _RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate (~4 characters per token for English)."""
+    return max(1, math.ceil(len(text) / 4))
+
+
+def chunk_inputs(
+    texts: Sequence[str],
+    max_tokens: int = MAX_TOKENS_PER_REQUEST,
+    max_inputs: int = MAX_INPUTS_PER_REQUEST,
+) -> List[Tuple[int, List[str], int]]:
+    """Split *texts* into ``(start_index, chunk, estimated_tokens)`` triples.
+
+    A single text larger than *max_tokens* still gets a chunk of its own; the
+    API truncates or rejects it, which is the caller's concern.
+    """
+    chunks: List[Tuple[int, List[str], int]] = []
+    start, current, tokens = 0, [], 0
+    for i, text in enumerate(texts):
+        n = estimate_tokens(text)
+        if current and (tokens + n > max_tokens or len(current) >= max_inputs):
+            chunks.append((start, current, tokens))
+            start, current, tokens = i, [], 0
+        current.append(text)
+        tokens += n
+    if current:
+        chunks.append((start, current, tokens))
+    return chunks
+
+
+class RateLimiter:
+    """Token-bucket limiter for requests/minute and tokens/minute.
+
+    State is guarded by a thread lock and waits use ``asyncio.sleep``, so one
+    limiter can be shared by successive event loops (each ``embed_sync`` call
+    runs its own).
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.rpm = float(requests_per_minute)
+        self.tpm = float(tokens_per_minute)
+        self._requests = self.rpm
+        self._tokens = self.tpm
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._stamp
+        self._stamp = now
+        self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60.0)
+        self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+    def _try_acquire(self, tokens: int) -> float:
+        """Take one request and *tokens* tokens, or return seconds to wait."""
+        # A chunk larger than the whole budget may go once the bucket is full.
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                return 0.0
+            wait_requests = (1 - self._requests) * 60.0 / self.rpm
+            wait_tokens = (tokens - self._tokens) * 60.0 / self.tpm
+            return max(wait_requests, wait_tokens, 0.001)
+
+    async def acquire(self, tokens: int) -> None:
+        while True:
+            wait = self._try_acquire(tokens)
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+class _ConnectionPool:
+    """Fixed-size pool of keep-alive connections to one host."""
+
+    def __init__(self, base_url: str, size: int, timeout: float):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname or ""
+        self.port = parts.port
+        self.path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: bytes, headers: dict) -> Tuple[int, dict, bytes]:
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                conn.request(method, self.path + path, body=body, headers=headers)
+                resp = conn.getresponse()
+                data = resp.read()
+            except Exception:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._idle.put(conn)
+            return resp.status, dict(resp.getheaders()), data
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class AsyncOpenAIEmbedder:
+    """Concurrent, chunked, rate-limited embeddings client.  Thread-safe."""
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "text-embedding-3-small",
+        base_url: str = DEFAULT_BASE_URL,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        max_concurrency: int = 8,
+        max_tokens_per_request: int = MAX_TOKENS_PER_REQUEST,
+        max_inputs_per_request: int = MAX_INPUTS_PER_REQUEST,
+        max_retries: int = 6,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30.0,
+        timeout: float = 60.0,
+        dimensions: Optional[int] = None,
+    ):
+        self.api_key = api_key
+        self.model = model
+        self.dimensions = dimensions
+        self.max_concurrency = max_concurrency
+        self.max_tokens_per_request = max_tokens_per_request
+        self.max_inputs_per_request = max_inputs_per_request
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._pool = _ConnectionPool(base_url, max_concurrency, timeout)
+        self.retries = 0
+
+    # -- one request --------------------------------------------------------
+
+    def _post(self, chunk: List[str]) -> List[List[float]]:
+        """Blocking POST of one chunk; runs in a worker thread."""
+        request = {"model": self.model, "input": chunk}
+        if self.dimensions:
+            request["dimensions"] = self.dimensions
+        body = json.dumps(request).encode("utf-8")
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+        }
+        try:
+            status, resp_headers, data = self._pool.request("POST", "/embeddings", body, headers)
+        except (OSError, http.client.HTTPException) as e:
+            raise _RetryableError(f"connection error: {e}") from e
+
+        if status in RETRY_STATUSES:
+            retry_after = None
+            for name, value in resp_headers.items():
+                if name.lower() == "retry-after":
+                    try:
+                        retry_after = float(value)
+                    except ValueError:
+                        pass
+            raise _RetryableError(f"HTTP {status}", retry_after)
+        if status >= 400:
+            raise OpenAIEmbeddingError(
+                f"embeddings request failed with HTTP {status}: {data[:500].decode('utf-8', 'replace')}",
+                status=status,
+            )
+
+        payload = json.loads(data)
+        ordered = sorted(payload["data"], key=lambda d: d["index"])
+        if len(ordered) != len(chunk):
+            raise OpenAIEmbeddingError(
+                f"expected {len(chunk)} embeddings, got {len(ordered)}", status=status
+            )
+        return [d["embedding"] for d in ordered]
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.backoff_cap)
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+
+    async def _embed_chunk(self, chunk: List[str], tokens: int, gate: asyncio.Semaphore) -> List[List[float]]:
+        async with gate:
+            for attempt in range(self.max_retries + 1):
+                await self.limiter.acquire(tokens)
+                try:
+                    return await asyncio.to_thread(self._post, chunk)
+                except _RetryableError as e:
+                    if attempt == self.max_retries:
+                        raise OpenAIEmbeddingError(
+                            f"embeddings request failed after {attempt + 1} attempts: {e}"
+                        ) from e
+                    self.retries += 1
+                    await asyncio.sleep(self._backoff(attempt, e.retry_after))
+        raise AssertionError("unreachable")
+
+    # -- public API ---------------------------------------------------------
+
+    async def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """Embed *texts*, returning one vector per input in input order."""
+        texts = list(texts)
+        if not texts:
+            return []
+        chunks = chunk_inputs(texts, self.max_tokens_per_request, self.max_inputs_per_request)
+        gate = asyncio.Semaphore(self.max_concurrency)
+        results = await asyncio.gather(
+            *(self._embed_chunk(chunk, tokens, gate) for _, chunk, tokens in chunks)
+        )
+        out: List[List[float]] = [None] * len(texts)  # type: ignore[list-item]
+        for (start, chunk, _), vecs in zip(chunks, results):
+            out[start:start + len(chunk)] = vecs
+        return out
+
+    def embed_sync(self, texts: Sequence[str]) -> List[List[float]]:
+        """Blocking wrapper around :meth:`embed`.
+
+        ``asyncio.run`` refuses to start inside a running loop (the daemon, a
+        notebook), so there the call runs its own loop on a helper thread and
+        blocks the caller until it finishes; async callers should ``await
+        embed`` instead.
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.embed(texts))
+        result: List[List[List[float]]] = []
+        error: List[BaseException] = []
+
+        def run() -> None:
+            try:
+                result.append(asyncio.run(self.embed(texts)))
+            except BaseException as e:      # re-raised in the caller's thread
+                error.append(e)
+
+        worker = threading.Thread(target=run, name="openai-embed-sync")
+        worker.start()
+        worker.join()
+        if error:
+            raise error[0]
+        return result[0]
+
+    def close(self) -> None:
+        self._pool.close()
@@ -0,0 +1,243 @@
+"""Multiprocess classification for large backlogs.
+
+One sbert process leaves most of a many-core box idle when a year of archived
+postings is reprocessed, even with batching.  ``classify_parallel`` shards
+the input into batches across a pool of worker processes:
+
+* each worker loads the model once, in the pool initializer, with its own
+  torch/BLAS thread count (``threads``) so workers do not oversubscribe cores;
+* one worker derives the anchor matrix, which the parent then publishes in a
+  ``multiprocessing.shared_memory`` block; every worker maps that block
+  read-only instead of holding its own copy;
+* batches are submitted with a bounded number in flight and results are
+  yielded in input order, so memory stays flat however long the input is;
+* the parent's OpenAI settings (``--openai-dims``, and the ``--openai-rpm``/
+  ``--openai-tpm`` budget split evenly between workers) and its metrics
+  state reach the workers, whose spans and counters come back with each
+  batch and are merged into the parent's.
+
+``classify_jd.py --batch ... --workers N --worker-threads T`` uses this;
+``bench_classify.py --scaling 1,2,4,8`` measures throughput per worker count.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Deque, Iterable, Iterator, List, Optional, Tuple
+
+import classify_jd
+import metrics
+from classify_jd import CHUNK_OVERLAP, CHUNK_WORDS, ClassificationResult, RoleSpec
+
+# Batches queued per worker beyond the one it is running.
+IN_FLIGHT_PER_WORKER = 2
+
+# Per-process state of a pool worker.
+_WORKER: dict = {}
+
+
+class SharedMatrix:
+    """A NumPy array copied into a named shared-memory block (owned by the parent)."""
+
+    def __init__(self, array):
+        np = classify_jd.np
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        view = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        view[...] = array
+        del view
+        self.spec = (self._shm.name, array.shape, array.dtype.str)
+
+    def close(self) -> None:
+        self._shm.close()
+        self._shm.unlink()
+
+
+def _resident_matrix(backend: str, scoring: str):
+    key = tuple(classify_jd.role_fingerprint(role, backend) for role in classify_jd.ROLES)
+    if scoring == "joined":
+        return classify_jd._ANCHOR_MATRICES.get(key)
+    entry = classify_jd._FACET_MATRICES.get(key)
+    return entry[0] if entry is not None else None
+
+
+def _limit_threads(threads: Optional[int]) -> None:
+    if not threads:
+        return
+    # Read by OpenMP/MKL/OpenBLAS when they initialise, i.e. before the model loads.
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+
+def _worker_settings(workers: int) -> dict:
+    """Process-wide settings of the parent that a spawned worker would not inherit."""
+    limits = dict(classify_jd.OPENAI_LIMITS)
+    # One budget for the API key, shared by all workers.
+    for name in ("requests_per_minute", "tokens_per_minute"):
+        limits[name] = limits[name] / workers
+    limits["max_concurrency"] = max(1, int(limits["max_concurrency"]) // workers)
+    return {
+        "openai_limits": limits,
+        "openai_dimensions": classify_jd.OPENAI_DIMENSIONS or classify_jd.OPENAI_DIM,
+        "metrics": metrics.ENABLED,
+        "trace": metrics._TRACING,
+        "clock_origin": metrics.clock_origin(),
+    }
+
+
+def _init_worker(
+    impl: classify_jd.EmbeddingBackend,
+    roles: List[RoleSpec],
+    threads: Optional[int],
+    cache_db: Optional[str],
+    codec: str,
+    calibration: Optional[classify_jd.Calibration],
+    settings: dict,
+) -> None:
+    _limit_threads(threads)
+    if settings["metrics"]:
+        metrics.set_clock_origin(settings["clock_origin"])
+        metrics.enable(trace=settings["trace"])
+    classify_jd.configure_openai(dimensions=settings["openai_dimensions"], **settings["openai_limits"])
+    backend = impl.name
+    if backend not in classify_jd.available_backends():
+        classify_jd.register_backend(impl)      # registered at runtime in the parent
+    if cache_db:
+        classify_jd.configure_jd_cache(db_path=cache_db, codec=codec)
+    classify_jd.set_roles(roles)
+    classify_jd.set_calibration(calibration)
+    classify_jd.get_backend(backend).load()
+    torch = sys.modules.get("torch")
+    if threads and torch is not None:
+        torch.set_num_threads(threads)
+    _WORKER.update(backend=backend, shm=None, shm_name=None)
+
+
+def _anchor_task(scoring: str):
+    """Derive (or load) the anchors once; return the normalised matrix to share."""
+    backend = _WORKER["backend"]
+    classify_jd._prepare_anchors(backend, classify_jd.ROLES, scoring)
+    if classify_jd.np is None:
+        return None
+    if scoring == "joined":
+        return classify_jd.np.asarray(classify_jd.anchor_matrix(backend))
+    return classify_jd.facet_matrix(backend)[0]
+
+
+def _attach(spec: Optional[Tuple[str, tuple, str]], scoring: str) -> None:
+    if spec is None or spec[0] == _WORKER["shm_name"]:
+        return
+    np = classify_jd.np
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    matrix = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+    matrix.flags.writeable = False
+    if scoring == "joined":
+        classify_jd.set_roles(classify_jd.ROLES, _WORKER["backend"], vectors=matrix)
+    else:
+        classify_jd.set_roles(classify_jd.ROLES, _WORKER["backend"], facet_vectors=matrix)
+    _WORKER.update(shm=shm, shm_name=name)     # keep the mapping alive
+
+
+def _classify_task(
+    texts: List[str],
+    spec: Optional[Tuple[str, tuple, str]],
+    pooling: str,
+    chunk_words: int,
+    chunk_overlap: int,
+    scoring: str,
+    with_vectors: bool,
+) -> Tuple[List[ClassificationResult], Optional[List[List[float]]], Optional[dict]]:
+    _attach(spec, scoring)
+    backend = _WORKER["backend"]
+    results = list(classify_jd.classify_many(
+        texts,
+        backend=backend,
+        batch_size=len(texts),
+        pooling=pooling,
+        chunk_words=chunk_words,
+        chunk_overlap=chunk_overlap,
+        scoring=scoring,
+    ))
+    vectors = None
+    if with_vectors:
+        # Cache hits: classify_many just embedded these texts (or their chunks).
+        vectors = classify_jd.jd_vectors(texts, backend, pooling, chunk_words, chunk_overlap)
+    return results, vectors, metrics.drain() if metrics.ENABLED else None
+
+
+def classify_parallel(
+    texts: Iterable[str],
+    backend: str = "sbert",
+    workers: Optional[int] = None,
+    threads: Optional[int] = None,
+    batch_size: int = 32,
+    pooling: str = "none",
+    chunk_words: int = CHUNK_WORDS,
+    chunk_overlap: int = CHUNK_OVERLAP,
+    scoring: str = "joined",
+    cache_db: Optional[str] = None,
+    with_vectors: bool = False,
+) -> Iterator[Tuple[ClassificationResult, Optional[List[float]]]]:
+    """Classify *texts* across *workers* processes; yields ``(result, vector)`` in input order.
+
+    *vector* is the JD's ``classify_jd.jd_vectors`` vector when
+    *with_vectors* is set, else ``None``.
+    Backends registered at runtime are sent to the workers, so they must be
+    picklable.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be >= 1")
+    classify_jd._check_pooling(pooling)
+    classify_jd._parse_scoring(scoring)
+    workers = workers or os.cpu_count() or 1
+
+    resident = _resident_matrix(backend, scoring)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            classify_jd.get_backend(backend),
+            list(classify_jd.ROLES),
+            threads,
+            cache_db,
+            classify_jd._JD_CACHE.codec,
+            classify_jd._CALIBRATION,
+            _worker_settings(workers),
+        ),
+    )
+    shared = None
+    try:
+        # Anchors this process already holds (e.g. a compiled role catalogue) are
+        # shared as they are; otherwise one worker derives them.
+        matrix = resident if resident is not None else pool.submit(_anchor_task, scoring).result()
+        if matrix is not None:
+            shared = SharedMatrix(matrix)
+        spec = shared.spec if shared is not None else None
+
+        it = iter(texts)
+        inflight: Deque[Future] = deque()
+        limit = workers * (1 + IN_FLIGHT_PER_WORKER)
+        while True:
+            batch = list(itertools.islice(it, batch_size))
+            if batch:
+                inflight.append(pool.submit(
+                    _classify_task, batch, spec, pooling, chunk_words, chunk_overlap, scoring, with_vectors,
+                ))
+            if inflight and (not batch or len(inflight) >= limit):
+                results, vectors, collected = inflight.popleft().result()
+                if collected is not None:
+                    metrics.merge(collected)
+                yield from zip(results, vectors or itertools.repeat(None))
+            if not batch and not inflight:
+                return
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+        if shared is not None:
+            shared.close()
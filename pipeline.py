@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Streaming pipeline: classify new postings, pick a resume, log to the tracker.
+
+Replaces the manual step of copying ``classify_jd.py`` output into
+``Applications.csv``.  Postings are read from a JSONL feed or a directory of
+``.txt`` files, classified in batches with ``classify_many``, given the
+resume of the ``ResumeVariants.csv`` row whose "Target roles" (or variant
+name) include their role category, and appended to the SQLite application
+store as "To Apply".  Roles no variant targets are warned about and keep
+their built-in resume.
+
+Every committed batch also checkpoints the feed record ids in the same
+transaction, so an interrupted run resumes where it stopped: already-logged
+records are skipped before anything is embedded, and at most one batch is
+redone.  Postings that are already tracked (same link, or same company and
+role title) keep their existing row and status.  Postings a calibrated role
+catalogue (``--roles``) rejects as out of scope are checkpointed but not
+logged; ``--anchor-scoring`` defaults to the mode the catalogue was
+calibrated for, so its thresholds apply.
+
+Every classified posting's embedding is also added to the history index
+(history_index.py, ``--history-db``), linked to its tracker row, so
+``history_index.py similar`` can show how comparable postings turned out.
+Out-of-scope postings are added too, flagged, so that outcome shows as well.
+
+JSONL records need ``text``; ``id``, ``company``, ``title`` (or
+``role_title``) and ``link`` (or ``url``) are used when present.
+
+Usage
+-----
+    python3 pipeline.py feed.jsonl
+    python3 pipeline.py postings/ --resumes data/ResumeVariants.csv
+    python3 pipeline.py feed.jsonl --db applications.sqlite --output results.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import datetime as dt
+import json
+import os
+import sys
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Deque, Dict, Iterator, List, Optional
+
+import classify_jd
+import history_index
+from application_store import DEFAULT_DB, ApplicationStore, row_key
+
+DEFAULT_RESUMES = os.path.join("data", "ResumeVariants.csv")
+NEW_STATUS = "To Apply"
+
+
+@dataclass
+class Posting:
+    record_id: str
+    text: str
+    company: str = ""
+    role_title: str = ""
+    link: str = ""
+
+
+@dataclass
+class ResumeVariant:
+    name: str
+    file: str
+    role_category: str
+
+
+@dataclass
+class PipelineStats:
+    logged: int = 0              # new rows in the store
+    tracked: int = 0             # classified, but already in the store
+    skipped: int = 0             # checkpointed by an earlier run
+    out_of_scope: int = 0        # rejected by the calibration, not logged
+    seconds: float = 0.0
+
+
+def _first(row: Dict[str, str], *names: str) -> str:
+    for name in names:
+        value = (row.get(name) or "").strip()
+        if value:
+            return value
+    return ""
+
+
+def load_resume_variants(path: str) -> Dict[str, ResumeVariant]:
+    """``{role label (lower case): variant}`` from ResumeVariants.csv.
+
+    A row serves every role in its semicolon-separated "Target roles" column
+    (or "Role Category", if the file has one) and the role named like the
+    variant itself.  The first row per label wins.
+    """
+    variants: Dict[str, ResumeVariant] = {}
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            file = _first(row, "File")
+            if not file:
+                continue
+            name = _first(row, "Variant name", "Variant", "Resume variant") or os.path.splitext(file)[0]
+            labels = _first(row, "Target roles", "Role Category", "Role category").split(";") + [name]
+            for label in labels:
+                label = label.strip()
+                if label and label.lower() not in variants:
+                    variants[label.lower()] = ResumeVariant(name, file, label)
+    return variants
+
+
+def roles_without_variant(variants: Dict[str, ResumeVariant]) -> List[str]:
+    """Roles in ``ROLES`` that no variant targets (they get ``RoleSpec.resume``)."""
+    return [role.name for role in classify_jd.ROLES if role.name.lower() not in variants]
+
+
+def resume_for(role_category: str, variants: Dict[str, ResumeVariant]) -> ResumeVariant:
+    """The CSV variant targeting a role, falling back to ``RoleSpec.resume``."""
+    variant = variants.get(role_category.lower())
+    if variant is not None:
+        return variant
+    for role in classify_jd.ROLES:
+        if role.name == role_category:
+            return ResumeVariant(os.path.splitext(role.resume)[0], role.resume, role_category)
+    return ResumeVariant("", "", role_category)
+
+
+def iter_postings(spec: str) -> Iterator[Posting]:
+    """Postings from a JSONL feed (with metadata) or any ``iter_batch_inputs`` spec."""
+    if spec != "-" and not spec.endswith(".jsonl"):
+        for path, text in classify_jd.iter_batch_inputs(spec):
+            yield Posting(os.path.abspath(path), text)
+        return
+
+    f = sys.stdin if spec == "-" else open(spec, "r", encoding="utf-8")
+    try:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            link = str(record.get("link") or record.get("url") or "")
+            yield Posting(
+                record_id=str(record.get("id") or link or lineno),
+                text=record["text"],
+                company=str(record.get("company") or ""),
+                role_title=str(record.get("title") or record.get("role_title") or ""),
+                link=link,
+            )
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def source_name(spec: str) -> str:
+    """Checkpoint key for a feed: its absolute path (``-`` for stdin)."""
+    return spec if spec == "-" else os.path.abspath(spec)
+
+
+def _store_row(posting: Posting, source: str, result, variant: ResumeVariant, today: str) -> Dict[str, str]:
+    notes = f"auto-classified ({result.confidence:.0%} confidence)"
+    row = {
+        "company": posting.company,
+        "role_title": posting.role_title,
+        "link": posting.link,
+        "date_found": today,
+        "status": NEW_STATUS,
+        "resume_variant": variant.name,
+        "role_category": result.role_category,
+        "notes": notes,
+    }
+    if not posting.link and not posting.company:
+        # Nothing else identifies the posting: key the row by where it came from
+        # (row_key), and say so in the notes rather than in the link column.
+        row["source_id"] = history_index.posting_id(source, posting.record_id)
+        row["notes"] = f"{notes}; from {row['source_id']}"
+    return row
+
+
+def run_pipeline(
+    spec: str,
+    store: ApplicationStore,
+    variants: Dict[str, ResumeVariant],
+    backend: str = "sbert",
+    batch_size: int = 32,
+    pooling: str = "none",
+    out=None,
+    history: Optional[history_index.HistoryIndex] = None,
+    scoring: str = "joined",
+) -> PipelineStats:
+    """Classify the unprocessed postings in *spec* and log them to *store*.
+
+    Rows and checkpoints are committed together every *batch_size* postings.
+    With *out*, one JSON line per classified posting is written as well.
+    With *history*, each batch's embeddings are added to it just before the
+    batch is committed (``classify_jd.jd_vectors``: embedding cache hits
+    whatever the pooling), and its IVF lists are retrained at the end if
+    they are due.
+    """
+    source = source_name(spec)
+    done = store.processed_ids(source)
+    stats = PipelineStats()
+    pending: Deque[Posting] = deque()
+    today = dt.date.today().isoformat()
+
+    def texts() -> Iterator[str]:
+        seen = set()
+        for posting in iter_postings(spec):
+            if posting.record_id in done or posting.record_id in seen:
+                stats.skipped += 1
+                continue
+            seen.add(posting.record_id)
+            pending.append(posting)
+            yield posting.text
+
+    rows: List[Dict[str, str]] = []
+    ids: List[str] = []
+    entries: List[history_index.HistoryEntry] = []
+
+    def remember(posting: Posting, result, row: Optional[Dict[str, str]]) -> None:
+        if history is not None:
+            entries.append(history_index.HistoryEntry(
+                posting_id=history_index.posting_id(source, posting.record_id),
+                vector=classify_jd.jd_vectors([posting.text], backend, pooling)[0],
+                application_key=row_key(row) if row else "",
+                role_category=result.role_category,
+                company=posting.company,
+                title=posting.role_title,
+                link=posting.link,
+                out_of_scope=result.out_of_scope,
+            ))
+
+    def commit() -> None:
+        if entries:
+            # Before the checkpoint: a re-run skips checkpointed records, and re-adding is a no-op.
+            history.add_many(entries)
+            entries.clear()
+        if ids:
+            inserted = store.log_new(rows, source, ids)
+            stats.logged += inserted
+            stats.tracked += len(rows) - inserted
+            rows.clear()
+            ids.clear()
+
+    t0 = time.perf_counter()
+    results = classify_jd.classify_many(
+        texts(), backend=backend, batch_size=batch_size, pooling=pooling, scoring=scoring
+    )
+    for result in results:
+        posting = pending.popleft()
+        if result.out_of_scope:
+            stats.out_of_scope += 1
+            ids.append(posting.record_id)
+            remember(posting, result, None)
+            if out is not None:
+                out.write(json.dumps({"id": posting.record_id, **classify_jd._result_payload(result)}) + "\n")
+            if len(ids) >= batch_size:
+                commit()
+            continue
+        variant = resume_for(result.role_category, variants)
+        row = _store_row(posting, source, result, variant, today)
+        rows.append(row)
+        ids.append(posting.record_id)
+        remember(posting, result, row)
+        if out is not None:
+            payload = {"id": posting.record_id, **classify_jd._result_payload(result)}
+            payload.update(resume=variant.file, resume_variant=variant.name)
+            out.write(json.dumps(payload) + "\n")
+        if len(ids) >= batch_size:
+            commit()
+    commit()
+    if history is not None:
+        # After the last commit, so the retraining pause holds up no batch.
+        history.retrain_if_due()
+    stats.seconds = time.perf_counter() - t0
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Classify new postings and log them to the application store")
+    parser.add_argument("feed", help="JSONL feed ('-' for stdin), directory of .txt files, or glob")
+    parser.add_argument("--db", default=DEFAULT_DB, help=f"Application store (default: {DEFAULT_DB})")
+    parser.add_argument(
+        "--resumes",
+        default=DEFAULT_RESUMES,
+        help=f"ResumeVariants.csv to pick resumes from (default: {DEFAULT_RESUMES}; "
+             "the built-in role resumes are used when it is missing)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=classify_jd.available_backends(),
+        default="sbert",
+        help="Embedding backend (same as classify_jd.py)",
+    )
+    parser.add_argument("--batch-size", type=int, default=32, help="Postings per batch and commit (default: 32)")
+    parser.add_argument("--pooling", choices=classify_jd.POOLING_MODES, default="none",
+                        help="Long-JD handling (same as classify_jd.py)")
+    parser.add_argument("--roles", default=os.environ.get("AUTORESUME_ROLES"),
+                        help="Role catalogue or compiled artifact (same as classify_jd.py); a "
+                             "calibrated artifact drops out-of-scope postings")
+    parser.add_argument("--anchor-scoring", metavar="MODE",
+                        help="How each role's anchors are scored (same as classify_jd.py; default: "
+                             "the mode --roles was calibrated for, else joined)")
+    parser.add_argument("--output", help="Also write one JSON line per classified posting here")
+    parser.add_argument("--history-db", default=history_index.DEFAULT_DB,
+                        help="History index the postings' embeddings are added to, for "
+                             f"'history_index.py similar' (default: {history_index.DEFAULT_DB})")
+    parser.add_argument("--no-history", action="store_true", help="Do not add postings to the history index")
+    args = parser.parse_args(argv)
+
+    if args.roles:
+        import role_catalogue
+        try:
+            role_catalogue.activate(args.roles, args.backend)
+        except FileNotFoundError:
+            print(f"File not found: {args.roles}", file=sys.stderr)
+            sys.exit(1)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+    calibration = classify_jd._CALIBRATION
+    scoring = args.anchor_scoring or (calibration.scoring if calibration is not None else "joined")
+    try:
+        classify_jd._parse_scoring(scoring)
+    except ValueError as e:
+        parser.error(str(e))
+    if calibration is not None and calibration.scoring != scoring:
+        print(
+            f"Warning: {args.roles} is calibrated for --anchor-scoring {calibration.scoring}; "
+            "using the default temperature and no out-of-scope thresholds",
+            file=sys.stderr,
+        )
+
+    try:
+        variants = load_resume_variants(args.resumes)
+    except FileNotFoundError:
+        print(f"Warning: {args.resumes} not found; using built-in role resumes", file=sys.stderr)
+        variants = {}
+    else:
+        for role in roles_without_variant(variants):
+            print(f"Warning: no variant in {args.resumes} targets {role!r}; using its built-in resume",
+                  file=sys.stderr)
+
+    history = None
+    if not args.no_history:
+        try:
+            history = history_index.HistoryIndex(args.history_db, model=history_index.model_key(args.backend))
+        except ValueError as e:
+            print(f"Error: {e} (pass another --history-db or --no-history)", file=sys.stderr)
+            sys.exit(1)
+    try:
+        store = ApplicationStore(args.db)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    out = open(args.output, "w", encoding="utf-8") if args.output else None
+    try:
+        stats = run_pipeline(args.feed, store, variants, args.backend, args.batch_size, args.pooling, out, history,
+                             scoring)
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        if out is not None:
+            out.close()
+        store.close()
+        if history is not None:
+            history.close()
+
+    print(
+        f"Logged {stats.logged} new postings ({stats.tracked} already tracked, "
+        f"{stats.skipped} already processed, {stats.out_of_scope} out of scope) in {stats.seconds:.2f}s",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Semantic retrieval over QuestionBank.csv.
+
+The CSV routes form questions through semicolon-separated ``Keyword
+triggers``, so "Will you now or in the future need us to sponsor you?" misses
+the "Work authorization" row entirely.  This module embeds each question type
+(with its triggers) and each of its answers using the classifier's backends,
+and answers an incoming question by cosine similarity; a trigger that does
+appear in the question still adds a small bonus.
+
+Vectors are persisted in the same fingerprint-keyed store as the role
+anchors (``questions-<backend>-<model>.*`` under the cache dir).  Every
+embedded text is fingerprinted on its own, so editing one answer in the CSV
+re-embeds that answer alone.
+
+Usage
+-----
+    python3 question_bank.py --bank QuestionBank.csv --question "Do you need a visa?"
+    python3 question_bank.py --bank QuestionBank.csv --question "..." --length long
+    python3 question_bank.py --bank QuestionBank.csv --question "..." --top 3 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import re
+import sys
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import classify_jd
+
+LENGTHS = ("short", "medium", "long")
+
+# Answers describe a question type less directly than its name and triggers.
+ANSWER_WEIGHT = 0.85
+KEYWORD_BONUS = 0.1
+
+
+@dataclass
+class QuestionEntry:
+    question_type: str
+    triggers: List[str]
+    answers: Dict[str, str]            # {"short"|"medium"|"long": text}
+    last_updated: str = ""
+
+    def query_text(self) -> str:
+        """What gets embedded for the question type itself."""
+        if not self.triggers:
+            return self.question_type
+        return f"{self.question_type}: {', '.join(self.triggers)}"
+
+
+@dataclass
+class QuestionMatch:
+    question_type: str
+    length: str
+    answer: str
+    score: float
+    matched: str                       # "question" or "answer:<length>"
+    keyword_hit: bool = False
+
+
+@dataclass
+class _Unit:
+    entry: int                         # index into QuestionBank.entries
+    field: str                         # "question" or "answer:<length>"
+    text: str
+    fingerprint: str = ""
+
+
+def load_csv(path: str) -> List[QuestionEntry]:
+    entries = []
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            qtype = (row.get("Question type") or "").strip()
+            if not qtype:
+                continue
+            triggers = [t.strip() for t in (row.get("Keyword triggers") or "").split(";") if t.strip()]
+            answers = {
+                length: (row.get(f"{length.capitalize()} answer") or "").strip()
+                for length in LENGTHS
+            }
+            entries.append(QuestionEntry(qtype, triggers, answers, (row.get("Last updated") or "").strip()))
+    return entries
+
+
+def text_fingerprint(text: str, backend: str, model: str) -> str:
+    h = hashlib.sha256()
+    for part in ("question-bank-v1", backend, model, text):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class QuestionBank:
+    """Embedded question types and answers, searchable by cosine similarity."""
+
+    def __init__(self, entries: List[QuestionEntry], backend: str = "sbert", cache_dir: Optional[str] = None):
+        self.entries = entries
+        self.backend = backend
+        self.cache_dir = cache_dir
+        self.embedded = 0                  # texts embedded by the last build()
+        self._units: List[_Unit] = []
+        self._matrix = None                # row-normalised (n_units, d) when NumPy is present
+        self._vectors: List[Sequence[float]] = []
+        self._trigger_patterns = [
+            [re.compile(rf"\b{re.escape(t.lower())}\b") for t in entry.triggers]
+            for entry in entries
+        ]
+        self.build()
+
+    @classmethod
+    def from_csv(cls, path: str, backend: str = "sbert", cache_dir: Optional[str] = None) -> "QuestionBank":
+        return cls(load_csv(path), backend=backend, cache_dir=cache_dir)
+
+    def build(self) -> None:
+        """Embed whatever is not already in the on-disk store, then load the matrix."""
+        model = classify_jd.model_name(self.backend)
+        units = []
+        for i, entry in enumerate(self.entries):
+            units.append(_Unit(i, "question", entry.query_text()))
+            for length in LENGTHS:
+                if entry.answers.get(length):
+                    units.append(_Unit(i, f"answer:{length}", entry.answers[length]))
+        for unit in units:
+            unit.fingerprint = text_fingerprint(unit.text, self.backend, model)
+
+        store = classify_jd.AnchorStore(self.backend, model, cache_dir=self.cache_dir, kind="questions")
+        vectors = store.load()
+        todo = list({u.fingerprint: u.text for u in units if u.fingerprint not in vectors}.items())
+        self.embedded = len(todo)
+        if todo:
+            fresh = classify_jd.get_embeddings([text for _, text in todo], self.backend)
+            vectors = dict(vectors)
+            for (fp, _), vec in zip(todo, fresh):
+                vectors[fp] = vec
+            try:
+                # Only current texts are kept, so deleted rows drop out of the store.
+                store.save({u.fingerprint: vectors[u.fingerprint] for u in units})
+            except OSError as e:
+                print(f"Warning: could not write question index: {e}", file=sys.stderr)
+
+        self._units = units
+        self._vectors = [vectors[u.fingerprint] for u in units]
+        np = classify_jd.np
+        if np is not None and units:
+            self._matrix = classify_jd._normalize_rows(np.asarray(self._vectors, dtype=np.float64))
+        else:
+            self._matrix = None
+
+    def _similarities(self, question: str) -> List[float]:
+        qvec = classify_jd.get_query_embeddings([question], self.backend)
+        if self._matrix is not None:
+            return classify_jd.cosine_matrix(qvec, self._matrix)[0].tolist()
+        q = list(qvec[0])
+        return [classify_jd.cosine_similarity(q, list(v)) for v in self._vectors]
+
+    def match(self, question: str, length: str = "short", top: int = 1) -> List[QuestionMatch]:
+        """Best *top* question types for *question*, each with its *length* answer."""
+        if length not in LENGTHS:
+            raise ValueError(f"length must be one of {', '.join(LENGTHS)}")
+        if not self._units:
+            return []
+        sims = self._similarities(question)
+        lowered = question.lower()
+
+        best: Dict[int, Tuple[float, str]] = {}
+        for unit, sim in zip(self._units, sims):
+            score = sim if unit.field == "question" else ANSWER_WEIGHT * sim
+            if unit.entry not in best or score > best[unit.entry][0]:
+                best[unit.entry] = (score, unit.field)
+
+        matches = []
+        for i, (score, matched) in best.items():
+            entry = self.entries[i]
+            hit = any(p.search(lowered) for p in self._trigger_patterns[i])
+            matches.append(QuestionMatch(
+                question_type=entry.question_type,
+                length=length,
+                answer=_answer_of_length(entry, length),
+                score=round(score + (KEYWORD_BONUS if hit else 0.0), 4),
+                matched=matched,
+                keyword_hit=hit,
+            ))
+        matches.sort(key=lambda m: m.score, reverse=True)
+        return matches[:top]
+
+    def answer(self, question: str, length: str = "short") -> Optional[QuestionMatch]:
+        matches = self.match(question, length, top=1)
+        return matches[0] if matches else None
+
+
+def _answer_of_length(entry: QuestionEntry, length: str) -> str:
+    """The requested answer, falling back to the nearest non-empty length."""
+    order = sorted(LENGTHS, key=lambda other: abs(LENGTHS.index(other) - LENGTHS.index(length)))
+    for candidate in order:
+        if entry.answers.get(candidate):
+            return entry.answers[candidate]
+    return ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Answer application-form questions from QuestionBank.csv")
+    parser.add_argument("--bank", default="QuestionBank.csv", help="QuestionBank CSV (default: QuestionBank.csv)")
+    parser.add_argument("--question", required=True, help="The form question")
+    parser.add_argument("--length", choices=LENGTHS, default="short", help="Answer length (default: short)")
+    parser.add_argument("--top", type=int, default=1, help="Show the best N question types")
+    parser.add_argument(
+        "--backend",
+        choices=classify_jd.available_backends(),
+        default="sbert",
+        help="Embedding backend (same as classify_jd.py)",
+    )
+    parser.add_argument("--json", action="store_true", help="Output JSON")
+    args = parser.parse_args()
+
+    try:
+        bank = QuestionBank.from_csv(args.bank, backend=args.backend)
+    except FileNotFoundError:
+        print(f"File not found: {args.bank}", file=sys.stderr)
+        sys.exit(1)
+    matches = bank.match(args.question, args.length, top=args.top)
+
+    if args.json:
+        print(json.dumps([asdict(m) for m in matches], indent=2))
+        return
+    for m in matches:
+        print(f"{m.question_type}  (score {m.score:.3f}{', keyword' if m.keyword_hit else ''})")
+        print(f"  {m.answer}")
+
+
+if __name__ == "__main__":
+    main()
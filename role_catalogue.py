@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""Role catalogue: roles defined in JSON/YAML, compiled to an mmap-able artifact.
+
+A catalogue lists the role categories with any number of anchors each (the
+first is the main description, the rest are secondary context):
+
+    {"roles": [
+        {"name": "Risk", "resume": "Risk_Resume.pdf",
+         "anchors": ["This role focuses on financial risk management ...",
+                     "Market risk analyst, VaR, stress testing ..."]}
+    ]}
+
+``compile`` embeds the catalogue once and writes a single artifact holding
+the role metadata, the row-normalised float32 anchor matrix and the model
+provenance.  ``classify_jd.py --roles FILE.anchors`` memory-maps it, so
+startup stays a page-in however many roles there are; passing the JSON/YAML
+catalogue itself also works, with anchors derived through the usual store.
+
+Artifact layout (little-endian):
+    8 bytes   magic  b"ARROLES1"
+    8 bytes   header length
+    header    UTF-8 JSON: version, backend, model, dim, roles, fingerprints,
+              optional calibration (see calibration.py), ...
+    padding   to a 64-byte boundary
+    data      float32 (n_roles, dim), row-major, rows L2-normalised
+              (never compacted; see docs/COMPACT_VECTORS.md, "Anchors")
+
+Usage
+-----
+    python3 role_catalogue.py export roles.json              # dump the built-in ROLES
+    python3 role_catalogue.py compile roles.json -o roles.anchors --backend sbert
+    python3 role_catalogue.py calibrate roles.anchors --history labelled.jsonl
+    python3 role_catalogue.py show roles.anchors
+    python3 classify_jd.py --roles roles.anchors --text "..."
+"""
+
+from __future__ import annotations
+
+import argparse
+import datetime as dt
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import List, Optional, Sequence, Tuple
+
+import classify_jd
+from classify_jd import RoleSpec
+from startup import lazy_import
+
+MAGIC = b"ARROLES1"
+ARTIFACT_VERSION = 1
+_ALIGN = 64
+
+
+@dataclass
+class CompiledCatalogue:
+    roles: List[RoleSpec]
+    backend: str
+    model: str
+    dim: int
+    vectors: Sequence[Sequence[float]]     # (n_roles, dim) memmap, or lists without NumPy
+    header: dict
+
+
+# ---------------------------------------------------------------------------
+# Catalogue (source) files
+# ---------------------------------------------------------------------------
+
+def _role_from_dict(entry: dict) -> RoleSpec:
+    anchors = list(entry.get("anchors") or [])
+    if entry.get("anchor"):
+        anchors = [entry["anchor"]] + list(entry.get("secondary_anchors") or []) + anchors
+    if not entry.get("name") or not anchors:
+        raise ValueError(f"role needs a name and at least one anchor: {entry!r}")
+    return RoleSpec(
+        name=str(entry["name"]),
+        resume=str(entry.get("resume") or ""),
+        anchor=str(anchors[0]),
+        secondary_anchors=[str(a) for a in anchors[1:]],
+    )
+
+
+def _read_catalogue(path: str) -> dict:
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    if path.endswith((".yaml", ".yml")):
+        yaml = lazy_import("yaml")
+        if yaml is None:
+            print("YAML catalogues need PyYAML: pip install pyyaml", file=sys.stderr)
+            sys.exit(1)
+        data = yaml.safe_load(text)
+    else:
+        data = json.loads(text)
+    if isinstance(data, list):
+        data = {"roles": data}
+    return data
+
+
+def load_catalogue(path: str) -> List[RoleSpec]:
+    """Roles from a JSON or YAML catalogue file."""
+    roles = [_role_from_dict(entry) for entry in _read_catalogue(path).get("roles", [])]
+    if not roles:
+        raise ValueError(f"{path}: catalogue defines no roles")
+    names = [role.name for role in roles]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path}: duplicate role names")
+    return roles
+
+
+def catalogue_dict(roles: Sequence[RoleSpec]) -> dict:
+    return {
+        "roles": [
+            {"name": role.name, "resume": role.resume, "anchors": [role.anchor, *role.secondary_anchors]}
+            for role in roles
+        ]
+    }
+
+
+# ---------------------------------------------------------------------------
+# Compiled artifact
+# ---------------------------------------------------------------------------
+
+def _unit_rows(vectors) -> List[List[float]]:
+    rows = []
+    for vec in vectors:
+        vec = [float(x) for x in vec]
+        norm = math.sqrt(sum(x * x for x in vec))
+        rows.append([x / norm for x in vec] if norm else vec)
+    return rows
+
+
+def compile_catalogue(
+    roles: Sequence[RoleSpec],
+    backend: str,
+    path: str,
+    source: Optional[str] = None,
+) -> dict:
+    """Embed *roles* with *backend* and write the artifact to *path*; returns its header.
+
+    Anchors go through ``get_anchor_embeddings``, so recompiling after an
+    edit embeds only the roles that changed.
+    """
+    roles = list(roles)
+    model = classify_jd.model_name(backend)
+    rows = _unit_rows(classify_jd.get_anchor_embeddings(backend, roles))
+    dim = len(rows[0])
+    header = {
+        "version": ARTIFACT_VERSION,
+        "backend": backend,
+        "model": model,
+        "dim": dim,
+        "roles": catalogue_dict(roles)["roles"],
+        "fingerprints": [classify_jd.role_fingerprint(role, backend, model) for role in roles],
+        "compiled_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+    }
+    if source:
+        with open(source, "rb") as f:
+            header["source"] = os.path.abspath(source)
+            header["source_sha256"] = hashlib.sha256(f.read()).hexdigest()
+
+    data = array("f")
+    for row in rows:
+        data.extend(row)
+    _write_artifact(path, header, data.tobytes())
+    return header
+
+
+def _write_artifact(path: str, header: dict, data: bytes) -> None:
+    blob = json.dumps(header).encode("utf-8")
+    offset = len(MAGIC) + 8 + len(blob)
+    padding = b" " * (-offset % _ALIGN)
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(blob) + len(padding)))
+        f.write(blob + padding)
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _read_header(path: str) -> Tuple[dict, int]:
+    """The artifact's header and the offset of its data."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path}: not a compiled role catalogue")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length).decode("utf-8"))
+    if header.get("version") != ARTIFACT_VERSION:
+        raise ValueError(f"{path}: unsupported artifact version {header.get('version')}")
+    return header, len(MAGIC) + 8 + length
+
+
+def store_calibration(path: str, calibration: classify_jd.Calibration, report: Optional[dict] = None) -> dict:
+    """Rewrite the artifact at *path* with *calibration* (and its report) in the header."""
+    header, offset = _read_header(path)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    header["calibration"] = {
+        **calibration.to_dict(),
+        "fitted_at": dt.datetime.now(dt.timezone.utc).isoformat(timespec="seconds"),
+        **({"report": report} if report is not None else {}),
+    }
+    _write_artifact(path, header, data)
+    return header
+
+
+def is_artifact(path: str) -> bool:
+    try:
+        with open(path, "rb") as f:
+            return f.read(len(MAGIC)) == MAGIC
+    except OSError:
+        return False
+
+
+def load_artifact(path: str) -> CompiledCatalogue:
+    """Memory-map a compiled catalogue; raises ValueError if it is not one."""
+    header, offset = _read_header(path)
+    roles = [_role_from_dict(entry) for entry in header["roles"]]
+    dim = header["dim"]
+    np = classify_jd.np
+    if np is not None:
+        vectors = np.memmap(path, dtype=np.float32, mode="r", offset=offset, shape=(len(roles), dim))
+    else:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        base = memoryview(mm)
+        view = base[offset:offset + len(roles) * dim * 4].cast("f")
+        try:
+            vectors = [view[i * dim:(i + 1) * dim].tolist() for i in range(len(roles))]
+        finally:
+            view.release()
+            base.release()
+            mm.close()
+    return CompiledCatalogue(roles, header["backend"], header["model"], dim, vectors, header)
+
+
+def activate(path: str, backend: str) -> List[RoleSpec]:
+    """Make the roles in *path* (catalogue or artifact) the classifier's roles.
+
+    A compiled artifact for *backend* seeds the anchor cache directly, and
+    its calibration (if any) is applied; one built for another backend or
+    model only contributes its role list, and anchors are then derived as
+    usual.
+    """
+    if not is_artifact(path):
+        roles = load_catalogue(path)
+        classify_jd.set_roles(roles)
+        return roles
+
+    compiled = load_artifact(path)
+    if compiled.backend == backend and compiled.model == classify_jd.model_name(backend):
+        classify_jd.set_roles(compiled.roles, backend, compiled.vectors)
+        if "calibration" in compiled.header:
+            classify_jd.set_calibration(classify_jd.Calibration.from_dict(compiled.header["calibration"]))
+    else:
+        print(
+            f"Warning: {path} was compiled for {compiled.backend}/{compiled.model}; "
+            f"embedding anchors for {backend}",
+            file=sys.stderr,
+        )
+        classify_jd.set_roles(compiled.roles)
+    return compiled.roles
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Role catalogue tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="Write the built-in ROLES as a JSON catalogue")
+    p.add_argument("catalogue")
+    p = sub.add_parser("compile", help="Embed a catalogue into an mmap-able artifact")
+    p.add_argument("catalogue", help="JSON or YAML catalogue")
+    p.add_argument("-o", "--output", help="Artifact path (default: <catalogue>.<backend>.anchors)")
+    p.add_argument("--backend", choices=classify_jd.available_backends(), default="sbert")
+    p = sub.add_parser("calibrate", help="Fit temperature and out-of-scope thresholds into an artifact")
+    p.add_argument("artifact")
+    p.add_argument("--history", required=True,
+                   help="Labelled JSONL: text and label (a role name, or 'none' for out of scope)")
+    p.add_argument("--anchor-scoring", default="joined", metavar="MODE",
+                   help="Scoring mode the calibration is for (same as classify_jd.py; default: joined)")
+    p.add_argument("--error-cost", type=float, default=1.0,
+                   help="Cost of accepting a wrong or out-of-scope posting relative to rejecting "
+                        "a correct one (default: 1; higher rejects more)")
+    p.add_argument("--holdout", type=float, default=0.0,
+                   help="Fraction of the history kept out of the fit to report on (default: 0)")
+    p.add_argument("--dry-run", action="store_true", help="Report without writing the artifact")
+    p = sub.add_parser("show", help="Print an artifact's header")
+    p.add_argument("artifact")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "export":
+            with open(args.catalogue, "w", encoding="utf-8") as f:
+                json.dump(catalogue_dict(classify_jd.ROLES), f, indent=2)
+                f.write("\n")
+            print(f"Wrote {len(classify_jd.ROLES)} roles to {args.catalogue}")
+        elif args.command == "compile":
+            roles = load_catalogue(args.catalogue)
+            output = args.output or f"{os.path.splitext(args.catalogue)[0]}.{args.backend}.anchors"
+            header = compile_catalogue(roles, args.backend, output, source=args.catalogue)
+            print(f"Compiled {len(roles)} roles ({header['model']}, dim {header['dim']}) to {output}")
+        elif args.command == "calibrate":
+            import calibration
+
+            compiled = load_artifact(args.artifact)
+            if compiled.backend not in classify_jd.available_backends():
+                raise ValueError(f"{args.artifact} was compiled for unknown backend {compiled.backend!r}")
+            classify_jd._parse_scoring(args.anchor_scoring)
+            activate(args.artifact, compiled.backend)
+            classify_jd.set_calibration(None)
+            cal, report = calibration.fit(
+                calibration.load_history(args.history),
+                compiled.backend,
+                scoring=args.anchor_scoring,
+                error_cost=args.error_cost,
+                holdout=args.holdout,
+            )
+            print(report.summary())
+            print(f"temperature {cal.temperature:g}; thresholds " +
+                  ", ".join(f"{name} {t:.4f}" for name, t in cal.thresholds.items()))
+            if not args.dry_run:
+                store_calibration(args.artifact, cal, report.to_dict())
+                print(f"Stored calibration in {args.artifact}")
+        elif args.command == "show":
+            header = load_artifact(args.artifact).header
+            shown = {k: v for k, v in header.items() if k != "roles"}
+            if "calibration" in shown:
+                shown["calibration"] = {k: v for k, v in shown["calibration"].items() if k != "report"}
+            print(json.dumps(shown, indent=2))
+            for role in header["roles"]:
+                print(f"  {role['name']:<25} {len(role['anchors'])} anchor(s)  {role['resume']}")
+    except FileNotFoundError as e:
+        print(f"File not found: {e.filename}", file=sys.stderr)
+        sys.exit(1)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Fast-start helpers for the short-lived CLI.
+
+``classify_jd.py`` is usually run once per JD, so anything imported at module
+level is paid on every call — including ``--help`` and argument errors.
+Heavy optional dependencies are therefore imported lazily: ``lazy_import``
+returns ``None`` when the package is not installed (so ``if np is not None``
+checks keep working) and otherwise a module object that only executes the
+real import on first attribute access.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import time
+from types import ModuleType
+from typing import Optional
+
+
+def lazy_import(name: str) -> Optional[ModuleType]:
+    """Return *name* as a lazily-loaded module, or ``None`` if it is not installed."""
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    try:
+        spec = importlib.util.find_spec(name)
+    except (ImportError, ValueError):
+        return None
+    if spec is None or spec.loader is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started, where the OS exposes it (Linux)."""
+    try:
+        with open("/proc/self/stat", "rb") as f:
+            # Field 22 (starttime) follows the parenthesised command name.
+            fields = f.read().rsplit(b")", 1)[1].split()
+        with open("/proc/uptime", "rb") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def timed_import(name: str) -> float:
+    """Import *name* for real (resolving any lazy module) and return the seconds taken."""
+    t0 = time.perf_counter()
+    dir(importlib.import_module(name))     # attribute access runs a lazy module
+    return time.perf_counter() - t0
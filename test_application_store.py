@@ -0,0 +1,137 @@
+"""Tests for the SQLite application store."""
+
+import csv
+import os
+import sqlite3
+import time
+
+import pytest
+
+from application_store import CSV_COLUMNS, SCHEMA_VERSION, ApplicationStore, main, normalize_link
+
+SAMPLE = os.path.join(os.path.dirname(__file__), "sample_data", "Applications_sample.csv")
+
+
+def app(i, **overrides):
+    row = {
+        "company": f"Company{i % 5000}",
+        "role_title": f"Analyst {i}",
+        "link": f"https://jobs.example.com/{i}",
+        "status": "Applied" if i % 3 else "Rejected",
+        "follow_up_date": f"2026-03-{(i % 28) + 1:02d}",
+        "role_category": "Risk",
+    }
+    row.update(overrides)
+    return row
+
+
+@pytest.fixture
+def store():
+    s = ApplicationStore(":memory:")
+    yield s
+    s.close()
+
+
+def test_normalize_link():
+    assert normalize_link("HTTPS://Jobs.Example.com/123/#apply") == "https://jobs.example.com/123"
+    assert normalize_link("  ") == ""
+
+
+def test_csv_round_trip(store, tmp_path):
+    assert store.import_csv(SAMPLE) == 1
+    out = tmp_path / "out.csv"
+    store.export_csv(str(out))
+    with open(SAMPLE, encoding="utf-8", newline="") as f:
+        original = list(csv.reader(f))
+    with open(out, encoding="utf-8", newline="") as f:
+        exported = list(csv.reader(f))
+    assert exported[0] == list(CSV_COLUMNS)
+    assert exported == original
+
+
+def test_reimport_updates_in_place(store):
+    store.import_csv(SAMPLE)
+    store.upsert({"company": "ExampleCorp", "link": "https://jobs.example.com/123/", "status": "Interview"})
+    assert len(store) == 1
+    assert store.by_link("https://jobs.example.com/123")[0]["status"] == "Interview"
+
+
+def test_dedup_and_follow_up_lookups(store):
+    store.upsert_many([
+        app(1, follow_up_date="2026-03-01"),
+        app(2, follow_up_date="2026-03-10"),
+        app(3, follow_up_date="2026-03-01", status="Rejected"),
+        app(4, follow_up_date=""),
+    ])
+    assert store.has_applied(link="https://jobs.example.com/2")
+    assert store.has_applied(company="company1")            # case-insensitive
+    assert not store.has_applied(link="https://jobs.example.com/99")
+    due = store.due_for_follow_up("2026-03-05")
+    assert [row["link"] for row in due] == ["https://jobs.example.com/1"]
+
+
+def test_lookups_use_indexes(store):
+    queries = {
+        "link": "SELECT * FROM applications WHERE link_norm = ?",
+        "company": "SELECT * FROM applications WHERE company = ?",
+        "status": "SELECT * FROM applications WHERE status = ?",
+        "follow_up": "SELECT * FROM applications WHERE follow_up_date != '' AND follow_up_date <= ?",
+    }
+    for name, sql in queries.items():
+        plan = " ".join(store.explain(sql, ("x",)))
+        assert f"idx_applications_{name}" in plan, plan
+
+
+def test_50k_history_lookups_are_fast(tmp_path):
+    store = ApplicationStore(str(tmp_path / "apps.sqlite"))
+    assert store.upsert_many(app(i) for i in range(50_000)) == 50_000
+    t0 = time.perf_counter()
+    for i in range(0, 50_000, 500):
+        assert store.has_applied(link=f"https://jobs.example.com/{i}")
+    per_lookup = (time.perf_counter() - t0) / 100
+    assert per_lookup < 0.005
+    assert len(store.due_for_follow_up("2026-03-01")) > 0
+    store.close()
+
+
+def test_cli_applied_exit_code(tmp_path, capsys):
+    db = str(tmp_path / "apps.sqlite")
+    main(["--db", db, "import", SAMPLE])
+    main(["--db", db, "applied", "--company", "examplecorp"])
+    assert "ExampleCorp" in capsys.readouterr().out
+    with pytest.raises(SystemExit) as info:
+        main(["--db", db, "applied", "--link", "https://nowhere.example.com/1"])
+    assert info.value.code == 1
+
+
+def test_version_1_store_is_migrated(tmp_path):
+    path = str(tmp_path / "v1.sqlite")
+    db = sqlite3.connect(path)
+    db.execute("CREATE TABLE applications (id INTEGER PRIMARY KEY, key TEXT NOT NULL UNIQUE, "
+               "link_norm TEXT NOT NULL DEFAULT '', company TEXT NOT NULL DEFAULT '')")
+    db.execute("INSERT INTO applications (key, company) VALUES ('acme|analyst', 'Acme')")
+    db.execute("PRAGMA user_version = 1")
+    db.commit()
+    db.close()
+
+    store = ApplicationStore(path)
+    assert store.by_company("Acme")[0]["status"] == ""
+    assert store.processed_ids("feed") == set()
+    assert store.db.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    store.close()
+
+
+def test_newer_or_foreign_database_is_refused(tmp_path):
+    newer = str(tmp_path / "newer.sqlite")
+    db = sqlite3.connect(newer)
+    db.execute(f"PRAGMA user_version = {SCHEMA_VERSION + 1}")
+    db.close()
+    with pytest.raises(ValueError, match="schema version"):
+        ApplicationStore(newer)
+
+    foreign = str(tmp_path / "foreign.sqlite")
+    db = sqlite3.connect(foreign)
+    db.execute("CREATE TABLE applications (name TEXT)")
+    db.close()
+    with pytest.raises(ValueError, match="not an application store"):
+        ApplicationStore(foreign)
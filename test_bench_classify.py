@@ -0,0 +1,66 @@
+"""Tests for the benchmark harness, using the offline stub backend."""
+
+import copy
+
+import pytest
+
+import bench_classify
+import classify_jd
+
+
+@pytest.fixture
+def isolated_classifier(monkeypatch, tmp_path):
+    """bench_backend rewires module globals; restore them afterwards."""
+    monkeypatch.setattr(classify_jd, "_BACKENDS", dict(classify_jd._BACKENDS))
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", classify_jd._JD_CACHE)
+
+
+def test_stub_backend_is_deterministic():
+    stub = bench_classify.StubBackend(dim=32)
+    assert stub.embed(["Risk and VaR."]) == stub.embed(["risk and var"])
+    assert len(stub.embed(["x"])[0]) == stub.dim == 32
+
+
+def test_synthetic_corpus_is_labelled_and_seeded():
+    corpus = bench_classify.synthetic_corpus(per_role=3, seed=1)
+    assert len(corpus) == 3 * len(classify_jd.ROLES)
+    assert {label for _, label in corpus} == {role.name for role in classify_jd.ROLES}
+    assert corpus == bench_classify.synthetic_corpus(per_role=3, seed=1)
+
+
+def test_bench_backend_reports_every_metric(isolated_classifier):
+    corpus = bench_classify.load_sample_corpus()
+    result = bench_classify.bench_backend(
+        "stub", corpus, batch_sizes=[1, 4], lengths=[10, 40], repeats=1, min_seconds=0.0
+    )
+    assert result.corpus_size == len(corpus)
+    assert 0.0 <= result.accuracy <= 1.0
+    assert set(result.latency_ms) == {"p50", "p95", "p99"}
+    assert set(result.throughput_jds_per_s) == {"1", "4"}
+    assert set(result.length_p50_ms) == {"10", "40"}
+    assert result.cold_start_ms >= 0.0
+
+
+def test_compare_to_baseline_flags_regressions():
+    base = {
+        "backends": {
+            "stub": {
+                "accuracy": 0.90,
+                "latency_ms": {"p50": 1.0, "p95": 2.0},
+                "throughput_jds_per_s": {"8": 1000.0},
+            }
+        }
+    }
+    same = copy.deepcopy(base)
+    assert bench_classify.compare_to_baseline(same, base) == []
+
+    worse = copy.deepcopy(base)
+    worse["backends"]["stub"].update(
+        accuracy=0.80, latency_ms={"p50": 1.1, "p95": 3.0}, throughput_jds_per_s={"8": 500.0}
+    )
+    problems = bench_classify.compare_to_baseline(worse, base, tolerance=0.2)
+    assert len(problems) == 3
+    assert any("accuracy" in p for p in problems)
+    assert any("p95" in p for p in problems)
+    assert any("batch 8" in p for p in problems)
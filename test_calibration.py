@@ -0,0 +1,162 @@
+"""Tests for calibration.py and out-of-scope routing, with the hashed bag-of-words backend."""
+
+import io
+import json
+import math
+
+import pytest
+
+import calibration
+import classify_jd
+import pipeline
+import role_catalogue
+from application_store import ApplicationStore
+from calibration import _best_threshold, fit_temperature, load_history
+from pipeline import run_pipeline
+from test_classify import fake_backend  # noqa: F401  (fixture)
+from test_role_catalogue import CATALOGUE
+
+HISTORY = [
+    ("market risk var stress testing for the trading book", "Risk"),
+    ("expected shortfall and risk limits exposure reporting", "Risk"),
+    ("stress testing market risk limits", "Risk"),
+    ("alpha factor models and equity research backtests", "Quant"),
+    ("equity factor models alpha research", "Quant"),
+    ("backtests of alpha factor models", "Quant"),
+    ("sql dashboards and business intelligence reporting", "Data"),
+    ("business intelligence sql reporting dashboards", "Data"),
+    ("reporting dashboards in sql", "Data"),
+    ("registered nurse for patient care on hospital wards", "none"),
+    ("truck driver with a clean licence for regional deliveries", "none"),
+    ("line cook preparing meals in a busy kitchen", "none"),
+    ("kindergarten teacher planning lessons for young children", ""),
+]
+OFF_TOPIC = "Warehouse picker packing parcels on night shifts"
+
+
+@pytest.fixture
+def artifact(fake_backend, monkeypatch, tmp_path):
+    monkeypatch.setattr(classify_jd, "ROLES", classify_jd.ROLES)
+    monkeypatch.setattr(classify_jd, "_CALIBRATION", None)
+    roles = [role_catalogue._role_from_dict(entry) for entry in CATALOGUE["roles"]]
+    path = str(tmp_path / "roles.anchors")
+    role_catalogue.compile_catalogue(roles, "sbert", path)
+    return path
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    path = tmp_path / "history.jsonl"
+    with open(path, "w", encoding="utf-8") as f:
+        for text, label in HISTORY:
+            f.write(json.dumps({"text": text, "label": label}) + "\n")
+    return str(path)
+
+
+def test_load_history_maps_out_of_scope_labels(history_file):
+    history = load_history(history_file)
+    assert history[0] == (HISTORY[0][0], "Risk")
+    assert [label for _, label in history[-4:]] == [None] * 4
+
+
+def test_fit_temperature_recovers_a_known_temperature():
+    # Rows whose true-role probability at T=0.05 is known: the NLL minimum sits there.
+    rows, labels = [], []
+    for gap in (0.01, 0.03, 0.05, 0.08, 0.12):
+        p_true = 1 / (1 + math.exp(-gap / 0.05))
+        n_true = round(100 * p_true)
+        rows += [[0.5 + gap, 0.5]] * 100
+        labels += [0] * n_true + [1] * (100 - n_true)
+    assert fit_temperature(rows, labels) == pytest.approx(0.05, rel=0.1)
+
+
+def test_best_threshold_minimises_weighted_errors():
+    scored = [(0.1, False), (0.2, False), (0.3, True), (0.4, True)]
+    assert _best_threshold(scored, 1.0) == pytest.approx(0.25)
+    assert _best_threshold([(0.5, True), (0.6, True)], 1.0) == -math.inf
+    # Rejecting the one good posting is cheaper than accepting three bad ones.
+    assert _best_threshold([(0.1, False), (0.2, False), (0.3, False), (0.05, True)], 1.0) > 0.3
+
+
+def test_fit_rejects_unknown_labels(artifact):
+    role_catalogue.activate(artifact, "sbert")
+    with pytest.raises(ValueError, match="Analytics"):
+        calibration.fit([("some text", "Analytics")], "sbert")
+
+
+def test_calibrate_stores_and_activate_applies(artifact, history_file, capsys):
+    role_catalogue.main(["calibrate", artifact, "--history", history_file])
+    report = capsys.readouterr().out
+    assert "<- fitted" in report
+
+    header = role_catalogue.load_artifact(artifact).header
+    assert set(header["calibration"]["thresholds"]) <= {"Risk", "Quant", "Data"}
+    assert header["calibration"]["report"]["calibrated"]["rejected_out"] == 1.0
+
+    classify_jd.set_calibration(None)
+    role_catalogue.activate(artifact, "sbert")
+    cal = classify_jd._CALIBRATION
+    assert cal.temperature == header["calibration"]["temperature"]
+
+    results = list(classify_jd.classify_many([HISTORY[0][0], OFF_TOPIC], backend="sbert"))
+    assert not results[0].out_of_scope and results[0].resume == "Risk.pdf"
+    assert results[1].out_of_scope and results[1].resume == ""
+    payload = classify_jd._result_payload(results[1])
+    assert payload["out_of_scope"] is True
+    assert classify_jd._result_from_payload(payload) == results[1]
+
+    # Another scoring mode ignores the calibration.
+    other = classify_jd.classify_text(OFF_TOPIC, backend="sbert", scoring="max")
+    assert not other.out_of_scope
+
+
+def test_pure_python_path_rejects_the_same(artifact, history_file, monkeypatch):
+    role_catalogue.main(["calibrate", artifact, "--history", history_file])
+    role_catalogue.activate(artifact, "sbert")
+    vectorised = [r.out_of_scope for r in classify_jd.classify_many([t for t, _ in HISTORY], backend="sbert")]
+    monkeypatch.setattr(classify_jd, "np", None)
+    classify_jd.set_roles(classify_jd.ROLES)        # drop the memmapped matrix
+    plain = [r.out_of_scope for r in classify_jd.classify_many([t for t, _ in HISTORY], backend="sbert")]
+    assert plain == vectorised
+    assert sum(vectorised) == 4
+
+
+def test_batch_and_pipeline_drop_out_of_scope(artifact, history_file, tmp_path):
+    role_catalogue.main(["calibrate", artifact, "--history", history_file])
+    role_catalogue.activate(artifact, "sbert")
+    feed = tmp_path / "feed.jsonl"
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "a", "title": "Risk", "text": HISTORY[0][0]}) + "\n")
+        f.write(json.dumps({"id": "b", "title": "Picker", "text": OFF_TOPIC}) + "\n")
+
+    out, stats = io.StringIO(), {}
+    count, _ = classify_jd.run_batch(str(feed), "sbert", 8, out, stats=stats)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == 2 and stats == {"out_of_scope": 1}
+    assert "out_of_scope" not in rows[0] and rows[1]["out_of_scope"] is True
+
+    store = ApplicationStore(":memory:")
+    try:
+        result = run_pipeline(str(feed), store, {}, backend="sbert")
+        assert (result.logged, result.out_of_scope) == (1, 1)
+        again = run_pipeline(str(feed), store, {}, backend="sbert")
+        assert again.skipped == 2                  # both checkpointed
+    finally:
+        store.close()
+
+
+def test_pipeline_uses_the_calibrated_scoring_mode(artifact, history_file, tmp_path, capsys):
+    role_catalogue.main(["calibrate", artifact, "--history", history_file, "--anchor-scoring", "max"])
+    feed = tmp_path / "feed.jsonl"
+    with open(feed, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"id": "a", "title": "Risk", "text": HISTORY[0][0]}) + "\n")
+        f.write(json.dumps({"id": "b", "title": "Picker", "text": OFF_TOPIC}) + "\n")
+    argv = [str(feed), "--roles", artifact, "--backend", "sbert", "--no-history",
+            "--resumes", str(tmp_path / "none.csv")]
+
+    pipeline.main(argv + ["--db", str(tmp_path / "a.sqlite")])
+    assert "1 out of scope" in capsys.readouterr().err
+
+    pipeline.main(argv + ["--db", str(tmp_path / "b.sqlite"), "--anchor-scoring", "joined"])
+    err = capsys.readouterr().err
+    assert "calibrated for --anchor-scoring max" in err and "0 out of scope" in err
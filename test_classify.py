@@ -13,8 +13,18 @@ NOTE: The first run downloads the all-MiniLM-L6-v2 model (~80 MB).
 Subsequent runs use the cached model and are fast (~1–2 s each).
 """
 
+import hashlib
+import io
+import json
+import os
+import threading
+
 import pytest
+
+import classify_jd
 from classify_jd import classify_text, ClassificationResult
+import onnx_backend
+from embedding_cache import EmbeddingCache
 
 
 # ---------------------------------------------------------------------------
@@ -154,6 +164,456 @@ def test_best_confidence_matches_role_category():
     assert best_role == result.role_category
 
 
+# ---------------------------------------------------------------------------
+# Anchor store — uses a deterministic fake backend, no model download
+# ---------------------------------------------------------------------------
+
+def _fake_vector(text: str, dim: int = 64) -> list:
+    """Hashed bag-of-words vector: deterministic and model-free."""
+    vec = [0.0] * dim
+    for word in text.lower().split():
+        digest = hashlib.md5(word.encode("utf-8")).digest()
+        vec[digest[0] % dim] += 1.0 if digest[1] & 1 else -1.0
+    return vec
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, tmp_path):
+    """Route get_embeddings to _fake_vector and record every batch it sees."""
+    calls = []
+
+    def fake_get_embeddings(texts, backend):
+        calls.append(list(texts))
+        return [_fake_vector(t) for t in texts]
+
+    monkeypatch.setattr(classify_jd, "get_embeddings", fake_get_embeddings)
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MEMO", {})
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MATRICES", {})
+    monkeypatch.setattr(classify_jd, "_FACET_MATRICES", {})
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+    return calls
+
+
+def test_anchors_embedded_once_per_process(fake_backend):
+    classify_text("First JD about factor models.", backend="sbert")
+    classify_text("Second JD about SQL dashboards.", backend="sbert")
+    assert [len(batch) for batch in fake_backend] == [len(classify_jd.ROLES), 1, 1]
+
+
+def test_anchor_store_persists_across_processes(fake_backend, monkeypatch):
+    first = classify_text("Stress testing and VaR.", backend="sbert")
+    classify_jd._ANCHOR_MEMO.clear()          # simulate a fresh process
+    classify_jd._ANCHOR_MATRICES.clear()
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+    fake_backend.clear()
+    second = classify_text("Stress testing and VaR.", backend="sbert")
+    assert fake_backend == [["Stress testing and VaR."]]
+    assert second.scores == first.scores
+
+
+def test_changed_role_reembeds_only_itself(fake_backend, monkeypatch):
+    classify_text("warm up", backend="sbert")
+    classify_jd._ANCHOR_MEMO.clear()
+    fake_backend.clear()
+
+    roles = list(classify_jd.ROLES)
+    edited = classify_jd.RoleSpec(
+        name=roles[0].name,
+        resume=roles[0].resume,
+        anchor=roles[0].anchor + " Edited.",
+        secondary_anchors=roles[0].secondary_anchors,
+    )
+    monkeypatch.setattr(classify_jd, "ROLES", [edited] + roles[1:])
+    classify_text("another JD", backend="sbert")
+    assert len(fake_backend[0]) == 1
+    assert fake_backend[0][0].startswith(roles[0].anchor)
+
+
+def test_anchor_fingerprint_depends_on_backend():
+    role = classify_jd.ROLES[0]
+    assert classify_jd.role_fingerprint(role, "sbert") != classify_jd.role_fingerprint(role, "openai")
+
+
+# ---------------------------------------------------------------------------
+# Model registry
+# ---------------------------------------------------------------------------
+
+def test_sbert_model_loaded_once_across_threads(monkeypatch):
+    loads = []
+
+    def fake_load(name):
+        loads.append(name)
+        return object()
+
+    monkeypatch.setattr(classify_jd, "_load_sbert_model", fake_load)
+    monkeypatch.setattr(classify_jd, "_MODELS", {})
+
+    seen = []
+    threads = [
+        threading.Thread(target=lambda: seen.append(classify_jd.get_sbert_model()))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert loads == [classify_jd.SBERT_MODEL]
+    assert len({id(m) for m in seen}) == 1
+
+
+def test_warmup_reports_timings(fake_backend):
+    report = classify_jd.warmup("openai")
+    assert report.model_load_seconds >= 0.0
+    assert report.query_seconds >= 0.0
+    assert "per query" in report.summary()
+    # A second warm-up finds model, anchors and the probe query all resident.
+    fake_backend.clear()
+    classify_jd.warmup("openai")
+    assert fake_backend == []
+
+
+# ---------------------------------------------------------------------------
+# Batch API
+# ---------------------------------------------------------------------------
+
+BATCH_JDS = [
+    "Build factor models and backtest equity signals.",
+    "Own the annual budget and variance analysis for the CFO.",
+    "Write SQL and Tableau dashboards for stakeholders.",
+    "Monitor VaR and run regulatory stress tests.",
+    "Build low-latency trading infrastructure in C++.",
+]
+
+
+def test_classify_many_matches_classify_text(fake_backend):
+    single = [classify_text(jd, backend="sbert") for jd in BATCH_JDS]
+    batched = list(classify_jd.classify_many(BATCH_JDS, backend="sbert", batch_size=2))
+    assert batched == single
+
+
+def test_classify_many_embeds_in_batches(fake_backend):
+    list(classify_jd.classify_many(iter(BATCH_JDS), backend="sbert", batch_size=2))
+    query_batches = [len(b) for b in fake_backend[1:]]   # first call embeds anchors
+    assert query_batches == [2, 2, 1]
+
+
+def test_run_batch_jsonl(fake_backend, tmp_path):
+    src = tmp_path / "jds.jsonl"
+    src.write_text(
+        "\n".join(json.dumps({"id": f"jd{i}", "text": t}) for i, t in enumerate(BATCH_JDS)),
+        encoding="utf-8",
+    )
+    out = io.StringIO()
+    count, _ = classify_jd.run_batch(str(src), "sbert", 3, out)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == len(BATCH_JDS)
+    assert [r["id"] for r in rows] == [f"jd{i}" for i in range(len(BATCH_JDS))]
+    assert all("role_category" in r for r in rows)
+
+
+def test_run_batch_flags_duplicates(fake_backend, tmp_path):
+    from dedup_index import DuplicateIndex
+
+    jds = [BATCH_JDS[0], BATCH_JDS[1], BATCH_JDS[0], BATCH_JDS[2]]
+    src = tmp_path / "jds.jsonl"
+    src.write_text(
+        "\n".join(json.dumps({"id": f"jd{i}", "text": t}) for i, t in enumerate(jds)),
+        encoding="utf-8",
+    )
+    out = io.StringIO()
+    count, _ = classify_jd.run_batch(str(src), "sbert", 2, out, dedup=DuplicateIndex())
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert count == 4
+    assert [r["id"] for r in rows] == ["jd0", "jd1", "jd2", "jd3"]
+    assert rows[2]["duplicate_of"] == f"{src}:jd0" and "role_category" not in rows[2]
+    assert "duplicate_of" not in rows[3]
+    assert sum(len(b) for b in fake_backend[1:]) == 3     # the copy was never embedded
+
+
+def test_rerunning_a_feed_does_not_flag_postings_as_their_own_copies(fake_backend, tmp_path):
+    from dedup_index import DuplicateIndex
+
+    jds = [BATCH_JDS[0], BATCH_JDS[1], BATCH_JDS[0], BATCH_JDS[2]]
+    src = tmp_path / "jds.jsonl"
+    src.write_text(
+        "\n".join(json.dumps({"id": f"jd{i}", "text": t}) for i, t in enumerate(jds)),
+        encoding="utf-8",
+    )
+    db = str(tmp_path / "dedup.sqlite")
+    runs = []
+    for _ in range(2):
+        out = io.StringIO()
+        dedup = DuplicateIndex(db_path=db)
+        classify_jd.run_batch(str(src), "sbert", 2, out, dedup=dedup)
+        runs.append([json.loads(line) for line in out.getvalue().splitlines()])
+        dedup.close()
+    first, second = runs
+    assert [r.get("duplicate_of") for r in second] == [r.get("duplicate_of") for r in first]
+    assert [r.get("duplicate_of") for r in second] == [None, None, f"{src}:jd0", None]
+    reopened = DuplicateIndex(db_path=db)
+    assert len(reopened) == 4 and len(reopened._vector_ids) == 3
+    reopened.close()
+
+
+def test_feeds_sharing_line_number_ids_do_not_collide(fake_backend, tmp_path):
+    from dedup_index import DuplicateIndex
+
+    feed_a, feed_b = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    feed_a.write_text("\n".join(json.dumps({"text": t}) for t in BATCH_JDS[:2]), encoding="utf-8")
+    # Line 1 of feed B reposts line 2 of feed A; neither feed has explicit ids.
+    feed_b.write_text("\n".join(json.dumps({"text": t}) for t in [BATCH_JDS[1], BATCH_JDS[2]]), encoding="utf-8")
+    dedup = DuplicateIndex()
+    classify_jd.run_batch(str(feed_a), "sbert", 2, io.StringIO(), dedup=dedup)
+    out = io.StringIO()
+    classify_jd.run_batch(str(feed_b), "sbert", 2, out, dedup=dedup)
+    rows = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["id"] for r in rows] == ["1", "2"]
+    assert rows[0]["duplicate_of"] == f"{feed_a}:2"
+    assert "duplicate_of" not in rows[1]
+    assert len(dedup) == 4
+
+
+def test_iter_batch_inputs_directory(tmp_path):
+    (tmp_path / "b.txt").write_text("second", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("first", encoding="utf-8")
+    (tmp_path / "skip.md").write_text("ignored", encoding="utf-8")
+    records = list(classify_jd.iter_batch_inputs(str(tmp_path)))
+    assert [text for _, text in records] == ["first", "second"]
+
+
+# ---------------------------------------------------------------------------
+# NumPy kernel vs pure-Python fallback
+# ---------------------------------------------------------------------------
+
+def test_numpy_kernel_matches_list_path():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    anchors = rng.normal(size=(5, 384)).astype(np.float32)
+    jds = rng.normal(size=(7, 384)).astype(np.float32)
+
+    sims = classify_jd.cosine_matrix(jds, classify_jd._normalize_rows(anchors.astype(np.float64)))
+    probs = classify_jd._softmax_matrix(sims)
+    for i, jd in enumerate(jds.tolist()):
+        expected = [classify_jd.cosine_similarity(jd, a) for a in anchors.tolist()]
+        assert np.allclose(sims[i], expected, atol=1e-6, rtol=0)
+        assert np.allclose(probs[i], classify_jd._softmax(expected), atol=1e-6, rtol=0)
+        assert int(sims[i].argmax()) == max(range(5), key=lambda j: expected[j])
+
+
+def test_zero_vector_scores_zero():
+    np = pytest.importorskip("numpy")
+    anchors = classify_jd._normalize_rows(np.eye(3))
+    assert classify_jd.cosine_matrix([[0.0, 0.0, 0.0]], anchors).tolist() == [[0.0, 0.0, 0.0]]
+
+
+def test_list_fallback_without_numpy(fake_backend, monkeypatch):
+    with_numpy = list(classify_jd.classify_many(BATCH_JDS, backend="sbert"))
+    monkeypatch.setattr(classify_jd, "np", None)
+    without = list(classify_jd.classify_many(BATCH_JDS, backend="sbert"))
+    for a, b in zip(with_numpy, without):
+        assert a.role_category == b.role_category
+        for name in a.scores:
+            assert abs(a.scores[name] - b.scores[name]) <= 1e-4   # both rounded to 4 dp
+
+
+# ---------------------------------------------------------------------------
+# JD embedding cache
+# ---------------------------------------------------------------------------
+
+def test_repeat_classification_skips_backend(fake_backend):
+    first = classify_text("Own the budget  and forecast.", backend="sbert")
+    fake_backend.clear()
+    second = classify_text("Own the budget and\nforecast.", backend="sbert")   # re-wrapped
+    assert fake_backend == []
+    assert second == first
+    assert classify_jd.jd_cache_stats().hits == 1
+
+
+def test_batch_embeds_each_distinct_miss_once(fake_backend):
+    list(classify_jd.classify_many(["same", "same", "other"], backend="sbert"))
+    assert fake_backend[-1] == ["same", "other"]
+
+
+# ---------------------------------------------------------------------------
+# Long-JD chunking
+# ---------------------------------------------------------------------------
+
+def test_chunk_text_windows_overlap():
+    words = " ".join(f"w{i}" for i in range(10))
+    chunks = [c.split() for c in classify_jd.chunk_text(words, window=4, overlap=1)]
+    assert chunks[0] == ["w0", "w1", "w2", "w3"]
+    assert chunks[1][0] == "w3"                      # one word of overlap
+    assert chunks[-1][-1] == "w9"                    # the tail is covered
+    assert all(len(c) == 4 for c in chunks)
+    assert list(classify_jd.chunk_text("a b", window=4, overlap=1)) == ["a b"]
+    with pytest.raises(ValueError):
+        list(classify_jd.chunk_text(words, window=4, overlap=4))
+
+
+def test_short_jd_unaffected_by_pooling(fake_backend):
+    jd = BATCH_JDS[0]
+    assert classify_text(jd, backend="sbert", pooling="mean") == classify_text(jd, backend="sbert")
+
+
+@pytest.mark.parametrize("pooling", ["mean", "max", "best"])
+def test_long_jd_is_classified_beyond_first_window(fake_backend, pooling):
+    # Filler first, then the signal: whole-text truncation would miss it.
+    filler = " ".join(f"filler{i}" for i in range(400))
+    jd = filler + " " + classify_jd.ROLES[0].anchor * 3
+    classify_jd.get_anchor_embeddings("sbert")
+    fake_backend.clear()
+    result = classify_text(jd, backend="sbert", pooling=pooling, chunk_words=50, chunk_overlap=10)
+    assert all(len(t.split()) <= 50 for batch in fake_backend for t in batch)
+    assert result.role_category == classify_jd.ROLES[0].name
+
+
+def test_pooled_chunks_are_embedded_in_bounded_batches(fake_backend, monkeypatch):
+    monkeypatch.setattr(classify_jd, "CHUNK_BATCH", 4)
+    jd = " ".join(f"w{i}" for i in range(1000))
+    classify_text(jd, backend="sbert", pooling="max", chunk_words=20, chunk_overlap=0)
+    assert max(len(batch) for batch in fake_backend[1:]) == 4
+    assert sum(len(batch) for batch in fake_backend[1:]) == 50
+
+
+# ---------------------------------------------------------------------------
+# Multi-anchor scoring
+# ---------------------------------------------------------------------------
+
+FACET_ROLES = [
+    classify_jd.RoleSpec(
+        name="Quant Dev",
+        resume="QD.pdf",
+        anchor="software engineer building low latency trading infrastructure in c++ and python",
+        secondary_anchors=["kdb q tick data", "market data feed handlers"],
+    ),
+    classify_jd.RoleSpec(
+        name="Data",
+        resume="Data.pdf",
+        anchor="analyst building sql dashboards and reporting for business stakeholders",
+        secondary_anchors=["tableau power bi"],
+    ),
+]
+
+
+def test_max_scoring_reports_winning_anchor(fake_backend, monkeypatch):
+    monkeypatch.setattr(classify_jd, "ROLES", FACET_ROLES)
+    result = classify_text("kdb q tick data", backend="sbert", scoring="max")
+    assert result.role_category == "Quant Dev"
+    assert result.matched_anchor == "kdb q tick data"
+    assert result.similarity == pytest.approx(1.0)
+    assert classify_text("kdb q tick data", backend="sbert").matched_anchor is None
+
+
+def test_facets_embedded_once_and_scored_per_batch(fake_backend, monkeypatch):
+    monkeypatch.setattr(classify_jd, "ROLES", FACET_ROLES)
+    list(classify_jd.classify_many(BATCH_JDS, backend="sbert", batch_size=2, scoring="top2"))
+    assert [len(batch) for batch in fake_backend] == [5, 2, 2, 1]
+    fake_backend.clear()
+    classify_text("tableau power bi", backend="sbert", scoring="mean")
+    assert fake_backend == [["tableau power bi"]]
+
+
+@pytest.mark.parametrize("scoring", ["max", "mean", "top2"])
+def test_facet_scoring_list_path_matches_numpy(fake_backend, monkeypatch, scoring):
+    monkeypatch.setattr(classify_jd, "ROLES", FACET_ROLES)
+    expected = [classify_text(jd, backend="sbert", scoring=scoring) for jd in BATCH_JDS]
+    monkeypatch.setattr(classify_jd, "np", None)
+    got = [classify_text(jd, backend="sbert", scoring=scoring) for jd in BATCH_JDS]
+    assert [r.matched_anchor for r in got] == [r.matched_anchor for r in expected]
+    for a, b in zip(got, expected):
+        assert a.scores == pytest.approx(b.scores, abs=1e-4)
+
+
+def test_top1_equals_max_and_bad_mode_rejected(fake_backend):
+    jd = BATCH_JDS[1]
+    assert classify_text(jd, backend="sbert", scoring="top1") == classify_text(jd, backend="sbert", scoring="max")
+    for bad in ("top0", "median", "topx"):
+        with pytest.raises(ValueError):
+            classify_text(jd, backend="sbert", scoring=bad)
+
+
+# ---------------------------------------------------------------------------
+# Backend registry
+# ---------------------------------------------------------------------------
+
+class _HashBackend(classify_jd.EmbeddingBackend):
+    name = "hash-test"
+    max_batch = 3
+
+    def __init__(self):
+        self.batches = []
+
+    @property
+    def model(self):
+        return "hash-64"
+
+    @property
+    def dim(self):
+        return 64
+
+    def embed(self, batch):
+        self.batches.append(list(batch))
+        return [_fake_vector(t) for t in batch]
+
+
+def test_registered_backend_is_dispatched_in_max_batch_slices(monkeypatch, tmp_path):
+    monkeypatch.setattr(classify_jd, "_BACKENDS", dict(classify_jd._BACKENDS))
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+    backend = classify_jd.register_backend(_HashBackend())
+
+    assert "hash-test" in classify_jd.available_backends()
+    assert classify_jd.model_name("hash-test") == "hash-64"
+    results = list(classify_jd.classify_many(BATCH_JDS, backend="hash-test"))
+    assert len(results) == len(BATCH_JDS)
+    assert all(len(batch) <= backend.max_batch for batch in backend.batches)
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="unknown backend"):
+        classify_jd.get_backend("nope")
+
+
+def test_onnx_backend_matches_sbert_best_role():
+    """Parity on the test corpus; needs both stacks and an exported model."""
+    pytest.importorskip("sentence_transformers")
+    pytest.importorskip("onnxruntime")
+    pytest.importorskip("tokenizers")
+    if not os.path.exists(onnx_backend.model_path(classify_jd._onnx_model_dir())):
+        pytest.skip("no exported ONNX model; run onnx_backend.py export")
+
+    corpus = BATCH_JDS + [
+        "Design factor models and backtest signals for portfolio construction.",
+        "VaR calculations, stress testing, scenario analysis and exposure reporting.",
+        "Stakeholder dashboards, KPI design, SQL and Tableau for business insights.",
+        "Own budget vs actuals variance analysis and rolling forecasts for the CFO.",
+        "Build distributed backend services in Java and Kubernetes.",
+    ]
+    sbert = [r.role_category for r in classify_jd.classify_many(corpus, backend="sbert")]
+    onnx = [r.role_category for r in classify_jd.classify_many(corpus, backend="onnx")]
+    assert onnx == sbert
+
+
+# ---------------------------------------------------------------------------
+# Startup
+# ---------------------------------------------------------------------------
+
+def test_lazy_import_missing_package_is_none():
+    from startup import lazy_import
+    assert lazy_import("autoresume_no_such_package") is None
+
+
+def test_profile_startup_reports_each_phase(fake_backend):
+    profile, result = classify_jd.profile_startup(BATCH_JDS[0], backend="openai")
+    assert result == classify_text(BATCH_JDS[0], backend="openai")
+    for phase in ("backend_import", "model_load", "anchor", "query"):
+        assert getattr(profile, f"{phase}_seconds") >= 0.0
+    summary = profile.summary()
+    assert "anchor embed" in summary and "query embed" in summary
+
+
 # ---------------------------------------------------------------------------
 # Standalone runner (no pytest)
 # ---------------------------------------------------------------------------
@@ -172,6 +632,8 @@ if __name__ == "__main__":
         test_confidence_scores_sum_to_one,
         test_best_confidence_matches_role_category,
     ]
+    # Pay the model load once up front so per-test timings reflect inference.
+    print(classify_jd.warmup("sbert").summary())
     passed = failed = 0
     for t in tests:
         try:
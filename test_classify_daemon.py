@@ -0,0 +1,185 @@
+"""Tests for the classification daemon, with a fake classify_batch (no model)."""
+
+import os
+import threading
+
+import pytest
+
+import classify_daemon
+from classify_daemon import ClassifierDaemon, LatencyStats, MicroBatcher
+
+
+class FakeClassifier:
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts, pooling):
+        self.batches.append((list(texts), pooling))
+        return [{"role_category": text.upper(), "pooling": pooling} for text in texts]
+
+
+@pytest.fixture
+def unix_daemon(tmp_path):
+    fake = FakeClassifier()
+    daemon = ClassifierDaemon(fake, backend="sbert", socket_path=str(tmp_path / "c.sock"))
+    daemon.start()
+    yield daemon, fake
+    daemon.close()
+
+
+def test_concurrent_requests_share_a_batch():
+    fake = FakeClassifier()
+    gate = threading.Event()
+    batcher = MicroBatcher(fake, max_batch=8, max_wait=0.2)
+
+    results = {}
+
+    def worker(i):
+        gate.wait()
+        results[i] = batcher.classify(f"jd{i}")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(6)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+    batcher.close()
+
+    assert results == {i: {"role_category": f"JD{i}", "pooling": "none"} for i in range(6)}
+    assert len(fake.batches) < 6
+    assert sum(len(texts) for texts, _ in fake.batches) == 6
+
+
+def test_batch_is_split_by_pooling_mode():
+    fake = FakeClassifier()
+    batcher = MicroBatcher(fake, max_wait=0.05)
+    futures = [batcher.submit("a", "none"), batcher.submit("b", "mean"), batcher.submit("c", "none")]
+    assert [f.result(5)["role_category"] for f in futures] == ["A", "B", "C"]
+    batcher.close()
+    assert sorted(fake.batches) == [(["a", "c"], "none"), (["b"], "mean")]
+
+
+def test_classifier_errors_reach_the_caller():
+    def broken(texts, pooling):
+        raise ValueError("bad pooling")
+
+    batcher = MicroBatcher(broken)
+    with pytest.raises(ValueError, match="bad pooling"):
+        batcher.classify("x", timeout=5)
+    batcher.close()
+
+
+def test_unix_socket_round_trip(unix_daemon):
+    daemon, _ = unix_daemon
+    payload = classify_daemon.classify_remote(daemon.address, "hello", "sbert")
+    assert payload == {"role_category": "HELLO", "pooling": "none"}
+    assert classify_daemon.request(daemon.address, "GET", "/health")["ok"] is True
+
+    stats = classify_daemon.request(daemon.address, "GET", "/stats")
+    assert stats["requests"] == 1
+    assert set(stats["latency_ms"]) == {"p50", "p90", "p95", "p99", "max"}
+
+
+def test_other_backend_falls_back_to_local(unix_daemon):
+    daemon, fake = unix_daemon
+    assert classify_daemon.classify_remote(daemon.address, "hello", "openai") is None
+    assert fake.batches == []
+
+
+def test_other_settings_fall_back_to_local(tmp_path):
+    fake = FakeClassifier()
+    settings = {"roles": "abc", "scoring": "joined", "chunk_words": 200, "chunk_overlap": 50}
+    daemon = ClassifierDaemon(fake, backend="sbert", socket_path=str(tmp_path / "c.sock"), settings=settings)
+    daemon.start()
+    try:
+        other = dict(settings, chunk_words=100)
+        assert classify_daemon.classify_remote(daemon.address, "x", "sbert", settings=other) is None
+        assert classify_daemon.classify_remote(daemon.address, "x", "sbert") is None
+        assert fake.batches == []
+        assert classify_daemon.classify_remote(daemon.address, "x", "sbert", settings=settings)["role_category"] == "X"
+    finally:
+        daemon.close()
+
+
+def test_classifier_settings_cover_roles_chunking_and_calibration(monkeypatch):
+    import argparse
+
+    import classify_jd
+    args = argparse.Namespace(backend="sbert", vector_codec="float32", anchor_scoring="joined",
+                              chunk_words=200, chunk_overlap=50)
+    base = classify_jd._classifier_settings(args)
+    assert classify_jd._classifier_settings(args) == base
+    assert classify_jd._classifier_settings(argparse.Namespace(**dict(vars(args), chunk_overlap=0))) != base
+    monkeypatch.setattr(classify_jd, "ROLES", classify_jd.ROLES[:2])
+    assert classify_jd._classifier_settings(args)["roles"] != base["roles"]
+    monkeypatch.setattr(classify_jd, "_CALIBRATION", classify_jd.Calibration(temperature=0.05, thresholds={}))
+    assert classify_jd._classifier_settings(args)["calibration"] is not None
+    assert classify_jd._classifier_settings(argparse.Namespace(**dict(vars(args), vector_codec="int8"))) != base
+
+
+def test_daemon_with_other_openai_dims_is_not_used(tmp_path, monkeypatch):
+    import argparse
+
+    import classify_jd
+    args = argparse.Namespace(backend="openai", vector_codec="float32", anchor_scoring="joined",
+                              chunk_words=200, chunk_overlap=50)
+    monkeypatch.setattr(classify_jd, "OPENAI_DIMENSIONS", 256)
+    served = classify_jd._classifier_settings(args)
+    monkeypatch.setattr(classify_jd, "OPENAI_DIMENSIONS", None)
+    client = classify_jd._classifier_settings(args)
+    assert client["model"] != served["model"]
+    fake = FakeClassifier()
+    daemon = ClassifierDaemon(fake, backend="openai", socket_path=str(tmp_path / "c.sock"), settings=served)
+    daemon.start()
+    try:
+        assert classify_daemon.classify_remote(daemon.address, "x", "openai", settings=client) is None
+        assert fake.batches == []
+    finally:
+        daemon.close()
+
+
+def test_socket_is_private_from_bind(tmp_path, monkeypatch):
+    modes = []
+    bind = classify_daemon._UnixHTTPServer.server_bind
+
+    def recording_bind(server):
+        bind(server)
+        modes.append(os.stat(server.server_address).st_mode & 0o777)
+
+    monkeypatch.setattr(classify_daemon._UnixHTTPServer, "server_bind", recording_bind)
+    daemon = ClassifierDaemon(FakeClassifier(), backend="sbert", socket_path=str(tmp_path / "c.sock"))
+    daemon.start()
+    daemon.close()
+    assert modes and modes[0] & 0o077 == 0
+
+
+def test_http_transport():
+    daemon = ClassifierDaemon(FakeClassifier(), backend="sbert", port=0)
+    daemon.start()
+    try:
+        assert daemon.address.startswith("http://127.0.0.1:")
+        assert classify_daemon.classify_remote(daemon.address, "x", "sbert")["role_category"] == "X"
+    finally:
+        daemon.close()
+
+
+def test_no_daemon_returns_none(tmp_path):
+    assert classify_daemon.classify_remote(f"unix:{tmp_path / 'missing.sock'}", "x", "sbert") is None
+    assert classify_daemon.classify_remote("http://127.0.0.1:9", "x", "sbert", timeout=1) is None
+
+
+def test_refuses_to_steal_a_live_socket(unix_daemon):
+    daemon, _ = unix_daemon
+    with pytest.raises(OSError, match="already listening"):
+        ClassifierDaemon(FakeClassifier(), backend="sbert", socket_path=daemon.socket_path)
+
+
+def test_latency_percentiles():
+    stats = LatencyStats()
+    for ms in range(1, 101):
+        stats.record_request(ms / 1000.0)
+    latency = stats.snapshot()["latency_ms"]
+    assert latency["p50"] == pytest.approx(50.0)
+    assert latency["p99"] == pytest.approx(99.0)
+    assert latency["max"] == pytest.approx(100.0)
@@ -0,0 +1,148 @@
+"""Tests for near-duplicate posting detection (no model needed)."""
+
+import random
+import time
+
+import pytest
+
+import dedup_index
+from dedup_index import DuplicateIndex, MinHasher, estimate_jaccard
+
+JD = (
+    "We are hiring a quantitative researcher to design factor models, backtest equity "
+    "signals and manage portfolio construction with Python, pandas and statsmodels. "
+    "You will work with portfolio managers to deploy live strategies and monitor turnover."
+)
+REPOST = JD.replace("We are hiring", "Acme is hiring") + " Apply via our careers page."
+OTHER = (
+    "Own the annual budget and rolling forecast, perform variance analysis against plan "
+    "and prepare management reporting packages for the CFO and the board."
+)
+
+
+def test_minhash_estimates_jaccard():
+    hasher = MinHasher(128)
+    assert estimate_jaccard(hasher.signature(JD), hasher.signature(JD)) == 1.0
+    assert estimate_jaccard(hasher.signature(JD), hasher.signature(REPOST)) > 0.6
+    assert estimate_jaccard(hasher.signature(JD), hasher.signature(OTHER)) < 0.1
+
+
+def test_pure_python_signature_matches_numpy(monkeypatch):
+    pytest.importorskip("numpy")
+    with_numpy = MinHasher(32).signature(JD)
+    monkeypatch.setattr(dedup_index, "np", None)
+    assert MinHasher(32).signature(JD) == with_numpy
+
+
+def test_repost_found_before_embedding():
+    index = DuplicateIndex(jaccard_threshold=0.6)
+    index.add("jd-1", JD)
+    match = index.find_by_text(REPOST)
+    assert match is not None and match.posting_id == "jd-1" and match.kind == "minhash"
+    assert index.find_by_text(OTHER) is None
+
+
+def test_reworded_copy_found_by_cosine():
+    index = DuplicateIndex(cosine_threshold=0.95)
+    index.add("a", JD, vec=[1.0, 0.0, 0.0])
+    index.add("b", OTHER, vec=[0.0, 1.0, 0.0])
+    match = index.find_by_vector([0.99, 0.05, 0.0])
+    assert match.posting_id == "a" and match.kind == "cosine"
+    assert index.find_by_vector([0.7, 0.7, 0.0]) is None
+
+
+def test_index_persists_incrementally(tmp_path):
+    path = str(tmp_path / "dedup.sqlite")
+    index = DuplicateIndex(db_path=path)
+    index.add("jd-1", JD, vec=[1.0, 0.0])
+    index.close()
+
+    reopened = DuplicateIndex(db_path=path)
+    assert len(reopened) == 1
+    assert reopened.find_by_text(JD).posting_id == "jd-1"
+    assert reopened.find_by_vector([1.0, 0.0]).posting_id == "jd-1"
+    reopened.close()
+
+
+def test_transaction_commits_once(tmp_path):
+    import sqlite3
+
+    path = str(tmp_path / "dedup.sqlite")
+    index = DuplicateIndex(db_path=path)
+    with index.transaction():
+        index.add("jd-1", JD, vec=[1.0, 0.0])
+        index.add("jd-2", OTHER, vec=[0.0, 1.0])
+        reader = sqlite3.connect(path)
+        assert reader.execute("SELECT COUNT(*) FROM signatures").fetchone()[0] == 0
+    assert reader.execute("SELECT COUNT(*) FROM signatures").fetchone()[0] == 2
+    reader.close()
+    index.close()
+
+
+def test_own_id_is_excluded_and_re_adding_is_a_no_op():
+    index = DuplicateIndex(jaccard_threshold=0.6)
+    index.add("jd-1", JD, vec=[1.0, 0.0])
+    assert index.find_by_text(JD, exclude="jd-1") is None
+    assert index.find_by_vector([1.0, 0.0], exclude="jd-1") is None
+    assert index.find_by_text(JD, exclude="other").posting_id == "jd-1"
+    assert not index.add_text("jd-1", JD)
+    assert not index.add_vector("jd-1", [1.0, 0.0])
+    assert len(index) == 1 and len(index._vector_ids) == 1
+
+
+def test_re_adding_an_id_with_other_text_replaces_its_entry(tmp_path):
+    db = str(tmp_path / "dedup.sqlite")
+    index = DuplicateIndex(db_path=db)
+    index.add("feed:1", JD, [1.0, 0.0])
+    assert index.add_text("feed:1", OTHER) and index.add_vector("feed:1", [0.0, 1.0])
+    assert len(index) == 1 and len(index._vector_ids) == 1
+    assert index.find_by_text(JD) is None
+    assert index.find_by_text(OTHER).posting_id == "feed:1"
+    assert index.find_by_vector([1.0, 0.0]) is None
+    index.close()
+    reopened = DuplicateIndex(db_path=db)
+    assert len(reopened) == 1 and reopened.find_by_text(OTHER).posting_id == "feed:1"
+    assert reopened.find_by_vector([0.0, 1.0]).posting_id == "feed:1"
+    reopened.close()
+
+
+def test_vector_lookup_stays_fast_at_200k():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    index = DuplicateIndex()
+    vecs = rng.normal(size=(200_000, 64)).astype(np.float32)
+    for i, vec in enumerate(vecs):
+        index._append_vector(f"jd{i}", vec)
+    t0 = time.perf_counter()
+    for i in range(0, 200_000, 20_000):
+        assert index.find_by_vector(vecs[i]).posting_id == f"jd{i}"
+    assert (time.perf_counter() - t0) / 10 < 0.05
+
+
+def test_text_lookup_touches_only_colliding_buckets():
+    rng = random.Random(0)
+    vocab = [f"w{i}" for i in range(5000)]
+    index = DuplicateIndex()
+    for i in range(5000):
+        index.add_text(f"jd{i}", " ".join(rng.choice(vocab) for _ in range(40)))
+    probe = " ".join(rng.choice(vocab) for _ in range(40))
+    signature = index.signature(probe)
+    candidates = set()
+    for band, key in index._band_keys(signature):
+        candidates.update(index._buckets[band].get(key, ()))
+    assert len(candidates) < 50
+
+
+@pytest.mark.parametrize("codec", ["float16", "int8"])
+def test_compact_codec_persists_and_matches(tmp_path, codec):
+    path = str(tmp_path / "dedup.sqlite")
+    index = DuplicateIndex(db_path=path, codec=codec)
+    index.add_vector("jd-1", [0.6, 0.8, 0.0])
+    index.add_vector("jd-2", [0.0, 0.6, 0.8])
+    index.close()
+
+    reopened = DuplicateIndex(db_path=path, codec=codec)
+    match = reopened.find_by_vector([0.0, 0.6, 0.8])
+    assert match.posting_id == "jd-2"
+    assert match.score == pytest.approx(1.0, abs=0.01)
+    reopened.close()
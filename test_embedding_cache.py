@@ -0,0 +1,98 @@
+"""Tests for the two-tier JD embedding cache (no model needed)."""
+
+import pytest
+
+from embedding_cache import EmbeddingCache, normalize_text
+
+
+def vec(*xs):
+    return [float(x) for x in xs]
+
+
+def test_key_ignores_whitespace_but_not_backend():
+    k = EmbeddingCache.key
+    assert k("a  b\nc", "sbert", "m") == k("a b c", "sbert", "m")
+    assert k("a b c", "sbert", "m") != k("a b c", "openai", "m")
+    assert k("a b c", "sbert", "m1") != k("a b c", "sbert", "m2")
+    assert normalize_text("  x \t y ") == "x y"
+
+
+def test_memory_lru_eviction():
+    cache = EmbeddingCache(max_entries=2)
+    cache.put("a", vec(1))
+    cache.put("b", vec(2))
+    assert cache.get("a") is not None       # touch a so b is the oldest
+    cache.put("c", vec(3))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats.misses == 1
+
+
+def test_memory_tier_does_not_pin_the_batch_matrix():
+    np = pytest.importorskip("numpy")
+    batch = np.ones((64, 8), dtype=np.float32)
+    cache = EmbeddingCache()
+    cache.put_many({f"k{i}": row for i, row in enumerate(batch)})
+    cached = cache.get("k3")
+    assert cached.base is None and cached.nbytes == 8 * 4
+    assert not np.shares_memory(cached, batch)
+
+
+def test_sqlite_tier_survives_new_instance(tmp_path):
+    db = str(tmp_path / "jd.sqlite")
+    first = EmbeddingCache(db_path=db)
+    first.put("k", vec(0.5, -1.25))
+    first.close()
+
+    second = EmbeddingCache(db_path=db)
+    got = second.get("k")
+    assert [float(x) for x in got] == [0.5, -1.25]
+    assert second.stats.disk_hits == 1
+    # Promoted to memory: the next lookup never touches SQLite.
+    second.get("k")
+    assert second.stats.memory_hits == 1
+
+
+def test_sqlite_tier_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(max_entries=0, db_path=str(tmp_path / "jd.sqlite"), max_db_entries=2)
+    cache.put("old", vec(1))
+    cache.put("mid", vec(2))
+    cache.get("old")                        # refresh "old"
+    cache.put("new", vec(3))
+    assert cache.get("mid") is None
+    assert cache.get("old") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_hit_rate_summary():
+    cache = EmbeddingCache()
+    cache.put("a", vec(1))
+    cache.get_many(["a", "b"])
+    assert cache.stats.hit_rate == pytest.approx(0.5)
+    assert "hit rate 50.0%" in cache.stats.summary()
+
+
+def test_sqlite_tier_stores_compact_codec(tmp_path):
+    db = str(tmp_path / "jd.sqlite")
+    first = EmbeddingCache(db_path=db, codec="int8")
+    first.put("k", vec(0.6, -0.8))
+    first.close()
+
+    # A cache opened with another codec still reads the int8 row.
+    second = EmbeddingCache(db_path=db)
+    assert [float(x) for x in second.get("k")] == pytest.approx([0.6, -0.8], abs=0.01)
+
+
+def test_sqlite_tier_reads_rows_written_before_codecs(tmp_path):
+    import sqlite3
+    from array import array
+
+    db = str(tmp_path / "jd.sqlite")
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)")
+    conn.execute("INSERT INTO embeddings VALUES ('k', ?, 0)", (array("f", [0.5, 2.0]).tobytes(),))
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(db_path=db, codec="float16")
+    assert [float(x) for x in cache.get("k")] == [0.5, 2.0]
@@ -0,0 +1,206 @@
+"""Tests for the posting history index (no model needed)."""
+
+import io
+import json
+import time
+
+import pytest
+
+import classify_jd
+import history_index
+from application_store import ApplicationStore
+from history_index import HistoryEntry, HistoryIndex
+from pipeline import run_pipeline
+from test_classify import fake_backend  # noqa: F401  (fixture)
+from test_pipeline import POSTINGS, _write_feed
+
+
+def _clustered(n, dim=32, clusters=50, seed=0):
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    return (centers[rng.integers(0, clusters, n)] + 0.4 * rng.normal(size=(n, dim))).astype(np.float32)
+
+
+def test_exact_search_below_training_size():
+    index = HistoryIndex(":memory:")
+    index.add("a", [1.0, 0.0, 0.0], role_category="Quant", company="Acme")
+    index.add("b", [0.0, 1.0, 0.0])
+    index.add("c", [0.7, 0.7, 0.0])
+    assert not index.add("a", [0.0, 0.0, 1.0])          # already indexed
+    results = index.search([0.9, 0.1, 0.0], top=2)
+    assert [r.posting_id for r in results] == ["a", "c"]
+    assert results[0].role_category == "Quant" and results[0].company == "Acme"
+    assert index.search([0.9, 0.1, 0.0], top=2, exclude="a")[0].posting_id == "c"
+    assert not index.trained
+
+
+def test_pure_python_matches_numpy(monkeypatch):
+    vecs = _clustered(200, dim=8).tolist()
+    query = vecs[7]
+    with_numpy = HistoryIndex(":memory:")
+    with_numpy.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs))
+    expected = [r.posting_id for r in with_numpy.search(query, top=5)]
+    monkeypatch.setattr(history_index, "np", None)
+    monkeypatch.setattr("vector_codec.np", None)
+    plain = HistoryIndex(":memory:")
+    plain.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs))
+    assert [r.posting_id for r in plain.search(query, top=5)] == expected
+
+
+def test_ivf_recall_against_exact():
+    np = pytest.importorskip("numpy")
+    vecs = _clustered(20_000)
+    index = HistoryIndex(":memory:", min_train=5000)
+    index.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs))
+    assert index.retrain_if_due()
+    assert index.trained and index.stats()["lists"] >= 16
+    rng = np.random.default_rng(1)
+    recall = []
+    for i in rng.integers(0, len(vecs), 50):
+        query = vecs[i] + 0.2 * rng.normal(size=vecs.shape[1]).astype(np.float32)
+        approx = {r.posting_id for r in index.search(query, top=10)}
+        exact = {r.posting_id for r in index.search(query, top=10, exact=True)}
+        recall.append(len(approx & exact) / 10)
+    assert sum(recall) / len(recall) >= 0.9
+
+
+def test_incremental_inserts_join_existing_lists(tmp_path):
+    pytest.importorskip("numpy")
+    vecs = _clustered(3000)
+    path = str(tmp_path / "history.sqlite")
+    index = HistoryIndex(path, min_train=1000)
+    index.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs[:1000]))
+    assert not index.trained and index.needs_training        # inserts never train
+    assert index.retrain_if_due() and not index.retrain_if_due()
+    centroids = index._centroids.copy()
+    index.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs[1000:2000], 1000))
+    assert (index._centroids == centroids).all()        # assigned, not retrained
+    assert (index._assign[:2000] >= 0).all()
+    assert index.search(vecs[1500], top=1)[0].posting_id == "p1500"
+    index.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs[2000:], 2000))
+    assert not index.retrain_if_due()                        # grown 3x, not 4x
+    assert index.stats()["trained_on"] == 1000
+    index.close()
+
+    reopened = HistoryIndex(path, min_train=1000)
+    assert len(reopened) == 3000 and reopened.trained
+    assert (reopened._assign[:3000] == index._assign[:3000]).all()
+    assert reopened.search(vecs[2500], top=1)[0].posting_id == "p2500"
+    reopened.close()
+
+
+def test_index_is_bound_to_one_model(tmp_path):
+    path = str(tmp_path / "history.sqlite")
+    HistoryIndex(path, model="sbert/all-MiniLM-L6-v2").close()
+    with pytest.raises(ValueError):
+        HistoryIndex(path, model="openai/text-embedding-3-small")
+
+
+def test_search_stays_fast_at_100k():
+    np = pytest.importorskip("numpy")
+    vecs = _clustered(100_000, dim=64, clusters=500)
+    index = HistoryIndex(":memory:")
+    index.add_many(HistoryEntry(f"p{i}", v) for i, v in enumerate(vecs))
+    assert index.retrain_if_due()
+    t0 = time.perf_counter()
+    for i in range(0, 100_000, 10_000):
+        assert index.search(vecs[i], top=20)[0].posting_id == f"p{i}"
+    assert (time.perf_counter() - t0) / 10 < 0.05
+
+
+def test_pipeline_links_history_to_tracker(fake_backend, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS)
+    store = ApplicationStore(":memory:")
+    history = HistoryIndex(":memory:")
+    run_pipeline(str(feed), store, {}, backend="sbert", batch_size=2, history=history)
+    assert len(history) == len(POSTINGS)
+    store.db.execute("UPDATE applications SET status = 'Interview' WHERE company = 'Beta'")
+
+    query = history.vector(f"{feed}:b")
+    results = history.search(query, top=3, exclude=f"{feed}:b")
+    assert f"{feed}:b" not in [r.posting_id for r in results]
+    results = history.search(query, top=1)
+    history_index.attach_applications(results, store)
+    assert results[0].company == "Beta"
+    assert results[0].application["status"] == "Interview"
+    store.close()
+
+
+def test_similar_cli(tmp_path, capsys):
+    path = str(tmp_path / "history.sqlite")
+    index = HistoryIndex(path)
+    index.add("feed:a", [1.0, 0.0], application_key="https://jobs.acme.com/1", company="Acme")
+    index.add("feed:b", [0.8, 0.6], company="Beta")
+    index.close()
+    apps = str(tmp_path / "applications.sqlite")
+    store = ApplicationStore(apps)
+    store.upsert({"company": "Acme", "link": "https://jobs.acme.com/1", "status": "Rejected"})
+    store.close()
+
+    history_index.main(["--db", path, "--json", "similar", "--posting", "feed:b", "--applications", apps])
+    results = json.loads(capsys.readouterr().out)
+    assert [r["posting_id"] for r in results] == ["feed:a"]
+    assert results[0]["application"]["status"] == "Rejected"
+
+
+def test_writers_retrain_after_the_run(fake_backend, tmp_path):
+    pytest.importorskip("numpy")
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS)
+    history = HistoryIndex(":memory:", min_train=len(POSTINGS))
+    run_pipeline(str(feed), ApplicationStore(":memory:"), {}, backend="sbert", batch_size=2, history=history)
+    assert history.trained and not history.needs_training
+    history = HistoryIndex(":memory:", min_train=len(POSTINGS))
+    classify_jd.run_batch(str(feed), "sbert", 2, io.StringIO(), history=history)
+    assert history.trained
+
+
+def test_text_files_get_the_same_ids_as_in_the_pipeline(fake_backend, tmp_path, monkeypatch):
+    folder = tmp_path / "postings"
+    folder.mkdir()
+    for record in POSTINGS:
+        (folder / f"{record['id']}.txt").write_text(record["text"], encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+    from_batch = HistoryIndex(":memory:")
+    classify_jd.run_batch("postings", "sbert", 2, io.StringIO(), history=from_batch)
+    from_pipeline = HistoryIndex(":memory:")
+    run_pipeline("postings", ApplicationStore(":memory:"), {}, backend="sbert", history=from_pipeline)
+    assert set(from_batch._ids) == set(from_pipeline._ids) == {str(folder / f"{r['id']}.txt") for r in POSTINGS}
+
+
+def test_similar_cli_rejects_unknown_backends(tmp_path, capsys):
+    path = str(tmp_path / "history.sqlite")
+    HistoryIndex(path).close()
+    with pytest.raises(SystemExit) as exc:
+        history_index.main(["--db", path, "similar", "--text", "jd", "--backend", "bogus"])
+    assert exc.value.code == 2 and "invalid choice" in capsys.readouterr().err
+
+
+def test_batch_mode_adds_classified_jds(fake_backend, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS)
+    history = HistoryIndex(":memory:")
+    count, _ = classify_jd.run_batch(str(feed), "sbert", 2, io.StringIO(), history=history)
+    assert count == len(history) == len(POSTINGS)
+    hit = history.search(history.vector(f"{feed}:a"), top=1)[0]
+    assert hit.posting_id == f"{feed}:a" and hit.role_category
+
+
+def test_batch_mode_links_entries_to_tracker_rows(fake_backend, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS)
+    store = ApplicationStore(":memory:")
+    run_pipeline(str(feed), store, {}, backend="sbert")
+    history = HistoryIndex(":memory:")
+    classify_jd.run_batch(str(feed), "sbert", 2, io.StringIO(), history=history)
+
+    results = history.search(history.vector(f"{feed}:b"), top=len(POSTINGS))
+    history_index.attach_applications(results, store)
+    linked = {r.posting_id: r for r in results if r.application}
+    assert set(linked) == {f"{feed}:{p['id']}" for p in POSTINGS}
+    assert linked[f"{feed}:b"].company == "Beta" and linked[f"{feed}:b"].title == "Quant Researcher"
+    assert linked[f"{feed}:a"].link == "https://jobs.acme.com/1"
+    assert linked[f"{feed}:c"].application["status"] == "To Apply"
+    store.close()
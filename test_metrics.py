@@ -0,0 +1,131 @@
+"""Tests for metrics.py and the classifier's instrumentation (stub backend, no model)."""
+
+import http.client
+import json
+
+import pytest
+
+import classify_jd
+import metrics
+from bench_classify import ensure_stub_backend
+from classify_daemon import ClassifierDaemon
+from embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def collecting():
+    metrics.reset()
+    metrics.enable(trace=True)
+    yield
+    metrics.disable()
+    metrics.reset()
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    ensure_stub_backend()
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MEMO", {})
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MATRICES", {})
+    monkeypatch.setattr(classify_jd, "_FACET_MATRICES", {})
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+
+
+def test_disabled_records_nothing():
+    metrics.reset()
+    assert metrics.span("embed") is metrics.span("score")      # shared no-op
+    with metrics.span("embed"):
+        metrics.count("texts_embedded", 3)
+    assert metrics.snapshot()["spans"] == {}
+    assert metrics.snapshot()["counters"] == {}
+
+
+def test_spans_and_counters(collecting):
+    for _ in range(3):
+        with metrics.span("embed"):
+            pass
+    metrics.count_texts(["abcdefgh", "abc"])
+    snap = metrics.snapshot()
+    assert snap["spans"]["embed"]["count"] == 3
+    assert snap["counters"] == {"texts_embedded": 2, "tokens_estimated": 3}
+
+
+def test_prometheus_text(collecting):
+    with metrics.span("backend.sbert"):
+        pass
+    metrics.count("jd_cache.hits", 2)
+    text = metrics.prometheus_text()
+    assert "# TYPE autoresume_span_seconds histogram" in text
+    assert 'autoresume_span_seconds_bucket{span="backend.sbert",le="+Inf"} 1' in text
+    assert 'autoresume_span_seconds_count{span="backend.sbert"} 1' in text
+    assert "autoresume_jd_cache_hits_total 2" in text
+
+
+def test_chrome_trace(collecting, tmp_path):
+    with metrics.span("classify"):
+        with metrics.span("score"):
+            pass
+    path = tmp_path / "trace.json"
+    assert metrics.write_trace(str(path)) == 2
+    events = json.loads(path.read_text())["traceEvents"]
+    assert [e["name"] for e in events] == ["score", "classify"]
+    outer, inner = events[1], events[0]
+    assert outer["ph"] == "X"
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+
+
+def test_json_lines_exporter(collecting, tmp_path):
+    path = tmp_path / "metrics.jsonl"
+    exporter = metrics.JsonLinesExporter(str(path), interval=3600)
+    metrics.count("jds_classified", 5)
+    exporter.close()
+    exporter.close()
+    lines = path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["counters"] == {"jds_classified": 5}
+
+
+@pytest.mark.parametrize("interval", [0, -1.0, float("nan")])
+def test_json_lines_exporter_needs_a_positive_interval(tmp_path, interval):
+    with pytest.raises(ValueError):
+        metrics.JsonLinesExporter(str(tmp_path / "metrics.jsonl"), interval=interval)
+
+
+def test_cli_rejects_non_positive_metrics_interval(monkeypatch, capsys):
+    monkeypatch.setattr("sys.argv", ["classify_jd.py", "--text", "jd", "--metrics-interval", "0"])
+    with pytest.raises(SystemExit) as exc:
+        classify_jd.main()
+    assert exc.value.code == 2
+    assert "--metrics-interval must be > 0" in capsys.readouterr().err
+
+
+def test_classifier_hot_path_is_instrumented(collecting, stub):
+    texts = ["Factor models and alpha research.", "SQL dashboards for finance."]
+    list(classify_jd.classify_many(texts + texts[:1], backend="stub", batch_size=8))
+    snap = metrics.snapshot()
+    for name in ("embed", "backend.stub", "score", "softmax", "classify"):
+        assert snap["spans"][name]["count"] >= 1, name
+    counters = snap["counters"]
+    assert counters["jds_classified"] == 3
+    assert counters["anchors_embedded"] == len(classify_jd.ROLES)
+    assert counters["jd_cache.misses"] == 2
+    assert counters["jd_cache.hits"] == 1
+    assert counters["texts_embedded"] == len(classify_jd.ROLES) + 2
+
+
+def test_daemon_serves_prometheus(collecting):
+    metrics.count("jds_classified", 4)
+    daemon = ClassifierDaemon(lambda texts, pooling: [], backend="sbert", port=0)
+    daemon.start()
+    try:
+        host, port = daemon.address[len("http://"):].split(":")
+        conn = http.client.HTTPConnection(host, int(port), timeout=10)
+        conn.request("GET", "/metrics")
+        resp = conn.getresponse()
+        body = resp.read().decode("utf-8")
+        conn.close()
+    finally:
+        daemon.close()
+    assert resp.status == 200
+    assert resp.getheader("Content-Type").startswith("text/plain")
+    assert "autoresume_jds_classified_total 4" in body
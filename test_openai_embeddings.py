@@ -0,0 +1,155 @@
+"""Tests for the async OpenAI embeddings client against a local stub server."""
+
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from openai_embeddings import (
+    AsyncOpenAIEmbedder,
+    OpenAIEmbeddingError,
+    RateLimiter,
+    chunk_inputs,
+    estimate_tokens,
+)
+
+
+class StubServer:
+    """Minimal /v1/embeddings endpoint.  Each input ``"t<n>"`` embeds to ``[n, 1]``.
+
+    ``failures`` is a list of HTTP statuses returned (in order) before the
+    server starts answering normally.
+    """
+
+    def __init__(self, failures=()):
+        self.failures = list(failures)
+        self.requests = []
+        self.bodies = []
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with stub.lock:
+                    stub.requests.append((self.path, self.headers["Authorization"], body["input"]))
+                    stub.bodies.append(body)
+                    status = stub.failures.pop(0) if stub.failures else 200
+                if status != 200:
+                    payload = b'{"error": "nope"}'
+                    self.send_response(status)
+                    if status == 429:
+                        self.send_header("Retry-After", "0")
+                else:
+                    # Reverse the data list: clients must reorder by index.
+                    data = [
+                        {"index": i, "embedding": [float(text[1:]), 1.0]}
+                        for i, text in enumerate(body["input"])
+                    ][::-1]
+                    payload = json.dumps({"data": data}).encode("utf-8")
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+def make_embedder(url, **kwargs):
+    kwargs.setdefault("backoff_base", 0.0)
+    return AsyncOpenAIEmbedder("sk-test", base_url=url, **kwargs)
+
+
+def test_chunk_inputs_respects_token_and_count_limits():
+    texts = ["x" * 40] * 5                      # 10 tokens each
+    chunks = chunk_inputs(texts, max_tokens=25, max_inputs=10)
+    assert [(start, len(chunk)) for start, chunk, _ in chunks] == [(0, 2), (2, 2), (4, 1)]
+    chunks = chunk_inputs(texts, max_tokens=1000, max_inputs=3)
+    assert [len(chunk) for _, chunk, _ in chunks] == [3, 2]
+    assert chunk_inputs(["x" * 400], max_tokens=10)[0][2] == estimate_tokens("x" * 400)
+
+
+def test_embed_returns_vectors_in_input_order(stub):
+    texts = [f"t{i}" for i in range(23)]
+    embedder = make_embedder(stub.url, max_inputs_per_request=4, max_concurrency=3)
+    vecs = embedder.embed_sync(texts)
+    assert [v[0] for v in vecs] == [float(i) for i in range(23)]
+    assert len(stub.requests) == 6
+    assert all(path == "/v1/embeddings" for path, _, _ in stub.requests)
+    assert all(auth == "Bearer sk-test" for _, auth, _ in stub.requests)
+    embedder.close()
+
+
+def test_embed_sync_inside_running_loop(stub):
+    embedder = make_embedder(stub.url)
+
+    async def caller():
+        return embedder.embed_sync(["t1", "t2"])
+
+    assert asyncio.run(caller()) == [[1.0, 1.0], [2.0, 1.0]]
+    embedder.close()
+
+
+def test_retries_transient_errors(stub):
+    stub.failures = [429, 503]
+    embedder = make_embedder(stub.url)
+    assert embedder.embed_sync(["t1", "t2"]) == [[1.0, 1.0], [2.0, 1.0]]
+    assert embedder.retries == 2
+    embedder.close()
+
+
+def test_gives_up_after_max_retries(stub):
+    stub.failures = [500] * 3
+    embedder = make_embedder(stub.url, max_retries=2)
+    with pytest.raises(OpenAIEmbeddingError):
+        embedder.embed_sync(["t1"])
+    assert len(stub.requests) == 3
+
+
+def test_client_errors_are_not_retried(stub):
+    stub.failures = [401]
+    embedder = make_embedder(stub.url)
+    with pytest.raises(OpenAIEmbeddingError) as info:
+        embedder.embed_sync(["t1"])
+    assert info.value.status == 401
+    assert len(stub.requests) == 1
+
+
+def test_rate_limiter_waits_for_refill():
+    limiter = RateLimiter(requests_per_minute=60, tokens_per_minute=600)
+    assert limiter._try_acquire(500) == 0.0
+    # 100 tokens left; 300 more need 200 tokens = 20 s of refill at 10/s.
+    assert limiter._try_acquire(300) == pytest.approx(20.0, abs=0.1)
+
+
+def test_dimensions_are_requested_when_set(stub):
+    embedder = make_embedder(stub.url, dimensions=256)
+    embedder.embed_sync(["t1"])
+    embedder.close()
+    default = make_embedder(stub.url)
+    default.embed_sync(["t2"])
+    default.close()
+    assert stub.bodies[0]["dimensions"] == 256
+    assert "dimensions" not in stub.bodies[1]
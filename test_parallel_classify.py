@@ -0,0 +1,113 @@
+"""Tests for parallel_classify.py, using the stub backend from bench_classify (no model)."""
+
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+
+import pytest
+
+import classify_jd
+import metrics
+from bench_classify import ensure_stub_backend, jd_of_length
+from embedding_cache import EmbeddingCache
+from parallel_classify import SharedMatrix, _init_worker, _worker_settings, classify_parallel
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def stub(monkeypatch, tmp_path):
+    ensure_stub_backend()
+    # Workers are spawned fresh and read the cache dir from the environment.
+    monkeypatch.setenv("AUTORESUME_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MEMO", {})
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MATRICES", {})
+    monkeypatch.setattr(classify_jd, "_FACET_MATRICES", {})
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+    return [jd_of_length(40, seed) for seed in range(23)]
+
+
+def test_shared_matrix_round_trip():
+    matrix = np.arange(12, dtype=np.float64).reshape(3, 4)
+    shared = SharedMatrix(matrix)
+    try:
+        name, shape, dtype = shared.spec
+        shm = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        assert np.array_equal(view, matrix)
+        del view
+        shm.close()
+    finally:
+        shared.close()
+
+
+@pytest.mark.parametrize("scoring", ["joined", "max"])
+def test_parallel_matches_serial_in_order(stub, scoring):
+    serial = list(classify_jd.classify_many(stub, backend="stub", batch_size=4, scoring=scoring))
+    parallel = list(classify_parallel(stub, backend="stub", workers=2, batch_size=4, scoring=scoring))
+    assert [r for r, _ in parallel] == serial
+    assert all(vec is None for _, vec in parallel)
+
+
+def test_run_batch_with_workers_matches_serial(stub, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    with open(feed, "w", encoding="utf-8") as f:
+        for i, text in enumerate(stub + stub[:3]):          # repeats are cosine duplicates
+            f.write(json.dumps({"id": f"jd{i}", "text": text}) + "\n")
+
+    from dedup_index import DuplicateIndex
+
+    outputs = []
+    for workers in (1, 2):
+        out = io.StringIO()
+        dedup = DuplicateIndex(jaccard_threshold=1.1)        # cosine check only
+        count, _ = classify_jd.run_batch(str(feed), "stub", 4, out, dedup=dedup, workers=workers)
+        assert count == len(stub) + 3
+        outputs.append([json.loads(line) for line in out.getvalue().splitlines()])
+    assert outputs[0] == outputs[1]
+    assert sum("duplicate_of" in row for row in outputs[1]) == 3
+
+
+def _worker_state():
+    return classify_jd.OPENAI_DIMENSIONS, dict(classify_jd.OPENAI_LIMITS), metrics.ENABLED
+
+
+def test_workers_get_openai_and_metrics_settings(stub, monkeypatch):
+    monkeypatch.setattr(classify_jd, "OPENAI_DIMENSIONS", 256)
+    monkeypatch.setitem(classify_jd.OPENAI_LIMITS, "requests_per_minute", 600.0)
+    monkeypatch.setitem(classify_jd.OPENAI_LIMITS, "tokens_per_minute", 100_000.0)
+    monkeypatch.setitem(classify_jd.OPENAI_LIMITS, "max_concurrency", 8)
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    pool = ProcessPoolExecutor(
+        max_workers=1,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(classify_jd.get_backend("stub"), list(classify_jd.ROLES), None, None, "float32", None,
+                  _worker_settings(2)),
+    )
+    try:
+        dims, limits, enabled = pool.submit(_worker_state).result()
+    finally:
+        pool.shutdown()
+    assert dims == 256 and enabled
+    assert limits == {"requests_per_minute": 300.0, "tokens_per_minute": 50_000.0, "max_concurrency": 4}
+
+
+def test_worker_metrics_are_merged(stub):
+    metrics.reset()
+    metrics.enable()
+    try:
+        list(classify_parallel(stub, backend="stub", workers=2, batch_size=4))
+        assert metrics.snapshot()["counters"]["jds_classified"] == len(stub)
+    finally:
+        metrics.disable()
+        metrics.reset()
+
+
+def test_workers_return_pooled_vectors(stub):
+    parallel = list(classify_parallel(stub, backend="stub", workers=2, batch_size=4, pooling="mean",
+                                      chunk_words=16, chunk_overlap=4, with_vectors=True))
+    expected = classify_jd.jd_vectors(stub, "stub", "mean", 16, 4)
+    assert np.allclose([vec for _, vec in parallel], expected)
@@ -0,0 +1,121 @@
+"""Tests for pipeline.py, with the hashed bag-of-words backend from test_classify."""
+
+import json
+import os
+
+import pytest
+
+from application_store import ApplicationStore
+from pipeline import load_resume_variants, main, resume_for, roles_without_variant, run_pipeline
+from test_classify import fake_backend  # noqa: F401  (fixture)
+
+SAMPLE_VARIANTS = os.path.join(os.path.dirname(__file__), "sample_data", "ResumeVariants_sample.csv")
+
+POSTINGS = [
+    {"id": "a", "company": "Acme", "title": "Risk Analyst", "link": "https://jobs.acme.com/1",
+     "text": "Market risk analyst monitoring VaR, stress testing and expected shortfall."},
+    {"id": "b", "company": "Beta", "title": "Quant Researcher", "link": "https://beta.com/jobs/2",
+     "text": "Quantitative equity researcher building alpha factor models and backtests."},
+    {"id": "c", "company": "Gamma", "title": "FP&A Analyst",
+     "text": "Financial planning and analysis: budgeting, forecasting and variance analysis."},
+    {"id": "d", "text": "Business analyst gathering requirements and building SQL dashboards."},
+]
+
+
+def _write_feed(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+
+@pytest.fixture
+def store():
+    s = ApplicationStore(":memory:")
+    yield s
+    s.close()
+
+
+def test_resume_variants_from_sample_csv():
+    variants = load_resume_variants(SAMPLE_VARIANTS)
+    assert resume_for("Quant Equity Research", variants).file == "ZhouShuyi_QuantEquity_Resume_2026.pdf"
+    assert resume_for("Business Analyst", variants).name == "BA"
+    assert resume_for("FP&A", variants).name == "FPandA"
+    assert resume_for("Risk", variants).name == "Risk"            # by variant name
+    assert resume_for("Data Analyst", variants).name == "BA"      # any target role
+    assert roles_without_variant(variants) == ["SWE/Quant Dev"]
+    fallback = resume_for("SWE/Quant Dev", variants)
+    assert fallback.file.endswith(".pdf") and fallback.name
+
+
+def test_missing_variant_is_warned_about(fake_backend, tmp_path, capsys):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS[:1])
+    main([str(feed), "--resumes", SAMPLE_VARIANTS, "--db", str(tmp_path / "apps.sqlite"),
+          "--no-history", "--backend", "sbert"])
+    assert "targets 'SWE/Quant Dev'" in capsys.readouterr().err
+
+
+def test_pipeline_logs_and_checkpoints(fake_backend, store, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS[:3])
+    stats = run_pipeline(str(feed), store, {}, backend="sbert", batch_size=2)
+    assert (stats.logged, stats.tracked, stats.skipped) == (3, 0, 0)
+    row = store.by_link("https://jobs.acme.com/1")[0]
+    assert row["status"] == "To Apply" and row["role_category"] and row["resume_variant"]
+
+    # New records appended to the feed are the only ones classified next time.
+    _write_feed(feed, POSTINGS)
+    fake_backend.clear()
+    stats = run_pipeline(str(feed), store, {}, backend="sbert", batch_size=2)
+    assert (stats.logged, stats.skipped) == (1, 3)
+    assert fake_backend == [[POSTINGS[3]["text"]]]
+    assert len(store) == 4
+
+
+def test_pipeline_resumes_after_interruption(fake_backend, store, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS)
+
+    class Crash:
+        lines = 0
+
+        def write(self, line):
+            Crash.lines += 1
+            if Crash.lines == 3:
+                raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        run_pipeline(str(feed), store, {}, backend="sbert", batch_size=2, out=Crash())
+    assert len(store) == 2                      # the first batch was committed
+
+    stats = run_pipeline(str(feed), store, {}, backend="sbert", batch_size=2)
+    assert (stats.logged, stats.skipped) == (2, 2)
+    assert len(store) == 4
+
+
+def test_tracked_posting_keeps_its_status(fake_backend, store, tmp_path):
+    store.upsert({"company": "Acme", "link": "https://jobs.acme.com/1/", "status": "Interview"})
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS[:1])
+    stats = run_pipeline(str(feed), store, {}, backend="sbert")
+    assert (stats.logged, stats.tracked) == (0, 1)
+    assert store.by_link("https://jobs.acme.com/1")[0]["status"] == "Interview"
+
+
+def test_unidentified_posting_keeps_an_empty_link(fake_backend, store, tmp_path):
+    feed = tmp_path / "feed.jsonl"
+    _write_feed(feed, POSTINGS[3:])
+    run_pipeline(str(feed), store, {}, backend="sbert")
+    source_id = f"{feed}:d"
+    row = store.by_keys([source_id])[source_id]
+    assert row["link"] == "" and source_id in row["notes"]
+    assert run_pipeline(str(feed), store, {}, backend="sbert").skipped == 1
+
+
+def test_directory_feed(fake_backend, store, tmp_path):
+    feed = tmp_path / "postings"
+    feed.mkdir()
+    for posting in POSTINGS[:2]:
+        (feed / f"{posting['id']}.txt").write_text(posting["text"], encoding="utf-8")
+    assert run_pipeline(str(feed), store, {}, backend="sbert").logged == 2
+    assert run_pipeline(str(feed), store, {}, backend="sbert").skipped == 2
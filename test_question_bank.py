@@ -0,0 +1,104 @@
+"""Tests for question_bank.py, with the hashed bag-of-words backend from test_classify."""
+
+import csv
+
+import pytest
+
+import classify_jd
+from embedding_cache import EmbeddingCache
+from question_bank import QuestionBank, load_csv
+from test_classify import _fake_vector
+
+HEADER = ["Question type", "Keyword triggers", "Short answer", "Medium answer", "Long answer", "Last updated"]
+ROWS = [
+    ["Work authorization", "authorized to work; visa",
+     "yes i am authorized and will not require sponsorship now or in the future",
+     "", "", "2026-01-10"],
+    ["Salary expectations", "salary; compensation",
+     "my expected base pay range is flexible",
+     "my expected base pay range is flexible depending on the total package",
+     "", "2026-01-10"],
+    ["Start date", "start date; notice period",
+     "i can start two weeks after an offer", "", "", "2026-01-10"],
+]
+
+
+def _write_bank(path, rows):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+
+
+@pytest.fixture
+def fake_backend(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_get_embeddings(texts, backend):
+        calls.append(list(texts))
+        return [_fake_vector(t) for t in texts]
+
+    monkeypatch.setattr(classify_jd, "get_embeddings", fake_get_embeddings)
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+    return calls
+
+
+def test_load_csv_splits_triggers(tmp_path):
+    path = tmp_path / "bank.csv"
+    _write_bank(path, ROWS)
+    entries = load_csv(str(path))
+    assert [e.question_type for e in entries] == ["Work authorization", "Salary expectations", "Start date"]
+    assert entries[0].triggers == ["authorized to work", "visa"]
+    assert entries[0].answers["medium"] == ""
+
+
+def test_paraphrase_without_trigger_finds_answer(fake_backend, tmp_path):
+    path = tmp_path / "bank.csv"
+    _write_bank(path, ROWS)
+    bank = QuestionBank.from_csv(str(path), backend="sbert")
+    match = bank.answer("will you now or in the future require sponsorship")
+    assert match.question_type == "Work authorization"
+    assert not match.keyword_hit
+    assert match.matched == "answer:short"
+
+
+def test_keyword_trigger_adds_bonus_and_length_falls_back(fake_backend, tmp_path):
+    path = tmp_path / "bank.csv"
+    _write_bank(path, ROWS)
+    bank = QuestionBank.from_csv(str(path), backend="sbert")
+    match = bank.answer("What are your salary requirements?", length="long")
+    assert match.question_type == "Salary expectations"
+    assert match.keyword_hit
+    assert match.answer == ROWS[1][3]          # no long answer: nearest is medium
+    with pytest.raises(ValueError):
+        bank.match("anything", length="huge")
+
+
+def test_index_persists_and_reembeds_only_edited_rows(fake_backend, tmp_path):
+    path = tmp_path / "bank.csv"
+    _write_bank(path, ROWS)
+    first = QuestionBank.from_csv(str(path), backend="sbert")
+    assert first.embedded == 7                 # 3 question types + 4 answers
+
+    fake_backend.clear()
+    again = QuestionBank.from_csv(str(path), backend="sbert")
+    assert again.embedded == 0 and fake_backend == []
+
+    edited = [list(row) for row in ROWS]
+    edited[2][2] = "i can start immediately"
+    _write_bank(path, edited)
+    third = QuestionBank.from_csv(str(path), backend="sbert")
+    assert fake_backend == [["i can start immediately"]]
+    assert third.answer("when can you start immediately").answer == "i can start immediately"
+
+
+def test_pure_python_path_matches_numpy(fake_backend, tmp_path, monkeypatch):
+    path = tmp_path / "bank.csv"
+    _write_bank(path, ROWS)
+    question = "do you need visa sponsorship"
+    expected = QuestionBank.from_csv(str(path), backend="sbert").match(question, top=3)
+    monkeypatch.setattr(classify_jd, "np", None)
+    got = QuestionBank.from_csv(str(path), backend="sbert").match(question, top=3)
+    assert [m.question_type for m in got] == [m.question_type for m in expected]
+    assert [m.score for m in got] == pytest.approx([m.score for m in expected], abs=1e-3)
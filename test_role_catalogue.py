@@ -0,0 +1,123 @@
+"""Tests for role_catalogue.py, with the hashed bag-of-words backend from test_classify."""
+
+import json
+import os
+
+import pytest
+
+import classify_jd
+import role_catalogue
+from classify_jd import classify_text
+from test_classify import fake_backend  # noqa: F401  (fixture)
+
+CATALOGUE = {
+    "roles": [
+        {"name": "Risk", "resume": "Risk.pdf",
+         "anchors": ["market risk var stress testing expected shortfall", "risk limits exposure"]},
+        {"name": "Quant", "resume": "Quant.pdf",
+         "anchors": ["alpha factor models backtests equity research"]},
+        {"name": "Data", "resume": "Data.pdf",
+         "anchors": ["sql dashboards business intelligence reporting"]},
+    ]
+}
+
+
+@pytest.fixture
+def roles_restored(monkeypatch):
+    # set_roles rebinds the module global; put the built-in roles back afterwards.
+    monkeypatch.setattr(classify_jd, "ROLES", classify_jd.ROLES)
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    path = tmp_path / "roles.json"
+    path.write_text(json.dumps(CATALOGUE), encoding="utf-8")
+    return str(path)
+
+
+def test_load_catalogue_json_and_yaml(tmp_path, catalogue):
+    roles = role_catalogue.load_catalogue(catalogue)
+    assert [r.name for r in roles] == ["Risk", "Quant", "Data"]
+    assert roles[0].secondary_anchors == ["risk limits exposure"]
+
+    yaml_path = tmp_path / "roles.yaml"
+    yaml_path.write_text(
+        "roles:\n"
+        "  - name: Risk\n"
+        "    resume: Risk.pdf\n"
+        "    anchors:\n"
+        "      - market risk var stress testing expected shortfall\n"
+        "      - risk limits exposure\n",
+        encoding="utf-8",
+    )
+    assert role_catalogue.load_catalogue(str(yaml_path))[0] == roles[0]
+
+
+def test_export_round_trips_builtin_roles(tmp_path):
+    path = tmp_path / "builtin.json"
+    role_catalogue.main(["export", str(path)])
+    assert role_catalogue.load_catalogue(str(path)) == classify_jd.ROLES
+
+
+def test_duplicate_names_rejected(tmp_path):
+    path = tmp_path / "dup.json"
+    path.write_text(json.dumps({"roles": [CATALOGUE["roles"][0]] * 2}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        role_catalogue.load_catalogue(str(path))
+
+
+def test_compiled_artifact_round_trip(fake_backend, catalogue, tmp_path):
+    roles = role_catalogue.load_catalogue(catalogue)
+    out = str(tmp_path / "roles.anchors")
+    header = role_catalogue.compile_catalogue(roles, "sbert", out, source=catalogue)
+    assert header["model"] == classify_jd.model_name("sbert")
+    assert len(header["source_sha256"]) == 64
+
+    compiled = role_catalogue.load_artifact(out)
+    assert compiled.roles == roles and compiled.dim == header["dim"]
+    for row in compiled.vectors:
+        assert sum(float(x) ** 2 for x in row) == pytest.approx(1.0, abs=1e-5)
+    with pytest.raises(ValueError):
+        role_catalogue.load_artifact(catalogue)
+
+
+def test_activated_artifact_skips_anchor_embedding(fake_backend, roles_restored, catalogue, tmp_path):
+    roles = role_catalogue.load_catalogue(catalogue)
+    out = str(tmp_path / "roles.anchors")
+    role_catalogue.compile_catalogue(roles, "sbert", out)
+    jd = "We need someone for market risk and stress testing."
+    classify_jd.set_roles(roles)
+    expected = classify_text(jd, backend="sbert")
+
+    classify_jd._ANCHOR_MEMO.clear()              # a fresh process with no anchor store
+    classify_jd._ANCHOR_MATRICES.clear()
+    os.remove(classify_jd.AnchorStore("sbert").index_path)
+    fake_backend.clear()
+
+    role_catalogue.activate(out, "sbert")
+    result = classify_text(jd, backend="sbert")
+    assert fake_backend == []                     # the JD itself came from the JD cache
+    assert result.role_category == expected.role_category == "Risk"
+    assert result.scores == pytest.approx(expected.scores, abs=1e-4)
+
+
+def test_artifact_for_other_backend_derives_anchors(fake_backend, roles_restored, catalogue, tmp_path, capsys):
+    roles = role_catalogue.load_catalogue(catalogue)
+    out = str(tmp_path / "roles.anchors")
+    role_catalogue.compile_catalogue(roles, "sbert", out)
+    fake_backend.clear()
+    role_catalogue.activate(out, "openai")
+    assert "compiled for sbert" in capsys.readouterr().err
+    assert classify_jd.ROLES == roles
+    classify_jd.get_anchor_embeddings("openai")
+    assert len(fake_backend) == 1 and len(fake_backend[0]) == len(roles)
+
+
+def test_pure_python_artifact_load(fake_backend, catalogue, tmp_path, monkeypatch):
+    roles = role_catalogue.load_catalogue(catalogue)
+    out = str(tmp_path / "roles.anchors")
+    role_catalogue.compile_catalogue(roles, "sbert", out)
+    with_numpy = [list(map(float, row)) for row in role_catalogue.load_artifact(out).vectors]
+    monkeypatch.setattr(classify_jd, "np", None)
+    assert role_catalogue.load_artifact(out).vectors == with_numpy
+
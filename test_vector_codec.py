@@ -0,0 +1,95 @@
+"""Tests for compact vector storage (no model needed)."""
+
+import math
+import random
+
+import pytest
+
+import classify_jd
+import vector_codec
+from bench_classify import bench_codecs, ensure_stub_backend
+from embedding_cache import EmbeddingCache
+from vector_codec import CODECS, PCA, CompactMatrix, bytes_per_vector, decode, encode, truncate
+
+np = pytest.importorskip("numpy")
+
+
+def unit(dim, seed):
+    rng = random.Random(seed)
+    vec = [rng.gauss(0, 1) for _ in range(dim)]
+    norm = math.sqrt(sum(x * x for x in vec))
+    return [x / norm for x in vec]
+
+
+@pytest.mark.parametrize("codec,tolerance", [("float32", 1e-7), ("float16", 1e-3), ("int8", 1e-2)])
+def test_round_trip(codec, tolerance):
+    vec = unit(384, 1)
+    blob = encode(vec, codec)
+    assert len(blob) == bytes_per_vector(384, codec)
+    assert np.abs(np.asarray(decode(blob, codec)) - vec).max() < tolerance
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_pure_python_matches_numpy(codec, monkeypatch):
+    vec = unit(64, 2)
+    blob = encode(vec, codec)
+    monkeypatch.setattr(vector_codec, "np", None)
+    assert encode(vec, codec) == blob
+    assert decode(blob, codec) == pytest.approx(vec, abs=1e-2)
+
+
+def test_unknown_codec():
+    with pytest.raises(ValueError):
+        encode([1.0], "bfloat16")
+
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_compact_matrix_scores_like_float32(codec):
+    rows = [unit(128, seed) for seed in range(3000)]
+    matrix = CompactMatrix(codec, block_rows=512)
+    for row in rows:
+        matrix.append(row)
+    query = unit(128, -1)
+    exact = np.asarray(rows, dtype=np.float32) @ np.asarray(query, dtype=np.float32)
+    assert len(matrix) == 3000
+    assert matrix.nbytes == 3000 * bytes_per_vector(128, codec)
+    assert np.abs(matrix.dot(query) - exact).max() < 0.01
+
+
+def test_truncate_and_pca_keep_unit_rows():
+    m = np.asarray([unit(32, seed) for seed in range(100)])
+    assert np.allclose(np.linalg.norm(truncate(m, 8), axis=1), 1.0)
+    pca = PCA.fit(m, 32)
+    # All components: only the centring changes, so neighbours are preserved.
+    assert (pca.transform(m) @ pca.transform(m[:1]).T).argmax() == 0
+    assert PCA.fit(m, 4).transform(m).shape == (100, 4)
+
+
+def test_pca_save_load(tmp_path):
+    pca = PCA.fit(np.asarray([unit(16, seed) for seed in range(40)]), 4)
+    path = str(tmp_path / "pca.npz")
+    pca.save(path)
+    loaded = PCA.load(path)
+    assert np.array_equal(loaded.components, pca.components)
+
+
+def test_top1_change_bound_on_stub_corpus(monkeypatch, tmp_path):
+    ensure_stub_backend()
+    monkeypatch.setattr(classify_jd, "CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(classify_jd, "_ANCHOR_MEMO", {})
+    monkeypatch.setattr(classify_jd, "_JD_CACHE", EmbeddingCache())
+    rows = {row["codec"]: row for row in bench_codecs("stub", per_role=40, random_jds=200)}
+    assert rows["float32"]["top1_changed"] == 0
+    assert rows["float16"]["top1_change_rate"] == 0
+    assert rows["int8"]["top1_change_rate"] <= 0.01
+    assert rows["int8"]["bytes_per_vector"] * 3 < rows["float32"]["bytes_per_vector"]
+
+
+def test_openai_dims_change_the_model_key(monkeypatch):
+    monkeypatch.setattr(classify_jd, "OPENAI_DIMENSIONS", None)
+    assert classify_jd.model_name("openai") == "text-embedding-3-small"
+    classify_jd.configure_openai(dimensions=512)
+    assert classify_jd.model_name("openai") == "text-embedding-3-small@512"
+    assert classify_jd.get_backend("openai").dim == 512
+    with pytest.raises(ValueError):
+        classify_jd.configure_openai(dimensions=4096)
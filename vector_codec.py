@@ -0,0 +1,309 @@
+"""Compact storage for embedding vectors.
+
+A JD vector is 384 (MiniLM) or 1536 (text-embedding-3-small) floats.  At
+hundreds of thousands of stored postings that adds up, both in the SQLite
+embedding cache and in the dedup index's in-memory matrix.  Three codecs:
+
+    float32   4 bytes/dim, exact
+    float16   2 bytes/dim, ~3 significant digits
+    int8      1 byte/dim plus a float32 scale per vector (max |x| -> 127)
+
+``CompactMatrix`` keeps unit vectors in the chosen codec and scores a query
+against them block by block, so only one block is ever upcast to float32.
+Dimensionality can be cut too:
+
+* ``truncate`` keeps the first *dim* components and renormalises.  That is
+  only meaningful for Matryoshka-trained models such as text-embedding-3-*;
+  for OpenAI, ``classify_jd.py --openai-dims`` asks the API for it directly.
+* ``PCA`` projects onto the top principal components of a sample of vectors.
+  It is for evaluation only: nothing stores PCA-projected vectors, so the
+  cache and the indexes support truncation (and OpenAI ``dimensions``) alone.
+
+``top1_changes`` measures what each choice costs: how often the top-1 role
+changes against full precision, and the bytes per vector.
+``python3 bench_classify.py --codecs`` runs it on the benchmark corpus.
+"""
+
+from __future__ import annotations
+
+import math
+import struct
+from array import array
+from typing import List, Sequence
+
+from startup import lazy_import
+
+np = lazy_import("numpy")   # imported on first use; None when not installed
+
+CODECS = ("float32", "float16", "int8")
+_SCALE = struct.Struct("<f")
+
+
+def check_codec(codec: str) -> None:
+    if codec not in CODECS:
+        raise ValueError(f"codec must be one of {', '.join(CODECS)}")
+
+
+def bytes_per_vector(dim: int, codec: str) -> int:
+    check_codec(codec)
+    return {"float32": 4 * dim, "float16": 2 * dim, "int8": dim + _SCALE.size}[codec]
+
+
+def _int8_codes(vec: Sequence[float]):
+    """``(scale, codes)`` with ``vec ≈ scale * codes`` and codes in [-127, 127]."""
+    if np is not None:
+        vec = np.asarray(vec, dtype=np.float32)
+        peak = float(np.abs(vec).max()) if vec.size else 0.0
+        scale = peak / 127.0 if peak else 1.0
+        return scale, np.clip(np.rint(vec / scale), -127, 127).astype(np.int8)
+    vec = [float(x) for x in vec]
+    peak = max((abs(x) for x in vec), default=0.0)
+    scale = peak / 127.0 if peak else 1.0
+    return scale, array("b", (max(-127, min(127, round(x / scale))) for x in vec))
+
+
+def encode(vec: Sequence[float], codec: str = "float32") -> bytes:
+    """Serialise one vector (little-endian)."""
+    if codec == "int8":
+        scale, codes = _int8_codes(vec)
+        return _SCALE.pack(scale) + codes.tobytes()
+    if codec == "float16":
+        if np is not None:
+            return np.asarray(vec, dtype="<f2").tobytes()
+        vec = [float(x) for x in vec]
+        return struct.pack(f"<{len(vec)}e", *vec)
+    check_codec(codec)
+    if np is not None:
+        return np.asarray(vec, dtype="<f4").tobytes()
+    return array("f", (float(x) for x in vec)).tobytes()
+
+
+def decode(blob: bytes, codec: str = "float32") -> Sequence[float]:
+    """Inverse of ``encode``: a float32 array, or a list without NumPy."""
+    if codec == "int8":
+        (scale,) = _SCALE.unpack_from(blob)
+        if np is not None:
+            return np.frombuffer(blob, dtype=np.int8, offset=_SCALE.size).astype(np.float32) * np.float32(scale)
+        return [x * scale for x in array("b", blob[_SCALE.size:])]
+    if codec == "float16":
+        if np is not None:
+            return np.frombuffer(blob, dtype="<f2").astype(np.float32)
+        return list(struct.unpack(f"<{len(blob) // 2}e", blob))
+    check_codec(codec)
+    if np is not None:
+        return np.frombuffer(blob, dtype="<f4")
+    return array("f", blob).tolist()
+
+
+def _unit(vec: Sequence[float]) -> List[float]:
+    vec = [float(x) for x in vec]
+    norm = math.sqrt(sum(x * x for x in vec))
+    return [x / norm for x in vec] if norm else vec
+
+
+class CompactMatrix:
+    """Growable matrix of unit vectors stored in *codec*; ``dot`` scores on the compact rows.
+
+    Without NumPy the rows are kept as decoded lists, so the codec bounds the
+    precision but not the memory.
+    """
+
+    def __init__(self, codec: str = "float32", block_rows: int = 8192):
+        check_codec(codec)
+        self.codec = codec
+        self.block_rows = block_rows
+        self._n = 0
+        self._rows = None          # (capacity, dim) array in the codec's dtype
+        self._scales = None        # (capacity,) float32, int8 only
+        self._lists: List[List[float]] = []
+
+    def __len__(self) -> int:
+        return self._n
+
+    @property
+    def nbytes(self) -> int:
+        if self._rows is None:
+            return 0
+        per_row = self._rows.itemsize * self._rows.shape[1] + (4 if self._scales is not None else 0)
+        return self._n * per_row
+
+    def _grow(self, dim: int) -> None:
+        dtype = {"float32": np.float32, "float16": np.float16, "int8": np.int8}[self.codec]
+        capacity = 1024 if self._rows is None else self._rows.shape[0] * 2
+        if self._rows is not None and self._rows.shape[1] != dim:
+            raise ValueError(f"vector has {dim} dimensions, the matrix {self._rows.shape[1]}")
+        rows = np.zeros((capacity, dim), dtype=dtype)
+        scales = np.ones(capacity, dtype=np.float32) if self.codec == "int8" else None
+        if self._rows is not None:
+            rows[:self._n] = self._rows[:self._n]
+            if scales is not None:
+                scales[:self._n] = self._scales[:self._n]
+        self._rows, self._scales = rows, scales
+
+    def append(self, vec: Sequence[float]) -> None:
+        """Normalise *vec* and store it in the matrix's codec."""
+        if np is None:
+            self._lists.append(list(decode(encode(_unit(vec), self.codec), self.codec)))
+            self._n += 1
+            return
+        self.extend([vec])
+
+    def extend(self, vectors) -> None:
+        """``append`` for every row of *vectors*, vectorised."""
+        if np is None:
+            for vec in vectors:
+                self.append(vec)
+            return
+        m = np.asarray(vectors, dtype=np.float32)
+        if not len(m):
+            return
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        m = m / np.where(norms == 0, 1.0, norms)
+        while self._rows is None or self._n + len(m) > self._rows.shape[0]:
+            self._grow(m.shape[1])
+        lo, hi = self._n, self._n + len(m)
+        if self.codec == "int8":
+            peaks = np.abs(m).max(axis=1)
+            scales = np.where(peaks == 0, 1.0, peaks / 127.0).astype(np.float32)
+            self._rows[lo:hi] = np.clip(np.rint(m / scales[:, None]), -127, 127)
+            self._scales[lo:hi] = scales
+        else:
+            self._rows[lo:hi] = m
+        self._n = hi
+
+    def replace(self, row: int, vec: Sequence[float]) -> None:
+        """Overwrite stored row *row* with *vec*, normalised as in ``append``."""
+        if not 0 <= row < self._n:
+            raise IndexError(f"row {row} of {self._n}")
+        if np is None:
+            self._lists[row] = list(decode(encode(_unit(vec), self.codec), self.codec))
+            return
+        m = np.asarray(vec, dtype=np.float32)
+        norm = float(np.linalg.norm(m))
+        m = m / norm if norm else m
+        if self.codec == "int8":
+            scale, codes = _int8_codes(m)
+            self._rows[row] = codes
+            self._scales[row] = scale
+        else:
+            self._rows[row] = m
+
+    def take(self, rows) -> "np.ndarray":
+        """The stored rows at indices *rows*, dequantised to float32 (NumPy only)."""
+        out = self._rows[rows].astype(np.float32)
+        if self._scales is not None:
+            out *= self._scales[rows][:, None]
+        return out
+
+    def dot(self, query: Sequence[float], rows=None):
+        """Inner product of *query* with every stored row, or with the rows at indices *rows*.
+
+        The result is the cosine if *query* is unit length.
+        """
+        if np is None:
+            query = [float(x) for x in query]
+            picked = self._lists if rows is None else [self._lists[i] for i in rows]
+            return [sum(x * y for x, y in zip(query, row)) for row in picked]
+        query = np.asarray(query, dtype=np.float32)
+        if rows is not None:
+            return self.take(rows) @ query
+        if not self._n:
+            return np.zeros(0, dtype=np.float32)
+        if self.codec == "float32":
+            return self._rows[:self._n] @ query
+        out = np.empty(self._n, dtype=np.float32)
+        for lo in range(0, self._n, self.block_rows):
+            hi = min(lo + self.block_rows, self._n)
+            out[lo:hi] = self._rows[lo:hi].astype(np.float32) @ query
+        if self._scales is not None:
+            out *= self._scales[:self._n]
+        return out
+
+
+# ---------------------------------------------------------------------------
+# Dimensionality reduction
+# ---------------------------------------------------------------------------
+
+def truncate(vectors, dim: int):
+    """Matryoshka truncation: the first *dim* components of each row, renormalised."""
+    if np is not None:
+        m = np.asarray(vectors, dtype=np.float32)[:, :dim]
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        return m / np.where(norms == 0, 1.0, norms)
+    return [_unit(list(vec)[:dim]) for vec in vectors]
+
+
+class PCA:
+    """Projection onto the top principal components of a sample (NumPy required)."""
+
+    def __init__(self, mean, components):
+        self.mean = np.asarray(mean, dtype=np.float32)
+        self.components = np.asarray(components, dtype=np.float32)     # (dim, d)
+
+    @property
+    def dim(self) -> int:
+        return self.components.shape[0]
+
+    @classmethod
+    def fit(cls, vectors, dim: int) -> "PCA":
+        if np is None:
+            raise RuntimeError("PCA needs numpy: pip install numpy")
+        m = np.asarray(vectors, dtype=np.float64)
+        if dim > min(m.shape):
+            raise ValueError(f"cannot keep {dim} components of {m.shape[0]} x {m.shape[1]} samples")
+        mean = m.mean(axis=0)
+        _, _, vt = np.linalg.svd(m - mean, full_matrices=False)
+        return cls(mean, vt[:dim])
+
+    def transform(self, vectors):
+        """Project and renormalise, so cosine stays a dot product."""
+        out = (np.asarray(vectors, dtype=np.float32) - self.mean) @ self.components.T
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.where(norms == 0, 1.0, norms)
+
+    def save(self, path: str) -> None:
+        with open(path, "wb") as f:
+            np.savez(f, mean=self.mean, components=self.components)
+
+    @classmethod
+    def load(cls, path: str) -> "PCA":
+        if np is None:
+            raise RuntimeError("PCA needs numpy: pip install numpy")
+        with np.load(path) as data:
+            return cls(data["mean"], data["components"])
+
+
+# ---------------------------------------------------------------------------
+# Evaluation
+# ---------------------------------------------------------------------------
+
+def top1_changes(jd_vecs, anchors, codec: str = "float32", reduce=None) -> dict:
+    """How *codec* (after optional *reduce*) changes each JD's best role.
+
+    *reduce* maps an ``(n, d)`` matrix to a reduced one and is applied to both
+    JDs and anchors.  The JDs are stored in *codec* and scored against
+    full-precision anchors, as the dedup index and the cache would.
+    Returns the change rate, the largest cosine error and bytes per vector.
+    """
+    jd = np.asarray(jd_vecs, dtype=np.float32)
+    jd = jd / np.linalg.norm(jd, axis=1, keepdims=True)
+    an = np.asarray(anchors, dtype=np.float32)
+    an = an / np.linalg.norm(an, axis=1, keepdims=True)
+    reference = (jd @ an.T).argmax(axis=1)
+    if reduce is not None:
+        jd, an = reduce(jd), reduce(an)
+
+    full = jd @ an.T
+    stored = CompactMatrix(codec)
+    for vec in jd:
+        stored.append(vec)
+    compact = np.stack([stored.dot(anchor) for anchor in an], axis=1)
+    changed = int((compact.argmax(axis=1) != reference).sum())
+    return {
+        "codec": codec,
+        "dim": int(jd.shape[1]),
+        "bytes_per_vector": bytes_per_vector(int(jd.shape[1]), codec),
+        "top1_changed": changed,
+        "top1_change_rate": changed / len(jd),
+        "max_cosine_error": float(np.abs(compact - full).max()),
+    }